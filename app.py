@@ -6,10 +6,6 @@ import os
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
-
-# Charger les variables d'environnement en premier
-load_dotenv()
 
 # Configuration de la page
 st.set_page_config(
@@ -50,8 +46,9 @@ st.markdown("""
 # Imports des modules
 from utils.auth import check_authentication, show_logout_button
 from components.kpis import show_kpis_section, show_period_selector
-from components.conversations import show_conversations_section
 from config.settings import APP_TITLE, APP_SUBTITLE, CCI_COLORS
+from utils.perf import measure, show_perf_timings
+from utils.cache_warmer import start_cache_warmer
 
 def apply_custom_css():
     """
@@ -187,6 +184,10 @@ def main():
     # Appliquer le CSS personnalisé
     apply_custom_css()
     
+    # Préchauffer le cache partagé en arrière-plan (une fois par processus),
+    # pendant que l'utilisateur s'authentifie
+    start_cache_warmer()
+    
     # Vérifier l'authentification
     if not check_authentication():
         return
@@ -201,7 +202,7 @@ def main():
     st.sidebar.markdown("---")
     page = st.sidebar.radio(
         "Navigation",
-        ["KPIs", "Conversations"],
+        ["KPIs", "Conversations", "Contacts"],
         index=0  # KPIs par défaut
     )
     
@@ -216,10 +217,18 @@ def main():
         st.error("❌ La date de début doit être antérieure à la date de fin.")
         return
     
+    # Temps d'exécution des dernières interactions (diagnostic, désactivé par défaut)
+    show_perf_timings()
+    
     if page == "KPIs":
         show_kpis_section(start_date, end_date)
-    else:
+    elif page == "Conversations":
+        # Import à la première visite de la page Conversations
+        from components.conversations import show_conversations_section
         show_conversations_section(start_date, end_date)
+    else:
+        from components.contacts import show_contacts_section
+        show_contacts_section()
     
     # Footer
     st.markdown("---")
@@ -231,4 +240,5 @@ def main():
     """, unsafe_allow_html=True)
 
 if __name__ == "__main__":
-    main()
+    with measure("Exécution complète de l'application"):
+        main()
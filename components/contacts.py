@@ -0,0 +1,145 @@
+"""
+Composant Contacts : historique par numéro WhatsApp (toutes les conversations d'un même contact)
+"""
+import streamlit as st
+import pandas as pd
+
+from database.contacts import get_contacts_page, get_contact_chats, CONTACT_SORTS
+from config.settings import CONTACTS_PAGE_SIZE
+from utils.perf import measure
+
+CONTACT_COLUMNS = {
+    'phone': "Numéro",
+    'client_name': "Nom",
+    'company_name': "Entreprise",
+    'chat_count': "Conversations",
+    'total_messages': "Messages",
+    'first_seen': "Premier contact",
+    'last_seen': "Dernière activité",
+    'service_interest': "Service d'intérêt",
+}
+
+def show_contacts_section():
+    """
+    Afficher la vue Contacts (fragment : la pagination et la sélection ne relancent pas la page)
+    """
+    st.header("Contacts")
+    st.markdown("Un contact regroupe toutes les conversations d'un même numéro WhatsApp.")
+    show_contacts_table()
+
+@st.fragment
+def show_contacts_table():
+    """
+    Tableau des contacts paginé côté serveur et historique du contact sélectionné
+    """
+    with measure("Fragment contacts"):
+        render_contacts_table()
+
+def render_contacts_table():
+    """
+    Contenu du fragment contacts : filtres, page de contacts et détail
+    """
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        search_text = st.text_input(
+            "Rechercher un contact:",
+            placeholder="Numéro, nom ou entreprise...",
+            key="contacts_search"
+        ).strip()
+    with col2:
+        sort = st.selectbox(
+            "Trier par:",
+            options=list(CONTACT_SORTS),
+            format_func=lambda x: CONTACT_SORTS[x],
+            key="contacts_sort"
+        )
+
+    # Revenir à la première page quand le filtre ou le tri change
+    filters = (search_text, sort)
+    if st.session_state.get('contacts_filters') != filters:
+        st.session_state['contacts_filters'] = filters
+        st.session_state['contacts_page'] = 1
+
+    page = st.session_state.get('contacts_page', 1)
+    with st.spinner("Chargement des contacts..."):
+        contacts_df, total_contacts = cached_contacts_page(search_text, sort, page)
+        if contacts_df.empty and page > 1:
+            # Page au-delà de la fin (contacts supprimés, page gardée d'un autre filtre) :
+            # le total est inconnu sans ligne, revenir à la première page
+            page = st.session_state['contacts_page'] = 1
+            contacts_df, total_contacts = cached_contacts_page(search_text, sort, page)
+
+    if contacts_df.empty:
+        st.info("Aucun contact ne correspond à cette recherche.")
+        return
+
+    total_pages = (total_contacts - 1) // CONTACTS_PAGE_SIZE + 1
+    if total_pages > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            st.selectbox(
+                "Page",
+                range(1, total_pages + 1),
+                format_func=lambda x: f"Page {x} / {total_pages} ({total_contacts} contacts)",
+                key="contacts_page"
+            )
+
+    display_df = contacts_df[list(CONTACT_COLUMNS)].rename(columns=CONTACT_COLUMNS)
+    display_df['Numéro'] = '+' + display_df['Numéro']
+
+    event = st.dataframe(
+        display_df,
+        column_config={
+            "Premier contact": st.column_config.DatetimeColumn("Premier contact", format="DD/MM/YYYY"),
+            "Dernière activité": st.column_config.DatetimeColumn("Dernière activité", format="DD/MM/YYYY HH:mm"),
+        },
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key="contacts_table"
+    )
+
+    if event.selection.rows:
+        show_contact_history(contacts_df.iloc[event.selection.rows[0]])
+
+@st.cache_data(ttl=60, max_entries=128, show_spinner=False)
+def cached_contacts_page(search_text, sort, page):
+    """
+    Page de contacts mise en cache (partagée entre les sessions pendant 60 secondes)
+    """
+    return get_contacts_page(search_text, sort, (page - 1) * CONTACTS_PAGE_SIZE, CONTACTS_PAGE_SIZE)
+
+def show_contact_history(contact):
+    """
+    Afficher les conversations d'un contact et la conversation choisie
+    """
+    st.markdown("---")
+    st.subheader(f"📱 +{contact['phone']} - {contact['client_name']} ({contact['company_name']})")
+
+    if pd.notna(contact['latest_summary']) and contact['latest_summary']:
+        with st.expander("Dernier résumé IA", expanded=False):
+            st.markdown(contact['latest_summary'])
+
+    chats_df = get_contact_chats(contact['phone'])
+    if chats_df.empty:
+        st.info("Aucune conversation trouvée pour ce contact.")
+        return
+
+    option_labels = {
+        chat.chatid: f"{chat.first_message_at.strftime('%d/%m/%Y')} → {chat.last_message_at.strftime('%d/%m/%Y')}"
+                     f" - {chat.message_count} messages"
+                     + (f" - {chat.service_interest}" if pd.notna(chat.service_interest) else "")
+        for chat in chats_df.itertuples(index=False)
+    }
+    selected_chatid = st.selectbox(
+        f"Conversations du contact ({len(chats_df)}):",
+        options=list(option_labels),
+        format_func=lambda chatid: option_labels[chatid],
+        key=f"contact_chat_{contact['phone']}"
+    )
+
+    if selected_chatid:
+        # Lecteur partagé avec la page Conversations (import à l'usage, module plus lourd)
+        from components.conversations import show_full_conversation_details
+        show_full_conversation_details(selected_chatid)
@@ -4,16 +4,19 @@ Composants de la section conversations
 import os
 import streamlit as st
 import pandas as pd
-from datetime import datetime
-from dotenv import load_dotenv
-import io
+import html
 
-# Charger les variables d'environnement
-load_dotenv()
-
-from database.queries import get_conversations_summary_data, get_conversation_messages, get_all_conversations_with_analysis
+from database.queries import (
+    get_conversations_summary_data,
+    get_conversation_messages_window, get_conversation_stats, get_conversation_summary
+)
+from database.cache import get_conversation_list_store, get_page_message_cache, get_shared_cache, get_data_version
+from database.search import search_conversations, is_search_index_built, HIGHLIGHT_START, HIGHLIGHT_STOP
+from database.embedding_index import semantic_search_conversations
+from database.export import export_to_file, EXPORT_FORMATS
 from utils.llm_analysis import analyze_conversation_completion, regenerate_summary_only, regenerate_all_summaries
-from config.settings import MARIA_THEMES
+from config.settings import MARIA_THEMES, MESSAGE_WINDOW_SIZE, SEARCH_RESULTS_LIMIT
+from utils.perf import measure
 
 def show_conversations_section(start_date, end_date):
     """
@@ -21,9 +24,9 @@ def show_conversations_section(start_date, end_date):
     """
     st.header("Conversations et Analyses")
     
-    # Récupérer les données des conversations
+    # Récupérer les données des conversations (cache partagé par période et version des données)
     with st.spinner("Chargement des conversations..."):
-        conversations_df = get_conversations_summary_data(start_date, end_date)
+        conversations_df, display_df = get_prepared_conversations(start_date, end_date)
     
     if conversations_df.empty:
         st.info("Aucune conversation trouvée pour cette période.")
@@ -37,21 +40,49 @@ def show_conversations_section(start_date, end_date):
         show_summary_control_section(conversations_df)
         
         # Tableau des conversations avec pagination
-        show_conversations_table(conversations_df)
+        show_conversations_table(conversations_df, display_df)
         
         # Section d'analyse détaillée
         st.markdown("---")
-        show_detailed_analysis_section(conversations_df)
+        show_detailed_analysis_section(start_date, end_date)
     
     with tab2:
         # Nouvelle section lecteur de conversations
         show_conversation_reader_section()
 
-def show_conversations_table(conversations_df):
+def get_prepared_conversations(start_date, end_date):
     """
-    Afficher le tableau des conversations avec pagination
+    Retourner (conversations_df, display_df) pour la période, mémorisés par
+    (période, version des données) dans le cache partagé entre les sessions.
+    Les deux DataFrames ont le même ordre de lignes ; ils ne doivent pas être modifiés.
     """
+    data_version = get_data_version()
+    
+    def compute():
+        conversations_df = get_conversations_summary_data(start_date, end_date)
+        if conversations_df.empty:
+            return conversations_df, conversations_df
+        conversations_df = conversations_df.reset_index(drop=True)
+        return conversations_df, prepare_display_dataframe(conversations_df)
     
+    return get_shared_cache().get_or_compute(
+        ('prepared_conversations', start_date, end_date, data_version), compute
+    )
+
+@st.fragment
+def show_conversations_table(conversations_df, display_df):
+    """
+    Afficher le tableau des conversations avec pagination
+    Fragment : changer de page ou sélectionner une ligne ne réexécute que ce bloc
+    (pas l'authentification, la période ni les autres sections)
+    """
+    with measure("Fragment tableau des conversations"):
+        render_conversations_table(conversations_df, display_df)
+
+def render_conversations_table(conversations_df, display_df):
+    """
+    Contenu du fragment tableau : pagination, tableau et panneau de détail
+    """
     # Configuration de la pagination
     items_per_page = 20
     total_conversations = len(conversations_df)
@@ -69,12 +100,18 @@ def show_conversations_table(conversations_df):
         
         start_idx = (page - 1) * items_per_page
         end_idx = min(start_idx + items_per_page, total_conversations)
-        page_df = conversations_df.iloc[start_idx:end_idx]
     else:
-        page_df = conversations_df
+        start_idx, end_idx = 0, total_conversations
+    
+    # Tranches du DataFrame mémorisé (mêmes positions dans les deux frames, sans copie)
+    page_df = conversations_df.iloc[start_idx:end_idx]
+    page_display_df = display_df.iloc[start_idx:end_idx]
+    next_page_df = conversations_df.iloc[end_idx:end_idx + items_per_page]
     
-    # Préparer les données pour l'affichage
-    display_df = prepare_display_dataframe(page_df)
+    # Précharger les messages de la page visible (une requête groupée) puis la suivante en arrière-plan
+    page_cache = get_page_message_cache()
+    page_cache.prefetch(page_df['chatid'].astype(str).tolist())
+    page_cache.prefetch(next_page_df['chatid'].astype(str).tolist())
     
     # Configuration des colonnes - focus MAXIMUM sur le résumé
     column_config = {
@@ -89,8 +126,9 @@ def show_conversations_table(conversations_df):
     
     # Afficher le tableau avec plus de hauteur pour voir les résumés complets
     event = st.dataframe(
-        display_df,
+        page_display_df,
         column_config=column_config,
+        column_order=DISPLAY_COLUMNS,
         hide_index=True,
         use_container_width=True,  # Utiliser toute la largeur disponible
         height=600,
@@ -101,114 +139,93 @@ def show_conversations_table(conversations_df):
     # Actions sur la sélection
     if event.selection.rows:
         selected_idx = event.selection.rows[0]
-        # CORRECTION : Utiliser display_df pour récupérer les données affichées
-        selected_display_row = display_df.iloc[selected_idx]
         
-        # Récupérer le chatid et retrouver la ligne complète dans page_df
-        # Le chatid n'est pas affiché mais on peut le récupérer via l'index
-        selected_chatid = page_df.iloc[selected_idx]['chatid']
+        # Le chatid n'est pas affiché mais on le retrouve via la position dans page_df
         selected_row = page_df.iloc[selected_idx]
-
-        # Afficher le résumé complet en premier
-        st.markdown("---")
-        st.subheader("Résumé complet de la conversation")
-        
-        # Informations de base
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Contact", selected_row.get('whatsapp_number', 'N/A'))
-        with col2:
-            st.metric("Messages", selected_row.get('message_count', 'N/A'))
-        with col3:
-            st.metric("Service d'intérêt", selected_row.get('service_interest', 'Non analysé'))
         
-        # DEBUG : Afficher les sources de données
-        st.write("🔍 **DEBUG - Sources de données:**")
-        st.write(f"- selected_idx: {selected_idx}")
-        st.write(f"- Résumé dans page_df: {len(str(selected_row.get('conversation_summary', ''))) if selected_row.get('conversation_summary') else 0} caractères")
-        
-        # Récupérer DIRECTEMENT depuis la base pour être sûr
-        from database.connection import execute_query
-        summary_query = """
-        SELECT conversation_summary 
-        FROM conversation_analysis 
-        WHERE chatid::text = %s
-        """
-        summary_result = execute_query(summary_query, (selected_chatid,))
+        show_selected_conversation_panel(selected_row, page_cache.get_page(page_df['chatid'].astype(str).tolist()))
+
+def show_selected_conversation_panel(selected_row, page_messages):
+    """
+    Afficher le résumé et les messages d'une conversation du tableau
+    Tout provient de la page préchargée : aucune requête supplémentaire au clic
+    """
+    with measure("Panneau de détail"):
+        render_selected_conversation_panel(selected_row, page_messages)
+
+def render_selected_conversation_panel(selected_row, page_messages):
+    """
+    Contenu du panneau de détail d'une conversation du tableau
+    """
+    selected_chatid = str(selected_row['chatid'])
+    
+    # Afficher le résumé complet en premier
+    st.markdown("---")
+    st.subheader("Résumé complet de la conversation")
+    
+    # Informations de base
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Contact", selected_row.get('whatsapp_number', 'N/A'))
+    with col2:
+        st.metric("Messages", selected_row.get('message_count', 'N/A'))
+    with col3:
+        st.metric("Service d'intérêt", selected_row.get('service_interest', 'Non analysé'))
+    
+    summary = selected_row.get('conversation_summary')
+    if pd.notna(summary) and summary:
+        st.text_area("Résumé",
+                    value=str(summary),
+                    height=400,
+                    disabled=True,
+                    label_visibility="collapsed")
+    else:
+        st.info("Aucun résumé disponible pour cette conversation")
+    
+    # Section pour voir les messages (derniers messages préchargés avec la page)
+    with st.expander("Voir les messages complets"):
+        messages_df = page_messages.get(selected_chatid)
+        if messages_df is None or messages_df.empty:
+            st.error("Impossible de récupérer les messages de cette conversation.")
+            return
         
-        if not summary_result.empty and pd.notna(summary_result.iloc[0]['conversation_summary']):
-            db_summary = summary_result.iloc[0]['conversation_summary']
-            st.write(f"- Résumé DIRECT depuis PostgreSQL: {len(str(db_summary))} caractères")
-            
-            st.subheader("Résumé complet de la conversation")
-            st.text_area("", 
-                        value=str(db_summary), 
-                        height=400, 
-                        disabled=True,
-                        label_visibility="collapsed")
-        else:
-            st.info("Aucun résumé disponible pour cette conversation dans PostgreSQL")
+        show_conversation_messages(messages_df)
         
-        # Section pour voir les messages complets
-        with st.expander("Voir les messages complets"):
-            show_conversation_details(selected_chatid)
+        total_messages = selected_row.get('message_count')
+        if pd.notna(total_messages) and int(total_messages) > len(messages_df):
+            st.caption(f"{len(messages_df)} derniers messages sur {int(total_messages)} — "
+                       "l'historique complet est disponible dans le lecteur de conversations.")
+
+# Colonnes affichées dans le tableau
+DISPLAY_COLUMNS = ['Contact', 'Nom', 'Entreprise', 'Messages', 'Dernière activité', 'Service d\'intérêt', 'Résumé']
 
 def prepare_display_dataframe(conversations_df):
     """
     Préparer le DataFrame pour l'affichage dans le tableau - utilise les données PostgreSQL
+    L'ordre des lignes (dernière activité décroissante) est celui de la requête SQL
+    et est conservé pour retrouver la ligne sélectionnée par position
     """
-    display_df = conversations_df.copy()
-    
-    # Trier par dernière activité (plus récent en premier)
-    display_df = display_df.sort_values('end_time', ascending=False)
-    
-    # Convertir UUID en string pour éviter les erreurs Arrow
-    display_df['chatid'] = display_df['chatid'].astype(str)
-    
-    # 1. CONTACT (numéro WhatsApp)
-    def get_contact_display(row):
-        if pd.notna(row['whatsapp_number']):
-            return f"+{row['whatsapp_number']}"
-        return "Non disponible"
-    
-    display_df['contact_display'] = display_df.apply(get_contact_display, axis=1)
-    
-    # 2. NOM (utilise client_name_final de la base)
-    display_df['nom_display'] = display_df['client_name_final']
-    
-    # 3. ENTREPRISE (utilise company_name_final de la base)
-    display_df['entreprise_display'] = display_df['company_name_final']
-    
-    # 4. RÉSUMÉ (depuis la base PostgreSQL) - Version COMPLÈTE pour l'affichage
-    def get_conversation_summary_display(row):
-        if pd.notna(row['conversation_summary']) and row['conversation_summary']:
-            # GARDER le résumé COMPLET pour l'affichage
-            return row['conversation_summary']
-        return "⏳ Non généré"
-    
-    display_df['resume_display'] = display_df.apply(get_conversation_summary_display, axis=1)
-    
-    # 5. SERVICE D'INTÉRÊT (depuis la base PostgreSQL)
-    def get_service_interest(row):
-        if pd.notna(row['service_interest']) and row['service_interest']:
-            return row['service_interest']
-        return "⏳ Non analysé"
-    
-    display_df['service_display'] = display_df.apply(get_service_interest, axis=1)
-    
-    # Renommer TOUTES les colonnes en une seule fois
-    display_df = display_df.rename(columns={
-        'contact_display': 'Contact',
-        'nom_display': 'Nom',
-        'entreprise_display': 'Entreprise',
-        'message_count': 'Messages',
-        'end_time': 'Dernière activité',
-        'resume_display': 'Résumé',
-        'service_display': 'Service d\'intérêt'
+    summary = conversations_df['conversation_summary']
+    service = conversations_df['service_interest']
+    whatsapp = conversations_df['whatsapp_number']
+    
+    display_df = pd.DataFrame({
+        # Convertir UUID en string pour éviter les erreurs Arrow
+        'chatid': conversations_df['chatid'].astype(str),
+        # 1. CONTACT (numéro WhatsApp)
+        'Contact': ('+' + whatsapp.astype(str)).where(whatsapp.notna(), 'Non disponible'),
+        # 2. NOM et 3. ENTREPRISE (colonnes finales calculées depuis la base)
+        'Nom': conversations_df['client_name_final'],
+        'Entreprise': conversations_df['company_name_final'].astype('category'),
+        'Messages': conversations_df['message_count'],
+        'Dernière activité': conversations_df['end_time'],
+        # 5. SERVICE D'INTÉRÊT (valeurs très répétées : type catégoriel)
+        'Service d\'intérêt': service.where(service.notna() & (service != ''), '⏳ Non analysé').astype('category'),
+        # 4. RÉSUMÉ - Version COMPLÈTE pour l'affichage
+        'Résumé': summary.where(summary.notna() & (summary != ''), '⏳ Non généré'),
     })
     
-    # Retourner seulement les colonnes voulues
-    return display_df[['Contact', 'Nom', 'Entreprise', 'Messages', 'Dernière activité', 'Service d\'intérêt', 'Résumé']]
+    return display_df
 
 def format_duration(duration):
     """
@@ -223,57 +240,99 @@ def format_duration(duration):
     else:
         return f"{minutes}m"
 
-def show_conversation_details(chatid):
-    """
-    Afficher les détails d'une conversation sélectionnée
-    """
-    st.markdown("---")
-    st.subheader(f"🔍 Détails de la conversation: {chatid}")
-    
-    # Récupérer les messages de la conversation
-    with st.spinner("Chargement des messages..."):
-        messages_df = get_conversation_messages(chatid)
-    
-    if messages_df.empty:
-        st.error("Impossible de récupérer les messages de cette conversation.")
-        return
-    
-    # Afficher seulement les messages
-    show_conversation_messages(messages_df)
-
 def show_conversation_messages(messages_df):
     """
     Afficher les messages de la conversation
     """
     st.markdown("### Messages de la conversation")
     
-    for _, message in messages_df.iterrows():
-        if message['role'] == 'agent':
+    # Un seul bloc HTML pour toute la fenêtre au lieu d'un st.markdown par message
+    st.markdown(build_messages_html(messages_df), unsafe_allow_html=True)
+
+def build_messages_html(messages_df):
+    """
+    Construire un document HTML unique (contenu échappé) pour une liste de messages
+    """
+    blocks = []
+    for message in messages_df.itertuples(index=False):
+        if message.role == 'agent':
             # Message de l'agent (MarIA) - couleur grise
-            st.markdown(f"""
-            <div style="background-color: #F5F5F5; padding: 10px; border-radius: 10px; margin: 5px 0; border-left: 4px solid #999999;">
-                <strong>Agent MarIA</strong> <span style="color: #666; font-size: 0.8em;">{message['created_at']}</span><br>
-                {message['content']}
-            </div>
-            """, unsafe_allow_html=True)
+            author = "Agent MarIA"
+            style = "background-color: #F5F5F5; border-left: 4px solid #999999; margin: 10px 0;"
         else:
             # Message du client - couleur blanche
-            st.markdown(f"""
-            <div style="background-color: #FFFFFF; padding: 10px; border-radius: 10px; margin: 5px 0; border-left: 4px solid #CCCCCC; border: 1px solid #E0E0E0;">
-                <strong>Client</strong> <span style="color: #666; font-size: 0.8em;">{message['created_at']}</span><br>
-                {message['content']}
-            </div>
-            """, unsafe_allow_html=True)
+            author = "Client"
+            style = "background-color: #FFFFFF; border: 1px solid #E0E0E0; border-left: 4px solid #CCCCCC; margin: 10px 0 10px 20px;"
+        
+        timestamp = message.created_at.strftime('%d/%m/%Y %H:%M:%S') if pd.notna(message.created_at) else ''
+        content = html.escape(str(message.content) if pd.notna(message.content) else '').replace('\n', '<br>')
+        
+        # Pas d'indentation : le markdown interpréterait les lignes indentées comme du code
+        blocks.append(
+            f'<div style="{style} padding: 15px; border-radius: 15px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">'
+            f'<div style="display: flex; align-items: center; margin-bottom: 8px;">'
+            f'<strong style="color: #333;">{author}</strong>'
+            f'<span style="color: #666; font-size: 0.8em; margin-left: 10px;">{timestamp}</span>'
+            f'</div>'
+            f'<div style="color: #333; line-height: 1.4;">{content}</div>'
+            f'</div>'
+        )
+    return ''.join(blocks)
 
+@st.cache_data(max_entries=500, show_spinner=False)
+def get_message_window_html(chatid, last_message_at, before=None, after=None, limit=MESSAGE_WINDOW_SIZE):
+    """
+    Charger et pré-rendre une fenêtre de messages
+    La clé de cache inclut l'horodatage du dernier message : un nouveau message invalide le rendu
+    Un message de plus est lu pour savoir s'il reste des messages au-delà de la fenêtre
+    """
+    window_df = get_conversation_messages_window(chatid, before=before, after=after, limit=limit + 1)
+    if window_df.empty:
+        return {'html': '', 'count': 0, 'first_key': None, 'last_key': None,
+                'has_older': False, 'has_newer': False}
+    
+    has_more = len(window_df) > limit
+    if has_more:
+        # Le message supplémentaire est le plus éloigné de la borne
+        window_df = window_df.iloc[:limit] if after is not None else window_df.iloc[1:]
+    
+    first, last = window_df.iloc[0], window_df.iloc[-1]
+    return {
+        'html': build_messages_html(window_df),
+        'count': len(window_df),
+        'first_key': (first['created_at'], first['messageid']),
+        'last_key': (last['created_at'], last['messageid']),
+        'has_older': has_more if after is None else True,
+        'has_newer': has_more if after is not None else before is not None
+    }
 
-def show_detailed_analysis_section(conversations_df):
+@st.fragment
+def show_detailed_analysis_section(start_date, end_date):
     """
-    Afficher la section d'analyse détaillée
+    Afficher la section d'analyse détaillée (export de la période)
     """
     st.subheader("Export")
     
-    if st.button("Exporter le tableau", use_container_width=True):
-        export_conversations_data(conversations_df)
+    col1, col2 = st.columns(2)
+    with col1:
+        kind = st.selectbox(
+            "Contenu",
+            options=list(EXPORT_KINDS),
+            format_func=lambda x: EXPORT_KINDS[x],
+            key="export_kind"
+        )
+    with col2:
+        file_format = st.selectbox(
+            "Format",
+            options=list(EXPORT_FORMATS),
+            format_func=lambda x: EXPORT_FORMATS[x],
+            key="export_format"
+        )
+    
+    if st.button("Exporter", use_container_width=True):
+        export_conversations_data(start_date, end_date, kind, file_format)
+    
+    show_export_download_button()
 
 def show_summary_control_section(conversations_df):
     """
@@ -303,53 +362,101 @@ def show_summary_control_section(conversations_df):
 
 
 
+@st.fragment
 def show_conversation_reader_section():
     """
-    Section pour sélectionner et lire une conversation complète
+    Section pour rechercher et lire une conversation complète
+    Fragment : la recherche, la sélection et la navigation dans les messages
+    ne réexécutent que le lecteur
+    """
+    with measure("Fragment lecteur de conversations"):
+        render_conversation_reader_section()
+
+# Modes de recherche du lecteur : plein texte (PostgreSQL) ou sémantique (index d'embeddings des résumés)
+SEARCH_MODES = {
+    'keywords': "Mots-clés",
+    'semantic': "Sémantique (résumés)"
+}
+
+def render_conversation_reader_section():
+    """
+    Contenu du fragment lecteur : recherche, sélection et affichage de la conversation
     """
     st.subheader("🔍 Lecteur de conversations")
-    st.markdown("Sélectionnez un contact pour lire sa conversation complète avec l'agent IA.")
-    
-    # Récupérer toutes les conversations
-    with st.spinner("Chargement de la liste des conversations..."):
-        all_conversations = get_all_conversations_with_analysis()
+    st.markdown("Recherchez un contact pour lire sa conversation complète avec l'agent IA.")
     
-    if all_conversations.empty:
-        st.info("Aucune conversation disponible.")
-        return
+    conversation_store = get_conversation_list_store()
     
     # Sélecteur de conversation
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        # Créer les options du selectbox avec numéro de téléphone
-        conversation_options = []
-        for _, conv in all_conversations.iterrows():
-            # Format: "+Numéro - Nom (Entreprise) - Date"
-            display_text = f"+{conv['whatsapp_number']}"
-            if conv['display_name'] != 'Contact anonyme':
-                display_text += f" - {conv['display_name']}"
-            if conv['company_name'] != 'Non spécifié':
-                display_text += f" ({conv['company_name']})"
-            display_text += f" - {conv['last_activity'].strftime('%d/%m/%Y')}"
-            conversation_options.append((display_text, conv['chatid']))
+        search_mode = st.radio(
+            "Mode de recherche:",
+            options=list(SEARCH_MODES),
+            format_func=lambda x: SEARCH_MODES[x],
+            horizontal=True,
+            key="conversation_search_mode"
+        )
+        search_text = st.text_input(
+            "Rechercher une conversation:",
+            placeholder="Nom, entreprise, numéro WhatsApp, mot du résumé ou des messages..."
+            if search_mode == 'keywords' else "Sujet de la conversation (ex: visa de travail, foires...)",
+            key="conversation_search"
+        ).strip()
         
-        if conversation_options:
-            selected_conversation = st.selectbox(
-                "Choisir une conversation:",
-                options=conversation_options,
-                format_func=lambda x: x[0],
-                key="conversation_selector"
-            )
-            
-            selected_chatid = selected_conversation[1] if selected_conversation else None
+        if search_text:
+            with st.spinner("Recherche en cours..."):
+                if search_mode == 'keywords':
+                    # Recherche plein texte côté serveur : seules les meilleures correspondances sont envoyées
+                    candidates = cached_search_conversations(search_text)
+                else:
+                    # Recherche sémantique : résumés les plus proches dans l'index d'embeddings
+                    candidates = cached_semantic_search(search_text)
+            if candidates.empty:
+                if search_mode == 'keywords' and not is_search_index_built():
+                    st.info("L'index de recherche est en cours de construction, réessayez dans quelques minutes.")
+                    return
+                st.info("Aucune conversation ne correspond à cette recherche.")
+                return
         else:
-            selected_chatid = None
+            # Sans recherche : les conversations les plus récentes (cache partagé entre les sessions)
+            with st.spinner("Chargement de la liste des conversations..."):
+                candidates = conversation_store.get_frame().head(SEARCH_RESULTS_LIMIT)
+            if candidates.empty:
+                st.info("Aucune conversation disponible.")
+                return
+        
+        # Format: "+Numéro - Nom (Entreprise) - Date"
+        option_labels = {}
+        for conv in candidates.itertuples(index=False):
+            display_text = f"+{conv.whatsapp_number}"
+            if conv.display_name != 'Contact anonyme':
+                display_text += f" - {conv.display_name}"
+            if conv.company_name != 'Non spécifié':
+                display_text += f" ({conv.company_name})"
+            if pd.notna(conv.last_activity):
+                display_text += f" - {conv.last_activity.strftime('%d/%m/%Y')}"
+            option_labels[conv.chatid] = display_text
+        
+        selected_chatid = st.selectbox(
+            "Choisir une conversation:" if search_text else "Conversations récentes:",
+            options=list(option_labels),
+            format_func=lambda chatid: option_labels[chatid],
+            key="conversation_selector"
+        )
+        
+        if search_text and selected_chatid:
+            selected_result = candidates[candidates['chatid'] == selected_chatid].iloc[0]
+            if search_mode == 'keywords':
+                show_search_snippets(selected_result)
+            else:
+                st.caption(f"Similarité avec la recherche : {selected_result['score']:.2f}")
     
     with col2:
-        if selected_chatid:
-            # Afficher les infos du contact sélectionné
-            selected_info = all_conversations[all_conversations['chatid'] == selected_chatid].iloc[0]
+        # Afficher les infos du contact sélectionné
+        selected_info = conversation_store.get_conversation(selected_chatid) if selected_chatid else None
+        if selected_info is not None:
             st.info(f"""
             **Contact sélectionné:**
             - 👤 {selected_info['display_name']}
@@ -364,134 +471,186 @@ def show_conversation_reader_section():
         st.markdown("---")
         show_full_conversation_details(selected_chatid)
 
+@st.cache_data(ttl=60, max_entries=256, show_spinner=False)
+def cached_search_conversations(search_text):
+    """
+    Recherche plein texte mise en cache (partagée entre les sessions pendant 60 secondes)
+    """
+    return search_conversations(search_text)
+
+@st.cache_data(ttl=60, max_entries=256, show_spinner=False)
+def cached_semantic_search(search_text):
+    """
+    Recherche sémantique sur les résumés, complétée par la liste du lecteur
+    (numéro, nom, entreprise, dernière activité) pour l'affichage
+    """
+    matches = semantic_search_conversations(search_text, k=SEARCH_RESULTS_LIMIT)
+    conversations = get_conversation_list_store().get_frame()
+    if matches.empty or conversations.empty:
+        return pd.DataFrame()
+    columns = ['chatid', 'whatsapp_number', 'display_name', 'company_name', 'last_activity']
+    return matches.merge(conversations[columns], on='chatid', how='inner')
+
+def show_search_snippets(result_row):
+    """
+    Afficher les extraits surlignés d'un résultat de recherche
+    """
+    snippets = []
+    for label, snippet in (("Résumé", result_row['summary_snippet']), ("Message", result_row['message_snippet'])):
+        if pd.notna(snippet) and HIGHLIGHT_START in str(snippet):
+            snippets.append(f"<strong>{label} :</strong> {format_snippet_html(snippet)}")
+    
+    if snippets:
+        st.markdown(
+            '<div style="color: #333; font-size: 0.9em; line-height: 1.5;">' + "<br>".join(snippets) + '</div>',
+            unsafe_allow_html=True
+        )
+
+def format_snippet_html(snippet):
+    """
+    Échapper un extrait ts_headline puis convertir ses délimiteurs en surlignage <mark>
+    """
+    escaped = html.escape(str(snippet)).replace('\n', ' ')
+    return escaped.replace(html.escape(HIGHLIGHT_START), '<mark>').replace(html.escape(HIGHLIGHT_STOP), '</mark>')
+
 def show_full_conversation_details(chatid):
     """
     Afficher les détails complets d'une conversation sélectionnée
     """
-    # Récupérer les messages de la conversation
+    # Statistiques et bornes de la conversation en une seule requête agrégée
     with st.spinner("Chargement de la conversation..."):
-        messages_df = get_conversation_messages(chatid)
+        stats_df = get_conversation_stats(chatid)
     
-    if messages_df.empty:
+    if stats_df.empty or int(stats_df.iloc[0]['total_messages']) == 0:
         st.error("Impossible de récupérer les messages de cette conversation.")
         return
     
-    # Récupérer l'analyse si disponible
-    all_conversations = get_all_conversations_with_analysis()
-    conversation_info = all_conversations[all_conversations['chatid'] == chatid]
+    stats = stats_df.iloc[0]
     
-    if not conversation_info.empty:
-        conv_info = conversation_info.iloc[0]
-        
+    # Récupérer l'analyse si disponible (index par chatid du cache partagé)
+    conv_info = get_conversation_list_store().get_conversation(chatid)
+    
+    if conv_info is not None:
         # Afficher un résumé en haut
         if conv_info['summary_preview'] != 'Résumé non disponible':
             with st.expander("Résumé de la conversation", expanded=False):
-                # Récupérer le résumé complet depuis la base
-                summary_query = """
-                SELECT conversation_summary 
-                FROM conversation_analysis 
-                WHERE chatid::text = %s
-                """
-                from database.connection import execute_query
-                summary_result = execute_query(summary_query, (chatid,))
+                # Résumé complet (la liste partagée ne garde qu'un aperçu)
+                summary = get_conversation_summary(chatid)
                 
-                if not summary_result.empty and pd.notna(summary_result.iloc[0]['conversation_summary']):
-                    st.markdown(summary_result.iloc[0]['conversation_summary'])
+                if summary is not None:
+                    st.markdown(summary)
                 else:
                     st.info("Résumé non disponible pour cette conversation.")
     
-    # Afficher la conversation
+    # Afficher la conversation par fenêtres de MESSAGE_WINDOW_SIZE messages
     st.subheader("Messages de la conversation")
-    
-    # Container pour les messages avec scroll
-    message_container = st.container()
-    
-    with message_container:
-        for _, message in messages_df.iterrows():
-            if message['role'] == 'agent':
-                # Message de l'agent (MarIA) - couleur grise
-                st.markdown(f"""
-                <div style="
-                    background-color: #F5F5F5;
-                    padding: 15px;
-                    border-radius: 15px;
-                    margin: 10px 0;
-                    border-left: 4px solid #999999;
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                ">
-                    <div style="display: flex; align-items: center; margin-bottom: 8px;">
-                        <strong style="color: #333;">Agent MarIA</strong>
-                        <span style="color: #666; font-size: 0.8em; margin-left: 10px;">
-                            {message['created_at'].strftime('%d/%m/%Y %H:%M:%S')}
-                        </span>
-                    </div>
-                    <div style="color: #333; line-height: 1.4;">
-                        {message['content']}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                # Message du client - couleur blanche
-                st.markdown(f"""
-                <div style="
-                    background-color: #FFFFFF;
-                    padding: 15px;
-                    border-radius: 15px;
-                    margin: 10px 0;
-                    border-left: 4px solid #CCCCCC;
-                    border: 1px solid #E0E0E0;
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                    margin-left: 20px;
-                ">
-                    <div style="display: flex; align-items: center; margin-bottom: 8px;">
-                        <strong style="color: #333;">Client</strong>
-                        <span style="color: #666; font-size: 0.8em; margin-left: 10px;">
-                            {message['created_at'].strftime('%d/%m/%Y %H:%M:%S')}
-                        </span>
-                    </div>
-                    <div style="color: #333; line-height: 1.4;">
-                        {message['content']}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+    show_message_window(chatid, stats, key_prefix="reader")
     
     # Statistiques de la conversation
     st.markdown("---")
     col1, col2, col3, col4 = st.columns(4)
     
-    total_messages = len(messages_df)
-    client_messages = len(messages_df[messages_df['role'] == 'customer'])
-    agent_messages = len(messages_df[messages_df['role'] == 'agent'])
-    duration = messages_df['created_at'].max() - messages_df['created_at'].min()
+    duration = stats['last_message_at'] - stats['first_message_at']
     
     with col1:
-        st.metric("Messages total", total_messages)
+        st.metric("Messages total", int(stats['total_messages']))
     with col2:
-        st.metric("Messages client", client_messages)
+        st.metric("Messages client", int(stats['customer_messages']))
     with col3:
-        st.metric("Messages agent", agent_messages)
+        st.metric("Messages agent", int(stats['agent_messages']))
     with col4:
         duration_str = f"{duration.days}j {duration.seconds//3600}h {(duration.seconds//60)%60}m"
         st.metric("Durée", duration_str)
 
-def export_conversations_data(conversations_df):
+def show_message_window(chatid, stats, key_prefix):
     """
-    Exporter le tableau affiché des conversations au format CSV
+    Afficher une fenêtre de messages avec les contrôles "plus anciens / plus récents"
+    La position de la fenêtre est conservée par conversation dans la session
     """
-    # Préparer les données exactement comme dans le tableau affiché
-    display_df = prepare_display_dataframe(conversations_df)
+    state_key = f"{key_prefix}_message_window_{chatid}"
+    bounds = st.session_state.get(state_key, {'before': None, 'after': None})
+    
+    window = get_message_window_html(
+        chatid,
+        stats['last_message_at'],
+        before=bounds['before'],
+        after=bounds['after']
+    )
     
-    # Créer le fichier CSV
-    csv_buffer = io.StringIO()
-    display_df.to_csv(csv_buffer, index=False, encoding='utf-8-sig')
-    csv_data = csv_buffer.getvalue()
+    if window['count'] == 0:
+        # Fenêtre vide (messages supprimés entre-temps) : revenir aux derniers messages
+        st.session_state.pop(state_key, None)
+        window = get_message_window_html(chatid, stats['last_message_at'])
     
-    # Bouton de téléchargement
-    st.download_button(
-        label="📥 Télécharger le tableau CSV",
-        data=csv_data,
-        file_name=f"conversations_tableau_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-        mime="text/csv",
-        use_container_width=True
-    )
+    if window['has_older'] and st.button("⬆️ Messages plus anciens", key=f"{key_prefix}_older_{chatid}", use_container_width=True):
+        st.session_state[state_key] = {'before': window['first_key'], 'after': None}
+        st.rerun(scope="fragment")
+    
+    st.markdown(window['html'], unsafe_allow_html=True)
+    
+    if window['has_newer']:
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("⬇️ Messages plus récents", key=f"{key_prefix}_newer_{chatid}", use_container_width=True):
+                st.session_state[state_key] = {'before': None, 'after': window['last_key']}
+                st.rerun(scope="fragment")
+        with col2:
+            if st.button("⏬ Derniers messages", key=f"{key_prefix}_latest_{chatid}", use_container_width=True):
+                st.session_state.pop(state_key, None)
+                st.rerun(scope="fragment")
+    
+    st.caption(f"{window['count']} message(s) affiché(s) sur {int(stats['total_messages'])}")
 
+# Contenus d'export proposés (voir database/export.py)
+EXPORT_KINDS = {
+    'summary': "Tableau résumé (une ligne par conversation)",
+    'transcripts': "Transcriptions complètes (une ligne par message)",
+}
+
+EXPORT_MIME_TYPES = {
+    'csv.gz': "application/gzip",
+    'parquet': "application/vnd.apache.parquet",
+}
+
+def export_conversations_data(start_date, end_date, kind, file_format):
+    """
+    Générer le fichier d'export sur disque en lisant la base par lots (curseur serveur)
+    """
+    progress_text = st.empty()
+    
+    def show_progress(row_count):
+        progress_text.text(f"📦 {row_count} lignes exportées...")
+    
+    try:
+        with st.spinner("Génération du fichier d'export..."):
+            path, row_count = export_to_file(
+                kind, file_format, start_date, end_date,
+                progress_callback=show_progress
+            )
+    except Exception as e:
+        import logging
+        logging.warning(f"Erreur lors de l'export: {e}")
+        progress_text.empty()
+        st.error("❌ L'export n'a pas pu être généré.")
+        return
+    
+    progress_text.empty()
+    st.session_state.export_file = {'path': path, 'rows': row_count, 'format': file_format}
+
+def show_export_download_button():
+    """
+    Proposer le téléchargement du dernier fichier généré dans la session
+    """
+    export_file = st.session_state.get('export_file')
+    if not export_file or not os.path.exists(export_file['path']):
+        return
+    
+    st.caption(f"{export_file['rows']} ligne(s) exportée(s)")
+    with open(export_file['path'], 'rb') as export_handle:
+        st.download_button(
+            label="📥 Télécharger le fichier",
+            data=export_handle,
+            file_name=os.path.basename(export_file['path']),
+            mime=EXPORT_MIME_TYPES[export_file['format']],
+            use_container_width=True
+        )
@@ -1,19 +1,23 @@
 """
 Composants KPIs pour le dashboard
 """
+import math
 import os
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
+from collections import Counter
 from datetime import datetime, timedelta
 import pandas as pd
-from dotenv import load_dotenv
 
-# Charger les variables d'environnement
-load_dotenv()
-
-from database.queries import get_kpi_data, get_completion_stats, get_engaged_conversations_count
-from config.settings import CCI_COLORS
+from database.queries import (
+    get_new_conversations_by_period, get_analysis_completion_stats, get_service_interest_distribution,
+    get_theme_coverage, get_sampled_chat_message_counts, RESPONSE_TIME_BUCKETS
+)
+from database.cache import get_shared_cache, get_data_version, get_daily_kpi_partials, get_daily_response_times
+from database.activity import get_weekly_activity, get_message_volume, is_hourly_activity_built, ACTIVITY_METRICS
+from config.settings import (
+    CCI_COLORS, DEFAULT_PERIOD_START, MAX_CHART_POINTS, MARIA_THEMES,
+    KPI_APPROX_SAMPLE_PERCENT, KPI_EXACT_MAX_MESSAGES
+)
 
 def show_loading_placeholders():
     """
@@ -117,12 +121,187 @@ def show_loading_placeholders():
         </div>
         """, unsafe_allow_html=True)
 
+def build_kpi_bundle(chat_message_counts):
+    """
+    Calculer les KPIs à partir du nombre de messages par conversation sur la période
+    (mêmes seuils que les requêtes SQL : engagée > 2 messages, complète > 7 messages)
+    """
+    message_counts = pd.Series(list(chat_message_counts.values()), dtype='int64')
+    total = len(message_counts)
+    completed = int((message_counts > 7).sum())
+    
+    kpi_data = {
+        'total_users': total,
+        'avg_conversation_length': round(float(message_counts.mean()), 1) if total else 0
+    }
+    completion_stats = pd.DataFrame([{
+        'total_conversations': total,
+        'completed_count': completed,
+        'incomplete_count': total - completed,
+        'not_analyzed_count': 0
+    }])
+    engaged = pd.DataFrame([{'engaged_conversations': int((message_counts > 2).sum())}])
+    
+    return {
+        'kpi_data': kpi_data,
+        'completion_stats': completion_stats,
+        'engaged': engaged
+    }
+
+def get_previous_period(start_date, end_date):
+    """
+    Période précédente de même durée, se terminant la veille de start_date
+    """
+    period_days = (end_date - start_date).days + 1
+    previous_end = start_date - timedelta(days=1)
+    return previous_end - timedelta(days=period_days - 1), previous_end
+
+def load_kpi_data(start_date, end_date, compare=False):
+    """
+    Récupérer les données des KPIs pour la période (jours start_date -> end_date inclus)
+    Les KPIs sont assemblés à partir des partiels journaliers : seuls les jours absents
+    du cache et le jour courant sont interrogés en base
+    
+    compare : calculer aussi la période précédente ('previous'). Les deux fenêtres sont lues
+    ensemble (une seule requête sur l'union des jours manquants) puis séparées par jour
+    """
+    data_version = get_data_version()
+    
+    def compute():
+        range_start = get_previous_period(start_date, end_date)[0] if compare else start_date
+        current_counts, previous_counts = Counter(), Counter()
+        for day, day_counts in get_daily_kpi_partials().get_partials(range_start, end_date, data_version):
+            (current_counts if day >= start_date else previous_counts).update(day_counts)
+        
+        bundle = build_kpi_bundle(current_counts)
+        bundle['previous'] = build_kpi_bundle(previous_counts) if compare else None
+        return bundle
+    
+    return get_shared_cache().get_or_compute(
+        ('kpi_data', start_date, end_date, compare, data_version), compute
+    )
+
+def get_kpi_values(kpi_bundle):
+    """
+    Valeurs des cartes KPI d'un résultat de load_kpi_data
+    """
+    completion_stats_df = kpi_bundle['completion_stats']
+    engaged_df = kpi_bundle['engaged']
+    return {
+        'total_users': int(kpi_bundle['kpi_data'].get('total_users', 0) or 0),
+        'engaged': int(engaged_df.iloc[0]['engaged_conversations']) if not engaged_df.empty else 0,
+        'avg_conversation_length': kpi_bundle['kpi_data'].get('avg_conversation_length', 0) or 0,
+        'completed': int(completion_stats_df.iloc[0]['completed_count']) if not completion_stats_df.empty else 0,
+        'incomplete': int(completion_stats_df.iloc[0]['incomplete_count']) if not completion_stats_df.empty else 0
+    }
+
+# Quantile de la loi normale pour les marges d'erreur à 95 % du mode approximatif
+Z_95 = 1.96
+
+def build_sampled_kpi_bundle(chat_message_counts, sample_fraction):
+    """
+    Estimer les KPIs à partir d'un échantillon de conversations (chaque conversation tirée avec
+    la probabilité sample_fraction) : comptes extrapolés (n / f) et marges d'erreur à 95 %
+    ('margins', même clés que get_kpi_values). Un compte tiré suit une loi binomiale :
+    écart-type de l'estimation = sqrt(n * (1 - f)) / f
+    """
+    message_counts = pd.Series(list(chat_message_counts.values()), dtype='int64')
+    sampled = {
+        'total_users': len(message_counts),
+        'engaged': int((message_counts > 2).sum()),
+        'completed': int((message_counts > 7).sum())
+    }
+    sampled['incomplete'] = sampled['total_users'] - sampled['completed']
+    
+    estimates = {key: round(count / sample_fraction) for key, count in sampled.items()}
+    # Marges arrondies au-dessus ; un compte nul dans l'échantillon n'exclut pas quelques conversations
+    margins = {
+        key: math.ceil(Z_95 * math.sqrt(max(count, 1) * (1 - sample_fraction)) / sample_fraction)
+        for key, count in sampled.items()
+    }
+    average = round(float(message_counts.mean()), 1) if len(message_counts) else 0
+    margins['avg_conversation_length'] = (
+        math.ceil(10 * Z_95 * float(message_counts.std()) / math.sqrt(len(message_counts))) / 10
+        if len(message_counts) > 1 else None
+    )
+    
+    return {
+        'kpi_data': {'total_users': estimates['total_users'], 'avg_conversation_length': average},
+        'completion_stats': pd.DataFrame([{
+            'total_conversations': estimates['total_users'],
+            'completed_count': estimates['completed'],
+            'incomplete_count': estimates['incomplete'],
+            'not_analyzed_count': 0
+        }]),
+        'engaged': pd.DataFrame([{'engaged_conversations': estimates['engaged']}]),
+        'margins': margins,
+        'sample_size': sampled['total_users']
+    }
+
+def should_sample_kpis(start_date, end_date):
+    """
+    Le mode approximatif n'échantillonne qu'au-delà de KPI_EXACT_MAX_MESSAGES messages sur la
+    période (volume lu dans le cumul horaire) ; volume inconnu : résultats exacts
+    """
+    volume = get_shared_cache().get_or_compute(
+        ('message_volume', start_date, end_date, get_data_version()),
+        lambda: (get_message_volume(start_date, end_date),)
+    )[0]
+    return volume is not None and volume > KPI_EXACT_MAX_MESSAGES
+
+def load_approximate_kpi_data(start_date, end_date, compare=False):
+    """
+    KPIs estimés sur un échantillon de KPI_APPROX_SAMPLE_PERCENT % des conversations
+    (même structure que load_kpi_data, avec les marges d'erreur en plus)
+    """
+    data_version = get_data_version()
+    
+    def sampled_bundle(period_start, period_end):
+        counts_df = get_sampled_chat_message_counts(period_start, period_end, KPI_APPROX_SAMPLE_PERCENT)
+        counts = dict(zip(counts_df['chatid'], counts_df['message_count'])) if not counts_df.empty else {}
+        return build_sampled_kpi_bundle(counts, KPI_APPROX_SAMPLE_PERCENT / 100)
+    
+    def compute():
+        bundle = sampled_bundle(start_date, end_date)
+        bundle['previous'] = sampled_bundle(*get_previous_period(start_date, end_date)) if compare else None
+        return bundle
+    
+    return get_shared_cache().get_or_compute(
+        ('approximate_kpi_data', start_date, end_date, compare, KPI_APPROX_SAMPLE_PERCENT, data_version), compute
+    )
+
+def show_metric_margin(margins, key):
+    """
+    Afficher la marge d'erreur (95 %) sous une carte KPI en mode approximatif
+    """
+    if margins and margins.get(key) is not None:
+        st.caption(f"± {margins[key]} (IC 95 %)")
+
 def show_kpis_section(start_date, end_date):
     """
     Afficher la section KPIs du dashboard avec indicateurs de chargement
     """
     st.header("Indicateurs Clés de Performance")
     
+    toggle_col1, toggle_col2 = st.columns(2)
+    with toggle_col1:
+        compare = st.toggle("Comparer à la période précédente", key="compare_previous_period")
+    with toggle_col2:
+        approximate = st.toggle(
+            "Mode approximatif (grandes périodes)",
+            key="approximate_kpis",
+            help=f"Estimation sur {KPI_APPROX_SAMPLE_PERCENT:g} % des conversations au-delà de "
+                 f"{KPI_EXACT_MAX_MESSAGES} messages sur la période"
+        )
+    if compare:
+        previous_start, previous_end = get_previous_period(start_date, end_date)
+        st.caption(f"Évolution par rapport au {previous_start.strftime('%d/%m/%Y')} - {previous_end.strftime('%d/%m/%Y')}")
+    
+    # Échantillonnage seulement si la période est assez volumineuse, sinon résultats exacts
+    sampled = approximate and should_sample_kpis(start_date, end_date)
+    if approximate and not sampled:
+        st.caption("Volume de la période modéré : résultats exacts")
+    
     # Conteneur principal pour les placeholders
     main_container = st.container()
     
@@ -144,20 +323,17 @@ def show_kpis_section(start_date, end_date):
         
         # Récupérer les données KPI avec feedback détaillé
         try:
-            # Étape 1: Chargement des données KPI
+            # Données KPI, completion et conversations engagées (cache partagé, préchauffé au démarrage)
             status_text.text("🔄 Récupération des données KPI...")
             progress_bar.progress(20)
-            kpi_data = get_kpi_data(start_date, end_date)
-            
-            # Étape 2: Chargement des statistiques de completion
-            status_text.text("📊 Analyse des taux de completion...")
-            progress_bar.progress(50)
-            completion_stats_df = get_completion_stats(start_date, end_date)
-            
-            # Étape 3: Chargement des conversations engagées
-            status_text.text("💬 Calcul des conversations engagées...")
-            progress_bar.progress(75)
-            engaged_df = get_engaged_conversations_count(start_date, end_date)
+            if sampled:
+                kpi_bundle = load_approximate_kpi_data(start_date, end_date, compare)
+            else:
+                kpi_bundle = load_kpi_data(start_date, end_date, compare)
+            margins = kpi_bundle.get('margins')
+            kpi_data = kpi_bundle['kpi_data']
+            completion_stats_df = kpi_bundle['completion_stats']
+            engaged_df = kpi_bundle['engaged']
             
             # Finalisation
             status_text.text("✨ Finalisation de l'affichage...")
@@ -173,9 +349,25 @@ def show_kpis_section(start_date, end_date):
             
             engaged_count = engaged_df.iloc[0]['engaged_conversations'] if not engaged_df.empty else 0
             
+            # Écarts avec la période précédente (mode comparaison), calculés dans le même passage
+            deltas = {}
+            if kpi_bundle['previous'] is not None:
+                current_values = get_kpi_values(kpi_bundle)
+                previous_values = get_kpi_values(kpi_bundle['previous'])
+                deltas = {
+                    key: round(current_values[key] - previous_values[key], 1)
+                    for key in current_values
+                }
+            
             # Nettoyer complètement les placeholders
             placeholders_container.empty()
             
+            if sampled:
+                st.caption(
+                    f"≈ Estimations sur un échantillon de {kpi_bundle['sample_size']} conversations "
+                    f"({KPI_APPROX_SAMPLE_PERCENT:g} %), marges d'erreur à 95 %"
+                )
+            
         except Exception as e:
             placeholders_container.empty()
             # Afficher des valeurs par défaut au lieu d'une erreur
@@ -191,39 +383,50 @@ def show_kpis_section(start_date, end_date):
             st.metric(
                 label="👥 Total conversations",
                 value=int(total_users) if total_users else 0,
+                delta=deltas.get('total_users'),
                 help="Nombre unique de conversations WhatsApp"
             )
+            show_metric_margin(margins, 'total_users')
         
         with col2:
             st.metric(
                 label="💬 Conversations engagées",
                 value=int(engaged_count) if engaged_count else 0,
+                delta=deltas.get('engaged'),
                 help="Conversations avec plus de 2 messages"
             )
+            show_metric_margin(margins, 'engaged')
         
         with col3:
             avg_length = kpi_data.get('avg_conversation_length', 0) if kpi_data else 0
             st.metric(
                 label="📏 Longueur moyenne",
                 value=f"{avg_length}",
+                delta=deltas.get('avg_conversation_length'),
                 help="Nombre moyen de messages par conversation"
             )
+            show_metric_margin(margins, 'avg_conversation_length')
         
         with col4:
             completed_count = completion_stats['completed']
             st.metric(
                 label="✅ Conversations complètes",
                 value=int(completed_count) if completed_count else 0,
+                delta=deltas.get('completed'),
                 help="Conversations avec plus de 7 messages"
             )
+            show_metric_margin(margins, 'completed')
         
         with col5:
             incomplete_count = completion_stats['incomplete']
             st.metric(
                 label="⏳ Conversations incomplètes",
                 value=int(incomplete_count) if incomplete_count else 0,
+                delta=deltas.get('incomplete'),
+                delta_color="inverse",
                 help="Conversations avec 7 messages ou moins"
             )
+            show_metric_margin(margins, 'incomplete')
     except Exception:
         # En cas d'erreur, afficher des valeurs par défaut
         with col1:
@@ -248,37 +451,113 @@ def show_kpis_section(start_date, end_date):
         
         with col1:
             with st.spinner("Génération du graphique des conversations..."):
-                show_daily_conversations_chart(kpi_data['daily_conversations'])
+                show_daily_conversations_chart(start_date, end_date)
         
         with col2:
             with st.spinner("Génération du graphique de completion..."):
-                show_completion_rate_chart(completion_stats)
+                show_completion_section(start_date, end_date, completion_stats)
+    
+    # Services d'intérêt extraits par l'IA (conversation_analysis uniquement)
+    st.markdown("---")
+    with st.spinner("Génération du graphique des services..."):
+        show_service_interest_chart(start_date, end_date)
+    
+    # Funnel des thèmes d'entretien MarIA (couverture stockée par le batch d'analyse)
+    st.markdown("---")
+    with st.spinner("Génération du funnel des thèmes..."):
+        show_theme_funnel_chart(start_date, end_date)
+    
+    # Temps de réponse de l'agent (partiels journaliers, voir load_response_times)
+    st.markdown("---")
+    with st.spinner("Calcul des temps de réponse..."):
+        show_response_time_section(start_date, end_date)
+    
+    # Répartition de l'activité par jour et heure (cumul horaire précalculé)
+    st.markdown("---")
+    with st.spinner("Génération de la heatmap d'activité..."):
+        show_activity_heatmap(start_date, end_date)
+
 
+# Libellés des granularités du graphique des nouvelles conversations
+GRANULARITY_LABELS = {
+    'auto': "Automatique",
+    'day': "Jour",
+    'week': "Semaine",
+    'month': "Mois"
+}
 
-def show_daily_conversations_chart(daily_conversations_df):
+# Largeur approximative d'un intervalle en jours, pour estimer le nombre de points
+GRANULARITY_DAYS = {'day': 1, 'week': 7, 'month': 30}
+
+def choose_time_granularity(start_date, end_date, requested='auto', max_points=MAX_CHART_POINTS):
+    """
+    Choisir la granularité du graphique : la plus fine demandée (ou possible en mode auto)
+    qui reste sous max_points intervalles
     """
-    Afficher le graphique en barres des nouvelles conversations par jour
+    period_days = (end_date - start_date).days + 1
+    candidates = list(GRANULARITY_DAYS) if requested == 'auto' else list(GRANULARITY_DAYS)[list(GRANULARITY_DAYS).index(requested):]
+    for granularity in candidates:
+        if period_days / GRANULARITY_DAYS[granularity] <= max_points:
+            return granularity
+    return 'month'
+
+def load_new_conversations_series(start_date, end_date, granularity):
     """
-    st.subheader("Nouvelles conversations par jour")
+    Nouvelles conversations agrégées en SQL, mémorisées par (période, granularité, version des données)
+    """
+    return get_shared_cache().get_or_compute(
+        ('new_conversations', start_date, end_date, granularity, get_data_version()),
+        lambda: get_new_conversations_by_period(start_date, end_date, granularity)
+    )
+
+def show_daily_conversations_chart(start_date, end_date):
+    """
+    Afficher le graphique en barres des nouvelles conversations par jour, semaine ou mois
+    """
+    st.subheader("Nouvelles conversations")
+    
+    requested = st.selectbox(
+        "Granularité",
+        options=list(GRANULARITY_LABELS),
+        format_func=lambda x: GRANULARITY_LABELS[x],
+        key="conversations_chart_granularity"
+    )
+    granularity = choose_time_granularity(start_date, end_date, requested)
+    if requested != 'auto' and granularity != requested:
+        st.caption(f"Période trop longue pour un affichage par {GRANULARITY_LABELS[requested].lower()} : "
+                   f"regroupement par {GRANULARITY_LABELS[granularity].lower()}.")
+    
+    conversations_df = load_new_conversations_series(start_date, end_date, granularity)
     
-    if daily_conversations_df.empty:
+    if conversations_df.empty:
         st.info("Aucune donnée disponible pour cette période")
         return
     
+    # Plafond de sécurité sur le nombre de points envoyés au navigateur
+    conversations_df = conversations_df.tail(MAX_CHART_POINTS)
+    
+    # Valeurs sur les barres seulement si elles restent lisibles
+    show_values = len(conversations_df) <= 40
+    
+    import plotly.express as px
+    
     fig = px.bar(
-        daily_conversations_df, 
+        conversations_df, 
         x='date', 
         y='new_conversations',
-        title="Nouvelles conversations démarrées chaque jour",
-        text='new_conversations'  # Afficher les valeurs sur les barres
+        title=f"Nouvelles conversations démarrées par {GRANULARITY_LABELS[granularity].lower()}",
+        text='new_conversations' if show_values else None
     )
     
     fig.update_traces(
         marker_color=CCI_COLORS['primary'],
-        hovertemplate='<b>%{x}</b><br>Nouvelles conversations: %{y}<extra></extra>',
-        textposition='outside',  # Placer le texte au-dessus des barres
-        textfont_size=12
+        hovertemplate='<b>%{x}</b><br>Nouvelles conversations: %{y}<extra></extra>'
     )
+    if show_values:
+        fig.update_traces(
+            textposition='outside',  # Placer le texte au-dessus des barres
+            textfont_size=12
+        )
     
     fig.update_layout(
         height=400,
@@ -288,19 +567,370 @@ def show_daily_conversations_chart(daily_conversations_df):
         xaxis_title="",  # Supprimer le titre de l'axe X
         yaxis_title="",  # Supprimer le titre de l'axe Y
         yaxis=dict(
-            dtick=1,  # Forcer les intervalles de 1 pour éviter les 0,5
-            tickmode='linear'
+            tickformat='d',  # Graduations entières (évite les 0,5) sans forcer un pas de 1
+            rangemode='tozero'
         )
     )
     
     st.plotly_chart(fig, use_container_width=True)
 
-def show_completion_rate_chart(completion_stats):
+def histogram_percentile(histogram, fraction):
     """
-    Afficher un graphique du taux de completion depuis les données de la base
+    Percentile approché (interpolation linéaire dans l'intervalle) d'un histogramme
+    aux bornes RESPONSE_TIME_BUCKETS
+    """
+    total = sum(histogram)
+    if total == 0:
+        return None
+    
+    target = fraction * total
+    cumulative = 0
+    for index, count in enumerate(histogram):
+        if count and cumulative + count >= target:
+            lower = RESPONSE_TIME_BUCKETS[index - 1] if index > 0 else 0
+            # Dernier intervalle ouvert : borné à la dernière limite connue
+            upper = RESPONSE_TIME_BUCKETS[index] if index < len(RESPONSE_TIME_BUCKETS) else lower
+            return lower + (upper - lower) * (target - cumulative) / count
+        cumulative += count
+    return float(RESPONSE_TIME_BUCKETS[-1])
+
+def summarize_response_times(partials):
+    """
+    Fusionner des partiels journaliers de temps de réponse (nombre de réponses et percentiles)
+    Un seul jour : percentiles exacts (percentile_cont) ; plusieurs : histogrammes additionnés
+    """
+    days_with_data = [partial for partial in partials if partial['response_count']]
+    if len(days_with_data) == 1:
+        partial = days_with_data[0]
+        return {key: partial[key] for key in ('response_count', 'p50', 'p90', 'p99')}
+    
+    histogram = [sum(counts) for counts in zip(*(partial['histogram'] for partial in partials))] if partials else []
+    return {
+        'response_count': sum(histogram),
+        'p50': histogram_percentile(histogram, 0.5),
+        'p90': histogram_percentile(histogram, 0.9),
+        'p99': histogram_percentile(histogram, 0.99)
+    }
+
+def load_response_times(start_date, end_date):
+    """
+    Temps de réponse de la période : résumé et série pour le graphique (un point par jour,
+    ou par semaine / mois sur les longues périodes), assemblés à partir des partiels journaliers
+    """
+    data_version = get_data_version()
+    
+    def compute():
+        daily_partials = get_daily_response_times().get_partials(start_date, end_date, data_version)
+        granularity = choose_time_granularity(start_date, end_date)
+        
+        buckets = {}
+        for day, partial in daily_partials:
+            bucket_start = pd.Timestamp(day).to_period(granularity[0].upper()).start_time.date()
+            buckets.setdefault(bucket_start, []).append(partial)
+        
+        series = pd.DataFrame([
+            {'date': bucket_start, **summarize_response_times(bucket_partials)}
+            for bucket_start, bucket_partials in buckets.items()
+        ])
+        if not series.empty:
+            series = series[series['response_count'] > 0]
+        
+        return {
+            'summary': summarize_response_times([partial for _, partial in daily_partials]),
+            'series': series,
+            'granularity': granularity
+        }
+    
+    return get_shared_cache().get_or_compute(
+        ('response_times', start_date, end_date, data_version), compute
+    )
+
+def format_duration(seconds):
+    """
+    Formater une durée en secondes pour l'affichage (45 s, 3 min 05 s, 2 h 10 min)
+    """
+    if seconds is None or pd.isna(seconds):
+        return "N/A"
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    if seconds < 3600:
+        return f"{seconds // 60} min {seconds % 60:02d} s"
+    return f"{seconds // 3600} h {(seconds % 3600) // 60:02d} min"
+
+def show_response_time_section(start_date, end_date):
+    """
+    Afficher les KPIs et la tendance du temps de réponse de MarIA (message client -> réponse agent)
+    """
+    st.subheader("Temps de réponse de MarIA")
+    
+    response_times = load_response_times(start_date, end_date)
+    summary = response_times['summary']
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(
+            label="⏱️ Temps de réponse médian",
+            value=format_duration(summary['p50']),
+            help="Médiane (p50) du délai entre un message client et la réponse de MarIA"
+        )
+    with col2:
+        st.metric(
+            label="🐢 p90",
+            value=format_duration(summary['p90']),
+            help="90 % des réponses sont plus rapides que cette durée"
+        )
+    with col3:
+        st.metric(
+            label="🚨 p99",
+            value=format_duration(summary['p99']),
+            help="99 % des réponses sont plus rapides que cette durée"
+        )
+    with col4:
+        st.metric(
+            label="↩️ Réponses mesurées",
+            value=int(summary['response_count']),
+            help="Nombre de paires message client -> réponse de MarIA sur la période"
+        )
+    
+    show_response_time_chart(response_times['series'], response_times['granularity'])
+
+def show_response_time_chart(series_df, granularity):
+    """
+    Afficher l'évolution des percentiles du temps de réponse (en secondes)
+    """
+    if series_df.empty:
+        st.info("Aucune réponse mesurée pour cette période")
+        return
+    
+    import plotly.graph_objects as go
+    
+    fig = go.Figure()
+    for column, label, color in (
+        ('p50', 'Médiane (p50)', CCI_COLORS['primary']),
+        ('p90', 'p90', CCI_COLORS['secondary']),
+        ('p99', 'p99', '#CCCCCC')
+    ):
+        fig.add_trace(go.Scatter(
+            x=series_df['date'],
+            y=series_df[column],
+            mode='lines+markers',
+            name=label,
+            line=dict(color=color),
+            hovertemplate='<b>%{x}</b><br>' + label + ': %{y:.0f} s<extra></extra>'
+        ))
+    
+    fig.update_layout(
+        title=f"Temps de réponse par {GRANULARITY_LABELS[granularity].lower()} (secondes)",
+        height=400,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        xaxis_title="",
+        yaxis_title="",
+        yaxis=dict(rangemode='tozero')
+    )
+    
+    st.plotly_chart(fig, use_container_width=True)
+
+WEEKDAY_LABELS = ["Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche"]
+
+def load_weekly_activity(start_date, end_date, metric):
+    """
+    Grille 7 x 24 (jour de la semaine x heure locale) de la mesure choisie,
+    mémorisée par (période, mesure, version des données)
+    """
+    def compute():
+        activity_df = get_weekly_activity(start_date, end_date, metric)
+        grid = pd.DataFrame(0, index=range(1, 8), columns=range(24))
+        if not activity_df.empty:
+            values = activity_df.pivot(index='weekday', columns='hour', values='value')
+            grid = values.reindex(index=grid.index, columns=grid.columns).fillna(0).astype(int)
+        return grid
+    
+    return get_shared_cache().get_or_compute(
+        ('weekly_activity', start_date, end_date, metric, get_data_version()), compute
+    )
+
+def show_activity_heatmap(start_date, end_date):
+    """
+    Afficher la heatmap d'activité jour de la semaine x heure (fuseau de Colombie)
+    pour organiser les disponibilités des responsables de services
+    """
+    st.subheader("Activité par jour et heure (heure de Colombie)")
+    
+    metric = st.selectbox(
+        "Mesure",
+        options=list(ACTIVITY_METRICS),
+        format_func=lambda x: ACTIVITY_METRICS[x],
+        key="activity_heatmap_metric"
+    )
+    grid = load_weekly_activity(start_date, end_date, metric)
+    
+    if grid.to_numpy().sum() == 0:
+        if not is_hourly_activity_built():
+            st.info("Le cumul d'activité est en cours de construction, réessayez dans quelques minutes.")
+            return
+        st.info("Aucune activité enregistrée pour cette période")
+        return
+    
+    import plotly.graph_objects as go
+    
+    fig = go.Figure(data=go.Heatmap(
+        z=grid.values,
+        x=[f"{hour:02d}h" for hour in grid.columns],
+        y=WEEKDAY_LABELS,
+        colorscale=[[0, '#FFFFFF'], [1, CCI_COLORS['primary']]],
+        hovertemplate='<b>%{y} %{x}</b><br>' + ACTIVITY_METRICS[metric] + ': %{z}<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        height=400,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        yaxis=dict(autorange='reversed')  # Lundi en haut
+    )
+    
+    st.plotly_chart(fig, use_container_width=True)
+
+# Sources de la completion : jugement de l'IA (batch d'analyse) ou seuil sur le nombre de messages
+COMPLETION_SOURCES = {
+    'ai': "Analyse IA",
+    'heuristic': "Heuristique (> 7 messages)"
+}
+
+def load_analysis_breakdown(start_date, end_date):
+    """
+    Completion IA, services d'intérêt et couverture des thèmes MarIA de la période (lecture des
+    résultats d'analyse stockés, sans appel IA), mémorisés par (période, version des données)
+    """
+    def compute():
+        completion_df = get_analysis_completion_stats(start_date, end_date)
+        row = completion_df.iloc[0] if not completion_df.empty else {}
+        return {
+            'completion': {
+                'total': int(row.get('total_conversations', 0) or 0),
+                'completed': int(row.get('completed_count', 0) or 0),
+                'incomplete': int(row.get('incomplete_count', 0) or 0),
+                'not_analyzed': int(row.get('not_analyzed_count', 0) or 0)
+            },
+            'services': get_service_interest_distribution(start_date, end_date),
+            'themes': get_theme_coverage(start_date, end_date)
+        }
+    
+    return get_shared_cache().get_or_compute(
+        ('analysis_breakdown', start_date, end_date, get_data_version()), compute
+    )
+
+def show_completion_section(start_date, end_date, heuristic_stats):
+    """
+    Afficher la completion selon la source choisie (IA par défaut, heuristique pour comparaison)
     """
     st.subheader("Analyse de completion")
     
+    source = st.selectbox(
+        "Source",
+        options=list(COMPLETION_SOURCES),
+        format_func=lambda x: COMPLETION_SOURCES[x],
+        key="completion_source"
+    )
+    
+    if source == 'ai':
+        completion_stats = load_analysis_breakdown(start_date, end_date)['completion']
+        judged = completion_stats['completed'] + completion_stats['incomplete']
+        if judged:
+            st.metric(
+                label="🤖 Taux de completion (IA)",
+                value=f"{completion_stats['completed'] / judged:.0%}",
+                help="Conversations jugées complètes par l'IA parmi les conversations analysées, "
+                     "selon leur date de début"
+            )
+    else:
+        completion_stats = heuristic_stats
+    
+    show_completion_rate_chart(completion_stats, title=f"Répartition des conversations ({COMPLETION_SOURCES[source]})")
+
+def show_service_interest_chart(start_date, end_date):
+    """
+    Afficher la répartition des services d'intérêt extraits par l'IA
+    """
+    st.subheader("Services d'intérêt")
+    
+    services_df = load_analysis_breakdown(start_date, end_date)['services']
+    if services_df.empty:
+        st.info("Aucune conversation analysée pour cette période")
+        return
+    
+    import plotly.express as px
+    
+    fig = px.bar(
+        services_df.sort_values('conversations'),
+        x='conversations',
+        y='service_interest',
+        orientation='h',
+        text='conversations'
+    )
+    
+    fig.update_traces(
+        marker_color=CCI_COLORS['primary'],
+        textposition='outside',
+        hovertemplate='<b>%{y}</b><br>Conversations: %{x}<extra></extra>'
+    )
+    
+    fig.update_layout(
+        height=max(300, 40 * len(services_df)),
+        showlegend=False,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        xaxis_title="",
+        yaxis_title=""
+    )
+    
+    st.plotly_chart(fig, use_container_width=True)
+
+def show_theme_funnel_chart(start_date, end_date):
+    """
+    Afficher le funnel des thèmes d'entretien MarIA : conversations analysées, puis
+    conversations ayant abordé chaque thème (dans l'ordre de MARIA_THEMES)
+    """
+    st.subheader("Parcours des thèmes MarIA")
+    
+    themes_df = load_analysis_breakdown(start_date, end_date)['themes']
+    if themes_df.empty:
+        st.info("Aucune analyse des thèmes pour cette période")
+        return
+    
+    covered = dict(zip(themes_df['theme_index'].astype(int), themes_df['covered_conversations'].astype(int)))
+    analyzed = int(themes_df['analyzed_conversations'].max())
+    funnel_df = pd.DataFrame({
+        'stage': ["Conversations analysées"] + [f"{index}. {theme}" for index, theme in enumerate(MARIA_THEMES, start=1)],
+        'conversations': [analyzed] + [covered.get(index, 0) for index in range(1, len(MARIA_THEMES) + 1)]
+    })
+    
+    import plotly.express as px
+    
+    fig = px.funnel(funnel_df, x='conversations', y='stage')
+    
+    fig.update_traces(
+        marker_color=CCI_COLORS['primary'],
+        textinfo='value+percent initial',
+        hovertemplate='<b>%{y}</b><br>Conversations: %{x}<br>%{percentInitial:.0%} des conversations analysées<extra></extra>'
+    )
+    
+    fig.update_layout(
+        height=400,
+        showlegend=False,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        xaxis_title="",
+        yaxis_title=""
+    )
+    
+    st.plotly_chart(fig, use_container_width=True)
+
+def show_completion_rate_chart(completion_stats, title="Répartition des conversations"):
+    """
+    Afficher un graphique du taux de completion depuis les données de la base
+    """
     if not completion_stats or completion_stats['total'] == 0:
         st.info("Aucune donnée disponible pour cette période")
         return
@@ -333,6 +963,8 @@ def show_completion_rate_chart(completion_stats):
         st.info("Aucune donnée de completion disponible")
         return
     
+    import plotly.graph_objects as go
+    
     fig = go.Figure(data=[go.Pie(
         labels=labels, 
         values=values,
@@ -347,7 +979,7 @@ def show_completion_rate_chart(completion_stats):
     )
     
     fig.update_layout(
-        title="Répartition des conversations",
+        title=title,
         height=400,
         showlegend=True,
         plot_bgcolor='white',
@@ -356,6 +988,13 @@ def show_completion_rate_chart(completion_stats):
     
     st.plotly_chart(fig, use_container_width=True)
 
+def get_default_period():
+    """
+    Période par défaut du dashboard : DEFAULT_PERIOD_START -> aujourd'hui
+    (utilisée aussi par le préchauffage du cache, les clés doivent être identiques)
+    """
+    return datetime.strptime(DEFAULT_PERIOD_START, "%Y-%m-%d").date(), datetime.now().date()
+
 def show_period_selector():
     """
     Afficher le sélecteur de période simple
@@ -367,12 +1006,12 @@ def show_period_selector():
     with col1:
         start_date = st.date_input(
             "Du", 
-            value=datetime(2025, 8, 1).date()
+            value=get_default_period()[0]
         )
     with col2:
         end_date = st.date_input(
             "Au", 
-            value=datetime.now().date()
+            value=get_default_period()[1]
         )
     
     return start_date, end_date
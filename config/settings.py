@@ -33,6 +33,81 @@ OPENAI_API_KEY = get_secret("OPENAI_API_KEY")
 AUTH_USERNAME = get_secret("AUTH_USERNAME")
 AUTH_PASSWORD = get_secret("AUTH_PASSWORD")
 
+# Configuration du cache partagé (commun à toutes les sessions Streamlit)
+READER_CACHE_REFRESH_SECONDS = int(get_secret("READER_CACHE_REFRESH_SECONDS", 300))
+READER_CACHE_FULL_RELOAD_SECONDS = int(get_secret("READER_CACHE_FULL_RELOAD_SECONDS", 3600))
+READER_CACHE_MAX_ROWS = int(get_secret("READER_CACHE_MAX_ROWS", 20000))
+SHARED_CACHE_TTL_SECONDS = int(get_secret("SHARED_CACHE_TTL_SECONDS", 900))
+SHARED_CACHE_MAX_ENTRIES = int(get_secret("SHARED_CACHE_MAX_ENTRIES", 64))
+DATA_VERSION_TTL_SECONDS = int(get_secret("DATA_VERSION_TTL_SECONDS", 30))
+# Annuaire whatsapp_numbers en mémoire : intervalle de vérification des changements (nombre de lignes + somme de contrôle)
+CONTACT_DIRECTORY_CHECK_SECONDS = int(get_secret("CONTACT_DIRECTORY_CHECK_SECONDS", 60))
+
+# Nombre de messages affichés par fenêtre dans le lecteur de conversations
+MESSAGE_WINDOW_SIZE = int(get_secret("MESSAGE_WINDOW_SIZE", 50))
+
+# Préchargement des messages des pages du tableau des conversations
+PAGE_PREFETCH_TTL_SECONDS = int(get_secret("PAGE_PREFETCH_TTL_SECONDS", 120))
+PAGE_PREFETCH_MAX_PAGES = int(get_secret("PAGE_PREFETCH_MAX_PAGES", 32))
+
+# Recherche plein texte des conversations
+SEARCH_RESULTS_LIMIT = int(get_secret("SEARCH_RESULTS_LIMIT", 20))
+SEARCH_INDEX_REFRESH_SECONDS = int(get_secret("SEARCH_INDEX_REFRESH_SECONDS", 300))
+
+# Recherche sémantique sur les résumés (index d'embeddings sur disque)
+# EMBEDDING_PROVIDER : 'hashing' (local, sans réseau) ou 'openai'
+EMBEDDING_PROVIDER = get_secret("EMBEDDING_PROVIDER", "hashing")
+EMBEDDING_MODEL = get_secret("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_DIM = int(get_secret("EMBEDDING_DIM", 512))
+EMBEDDING_INDEX_DIR = get_secret("EMBEDDING_INDEX_DIR", "data/embeddings")
+EMBEDDING_INDEX_REFRESH_SECONDS = int(get_secret("EMBEDDING_INDEX_REFRESH_SECONDS", 300))
+# Similarité cosinus minimale d'un résultat (à ajuster selon le fournisseur) : sous ce seuil,
+# une conversation n'est pas proposée même si elle fait partie des k plus proches
+EMBEDDING_MIN_SCORE = float(get_secret("EMBEDDING_MIN_SCORE", 0.2))
+
+# Période par défaut du dashboard et préchauffage du cache au démarrage
+DEFAULT_PERIOD_START = get_secret("DEFAULT_PERIOD_START", "2025-08-01")
+CACHE_WARMER_ENABLED = str(get_secret("CACHE_WARMER_ENABLED", "true")).lower() in ("1", "true", "yes")
+CACHE_WARMER_INTERVAL_SECONDS = int(get_secret("CACHE_WARMER_INTERVAL_SECONDS", 300))
+
+# Mode approximatif des KPIs (grandes périodes) : pourcentage de conversations échantillonnées
+# et volume de messages en dessous duquel les KPIs restent exacts
+KPI_APPROX_SAMPLE_PERCENT = float(get_secret("KPI_APPROX_SAMPLE_PERCENT", 5))
+KPI_EXACT_MAX_MESSAGES = int(get_secret("KPI_EXACT_MAX_MESSAGES", 500000))
+
+# Nombre maximum de points envoyés au navigateur par graphique temporel
+MAX_CHART_POINTS = int(get_secret("MAX_CHART_POINTS", 120))
+
+# Cumul par contact (numéro WhatsApp normalisé) et taille des pages de la vue Contacts
+CONTACT_ROLLUP_REFRESH_SECONDS = int(get_secret("CONTACT_ROLLUP_REFRESH_SECONDS", 300))
+CONTACTS_PAGE_SIZE = int(get_secret("CONTACTS_PAGE_SIZE", 20))
+
+# Règle de cohérence de la completion IA (réconciliation) : une conversation de moins de
+# COMPLETION_MIN_MESSAGES messages ne peut pas être complète
+COMPLETION_MIN_MESSAGES = int(get_secret("COMPLETION_MIN_MESSAGES", 3))
+
+# Numéros WhatsApp de test connus (séparés par des virgules), signalés par le détecteur de conversations de test
+TEST_PHONE_NUMBERS = [number.strip() for number in str(get_secret("TEST_PHONE_NUMBERS", "")).split(",") if number.strip()]
+
+# Fuseau horaire des équipes CCI (heatmap d'activité) et rafraîchissement du cumul horaire
+LOCAL_TIMEZONE = get_secret("LOCAL_TIMEZONE", "America/Bogota")
+HOURLY_ACTIVITY_REFRESH_SECONDS = int(get_secret("HOURLY_ACTIVITY_REFRESH_SECONDS", 300))
+
+# Partitions mensuelles de public.message créées à l'avance (scripts/maintain_message_partitions.py)
+MESSAGE_PARTITION_MONTHS_AHEAD = int(get_secret("MESSAGE_PARTITION_MONTHS_AHEAD", 3))
+
+# Évaluation hors ligne du classifieur de completion (échantillon figé et cache des réponses du modèle)
+EVALUATION_DIR = get_secret("EVALUATION_DIR", "data/eval")
+
+# Export des conversations (fichiers générés sur disque, lus par lots)
+EXPORT_DIR = get_secret("EXPORT_DIR", "exports")
+EXPORT_CHUNK_SIZE = int(get_secret("EXPORT_CHUNK_SIZE", 5000))
+# Durée de conservation des fichiers d'export du dashboard (supprimés au prochain export)
+EXPORT_RETENTION_HOURS = int(get_secret("EXPORT_RETENTION_HOURS", 24))
+
+# Affichage des temps d'exécution par interaction dans la sidebar (diagnostic)
+SHOW_PERF_TIMINGS = str(get_secret("SHOW_PERF_TIMINGS", "false")).lower() in ("1", "true", "yes")
+
 # Configuration de l'application
 APP_TITLE = "Dashboard CCI France Colombia"
 APP_SUBTITLE = "Tableau de bord de l'agent MarIA"
@@ -0,0 +1,140 @@
+"""
+Cumul horaire de l'activité (table message_hourly_activity) pour la heatmap jour x heure
+"""
+import threading
+import time
+
+from database.connection import execute_query
+from config.settings import LOCAL_TIMEZONE, HOURLY_ACTIVITY_REFRESH_SECONDS
+
+# Mise à jour incrémentale : seule la dernière heure cumulée et les heures suivantes sont
+# recalculées (la dernière heure était peut-être incomplète lors du passage précédent)
+REFRESH_HOURLY_ACTIVITY_QUERY = """
+WITH watermark AS (
+    SELECT COALESCE(MAX(hour_start), '-infinity') as hour_start
+    FROM message_hourly_activity
+)
+INSERT INTO message_hourly_activity (hour_start, message_count, customer_messages, active_conversations)
+SELECT DATE_TRUNC('hour', m.created_at, 'UTC'),
+       COUNT(*),
+       COUNT(CASE WHEN m.role = 'customer' THEN 1 END),
+       COUNT(DISTINCT m.chatid)
+FROM public.message m, watermark wm
+WHERE m.created_at >= wm.hour_start
+GROUP BY 1
+ON CONFLICT (hour_start) DO UPDATE SET
+    message_count = EXCLUDED.message_count,
+    customer_messages = EXCLUDED.customer_messages,
+    active_conversations = EXCLUDED.active_conversations
+"""
+
+# Recalcul d'heures données (paramètre : tableau d'heures UTC), après une suppression de messages :
+# les heures sont supprimées puis recalculées (une heure sans message restant disparaît du cumul)
+DELETE_HOURLY_ACTIVITY_QUERY = "DELETE FROM message_hourly_activity WHERE hour_start = ANY(%s::timestamptz[])"
+REBUILD_HOURLY_ACTIVITY_QUERY = """
+INSERT INTO message_hourly_activity (hour_start, message_count, customer_messages, active_conversations)
+SELECT h.hour_start,
+       COUNT(*),
+       COUNT(CASE WHEN m.role = 'customer' THEN 1 END),
+       COUNT(DISTINCT m.chatid)
+FROM UNNEST(%s::timestamptz[]) as h(hour_start)
+JOIN public.message m ON m.created_at >= h.hour_start AND m.created_at < h.hour_start + INTERVAL '1 hour'
+GROUP BY h.hour_start
+"""
+
+# Mesures disponibles pour la heatmap
+ACTIVITY_METRICS = {
+    'active_conversations': "Conversations actives",
+    'customer_messages': "Messages clients",
+    'message_count': "Messages (total)",
+}
+
+_refresh_lock = threading.Lock()
+_last_refresh = 0.0
+_activity_built = False
+
+
+def is_hourly_activity_built():
+    """
+    Vrai si le cumul contient au moins une heure (construction initiale faite)
+    """
+    global _activity_built
+
+    if not _activity_built:
+        built_df = execute_query("SELECT EXISTS (SELECT 1 FROM message_hourly_activity) as built")
+        _activity_built = not built_df.empty and bool(built_df.iloc[0]['built'])
+    return _activity_built
+
+
+def refresh_hourly_activity(force=False, initial_build=True):
+    """
+    Cumuler les heures écoulées depuis le dernier passage
+    Sans force, au plus une fois par HOURLY_ACTIVITY_REFRESH_SECONDS dans le processus
+    Sans initial_build, ne fait rien tant que le cumul est vide : la construction complète
+    (lecture de tout public.message) revient au préchauffage ou à scripts/refresh_hourly_activity.py
+    """
+    global _last_refresh
+
+    if not force and time.monotonic() - _last_refresh < HOURLY_ACTIVITY_REFRESH_SECONDS:
+        return True
+    if not initial_build and not is_hourly_activity_built():
+        return False
+
+    # Un seul rafraîchissement à la fois ; les autres sessions lisent le cumul existant
+    if not _refresh_lock.acquire(blocking=force):
+        return True
+    try:
+        result = execute_query(REFRESH_HOURLY_ACTIVITY_QUERY, fetch=False)
+        if result:
+            _last_refresh = time.monotonic()
+        return bool(result)
+    finally:
+        _refresh_lock.release()
+
+
+def get_weekly_activity(start_date, end_date, metric='active_conversations'):
+    """
+    Activité de la période (jours start_date -> end_date inclus, heure locale LOCAL_TIMEZONE)
+    agrégée par jour de la semaine (1 = lundi) et heure, depuis le cumul horaire
+    """
+    if metric not in ACTIVITY_METRICS:
+        raise ValueError(f"Mesure inconnue: {metric}")
+
+    refresh_hourly_activity(initial_build=False)
+
+    query = f"""
+    SELECT EXTRACT(ISODOW FROM hour_start AT TIME ZONE %s)::int as weekday,
+           EXTRACT(HOUR FROM hour_start AT TIME ZONE %s)::int as hour,
+           SUM({metric}) as value
+    FROM message_hourly_activity
+    WHERE hour_start >= (%s::date)::timestamp AT TIME ZONE %s
+      AND hour_start < (%s::date + 1)::timestamp AT TIME ZONE %s
+    GROUP BY 1, 2
+    """
+    return execute_query(query, (
+        LOCAL_TIMEZONE, LOCAL_TIMEZONE,
+        start_date, LOCAL_TIMEZONE,
+        end_date, LOCAL_TIMEZONE
+    ))
+
+
+def get_message_volume(start_date, end_date):
+    """
+    Nombre de messages de la période (jours start_date -> end_date inclus, heure locale
+    LOCAL_TIMEZONE comme la heatmap) lu dans le cumul horaire, sans parcourir public.message.
+    None si le cumul est indisponible ou pas encore construit.
+    """
+    refresh_hourly_activity(initial_build=False)
+    if not is_hourly_activity_built():
+        return None
+
+    query = """
+    SELECT COALESCE(SUM(message_count), 0) as message_count
+    FROM message_hourly_activity
+    WHERE hour_start >= (%s::date)::timestamp AT TIME ZONE %s
+      AND hour_start < (%s::date + 1)::timestamp AT TIME ZONE %s
+    """
+    volume_df = execute_query(query, (start_date, LOCAL_TIMEZONE, end_date, LOCAL_TIMEZONE))
+    if volume_df.empty:
+        return None
+    return int(volume_df.iloc[0]['message_count'])
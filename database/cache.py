@@ -0,0 +1,656 @@
+"""
+Caches partagés entre toutes les sessions Streamlit du processus
+"""
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pandas as pd
+
+from config.settings import (
+    READER_CACHE_REFRESH_SECONDS,
+    READER_CACHE_FULL_RELOAD_SECONDS,
+    READER_CACHE_MAX_ROWS,
+    SHARED_CACHE_TTL_SECONDS,
+    SHARED_CACHE_MAX_ENTRIES,
+    DATA_VERSION_TTL_SECONDS,
+    CONTACT_DIRECTORY_CHECK_SECONDS,
+    MESSAGE_WINDOW_SIZE,
+    PAGE_PREFETCH_TTL_SECONDS,
+    PAGE_PREFETCH_MAX_PAGES,
+)
+
+# Marge de recouvrement pour ne pas rater les messages insérés pendant un rafraîchissement
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+class SharedCache:
+    """
+    Cache clé -> valeur partagé entre les sessions, avec expiration (ttl) et
+    éviction LRU au-delà de max_entries. Une même clé n'est calculée qu'une fois
+    à la fois : les sessions concurrentes attendent le premier calcul.
+
+    Les valeurs sont partagées sans copie : elles ne doivent pas être modifiées.
+    """
+
+    def __init__(self, ttl_seconds, max_entries):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._key_locks = {}
+
+    def get_or_compute(self, key, compute, ttl_seconds=None):
+        """
+        Retourner la valeur en cache pour key, ou la calculer avec compute()
+        """
+        value = self._get(key, ttl_seconds)
+        if value is not None:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Une autre session a pu calculer la valeur pendant l'attente
+            value = self._get(key, ttl_seconds)
+            if value is not None:
+                return value
+            value = compute()
+            self.set(key, value)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return value
+
+    def set(self, key, value):
+        """
+        Enregistrer une valeur (utilisé aussi par le préchauffage du cache)
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, prefix=None):
+        """
+        Supprimer toutes les entrées, ou celles dont la clé commence par prefix
+        """
+        with self._lock:
+            if prefix is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == prefix]:
+                del self._entries[key]
+
+    def _get(self, key, ttl_seconds):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at >= ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+
+class ConversationListStore:
+    """
+    Liste des conversations du lecteur, calculée une fois par intervalle et
+    rafraîchie de façon incrémentale (seulement les chats actifs depuis le dernier passage).
+    Les lignes contiennent les noms de l'annuaire : directory_version() (optionnel) retourne
+    la version de l'annuaire, et tout changement de version provoque un rechargement complet.
+
+    Le DataFrame retourné est partagé entre les sessions : il ne doit pas être modifié.
+    """
+
+    def __init__(self, loader, refresh_seconds, full_reload_seconds, max_rows, directory_version=None):
+        self.loader = loader
+        self.refresh_seconds = refresh_seconds
+        self.full_reload_seconds = full_reload_seconds
+        self.max_rows = max_rows
+        self.directory_version = directory_version
+        self._directory_seen = None
+        self._lock = threading.Lock()
+        self._frame = None
+        self._watermark = None
+        self._analysis_watermark = None
+        self._last_refresh = 0.0
+        self._last_full_reload = 0.0
+        self._force_full_reload = False
+
+    def get_frame(self):
+        """
+        Retourner la liste des conversations, triée par dernière activité
+        """
+        if self.directory_version is not None:
+            version = self.directory_version()
+            if version != self._directory_seen:
+                self._directory_seen = version
+                self.invalidate()
+        self._refresh_if_due()
+        frame = self._frame
+        return frame if frame is not None else pd.DataFrame()
+
+    def get_conversation(self, chatid):
+        """
+        Retourner la ligne d'une conversation via l'index par chatid (None si absente)
+        """
+        frame = self.get_frame()
+        if frame.empty:
+            return None
+        try:
+            return frame.loc[str(chatid)]
+        except KeyError:
+            return None
+
+    def invalidate(self):
+        """
+        Forcer un rechargement complet au prochain accès
+        """
+        with self._lock:
+            self._last_refresh = 0.0
+            self._force_full_reload = True
+
+    def _refresh_if_due(self):
+        now = time.monotonic()
+        if self._frame is not None and now - self._last_refresh < self.refresh_seconds:
+            return
+
+        with self._lock:
+            # Une autre session a pu rafraîchir pendant l'attente du verrou
+            now = time.monotonic()
+            if self._frame is not None and now - self._last_refresh < self.refresh_seconds:
+                return
+
+            full_reload = (
+                self._frame is None
+                or self._force_full_reload
+                or self._watermark is None
+                or now - self._last_full_reload >= self.full_reload_seconds
+            )
+            if full_reload:
+                self._full_reload()
+            else:
+                self._incremental_refresh()
+            self._last_refresh = now
+
+    def _full_reload(self):
+        frame = self.loader()
+        if frame.empty and self._frame is not None:
+            # Base indisponible : conserver la dernière version connue
+            return
+        self._frame = self._prepare(frame)
+        self._watermark, self._analysis_watermark = self._compute_watermarks(self._frame)
+        self._last_full_reload = time.monotonic()
+        self._force_full_reload = False
+
+    def _incremental_refresh(self):
+        analysis_since = None
+        if self._analysis_watermark is not None:
+            analysis_since = self._analysis_watermark - REFRESH_OVERLAP
+        updates = self.loader(
+            since=self._watermark - REFRESH_OVERLAP,
+            analysis_since=analysis_since,
+        )
+        if updates.empty:
+            return
+        updates = self._prepare(updates)
+        remaining = self._frame.drop(index=updates.index, errors='ignore')
+        self._frame = self._prepare(pd.concat([updates, remaining]))
+        self._watermark, self._analysis_watermark = self._compute_watermarks(self._frame)
+
+    def _prepare(self, frame):
+        if frame.empty:
+            return frame
+        frame = frame.copy()
+        frame['chatid'] = frame['chatid'].astype(str)
+        frame = frame.sort_values('last_activity', ascending=False)
+        frame = frame.drop_duplicates('chatid').head(self.max_rows)
+        frame = frame.set_index('chatid', drop=False)
+        frame.index.name = None
+        return frame
+
+    @staticmethod
+    def _compute_watermarks(frame):
+        # Deux repères distincts : created_at et last_updated n'ont pas forcément le même fuseau
+        if frame.empty:
+            return None, None
+        analysis_watermark = None
+        if 'analysis_updated' in frame and frame['analysis_updated'].notna().any():
+            analysis_watermark = frame['analysis_updated'].max()
+        return frame['last_activity'].max(), analysis_watermark
+
+
+class PageMessageCache:
+    """
+    Messages des conversations d'une page du tableau, chargés en une requête groupée.
+    Les pages sont gardées en LRU (max_pages) pendant ttl_seconds ; la page suivante
+    peut être préchargée en arrière-plan.
+    """
+
+    def __init__(self, loader, ttl_seconds, max_pages, workers=2):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.max_pages = max_pages
+        self._lock = threading.Lock()
+        self._pages = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="page-prefetch")
+
+    def get_page(self, chatids):
+        """
+        Retourner {chatid: DataFrame des messages} pour la page (bloquant si non préchargée)
+        """
+        return self._get_or_submit(chatids).result()
+
+    def prefetch(self, chatids):
+        """
+        Lancer le chargement de la page en arrière-plan sans attendre le résultat
+        """
+        if chatids:
+            self._get_or_submit(chatids)
+
+    def _get_or_submit(self, chatids):
+        key = tuple(str(chatid) for chatid in chatids)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is not None:
+                loaded_at, future = entry
+                failed = future.done() and future.exception() is not None
+                if now - loaded_at < self.ttl_seconds and not failed:
+                    self._pages.move_to_end(key)
+                    return future
+            
+            future = self._executor.submit(self._load_page, key)
+            self._pages[key] = (now, future)
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+            return future
+
+    def _load_page(self, key):
+        messages_df = self.loader(key)
+        if messages_df.empty:
+            return {}
+        return {chatid: group.reset_index(drop=True) for chatid, group in messages_df.groupby('chatid', sort=False)}
+
+
+class DailyPartials:
+    """
+    Agrégats partiels par jour (rollup) : les jours clos (avant aujourd'hui) ne changent plus
+    et sont gardés tant que l'historique ne change pas ; le jour courant est recalculé à chaque
+    nouvelle version des données. Une période quelconque s'obtient en fusionnant les partiels
+    de ses jours.
+
+    loader(start_day, end_day) retourne {jour: partiel} (jours sans donnée absents),
+    ou None si la base est indisponible. empty() crée le partiel d'un jour sans donnée.
+    today_loader() retourne le jour courant dans le fuseau de la base (celui du regroupement
+    created_at::date), pour ne jamais figer un jour encore ouvert.
+    history_version(data_version) retourne la part de la version des données qui change quand
+    l'historique est modifié (génération des purges), ou None si elle est inconnue : tous les
+    partiels sont oubliés quand elle change.
+    Les partiels retournés sont partagés entre les sessions : ils ne doivent pas être modifiés.
+    """
+
+    def __init__(self, loader, empty, today_loader=date.today, history_version=None):
+        self.loader = loader
+        self.empty = empty
+        self.today_loader = today_loader
+        self.history_version = history_version
+        self._lock = threading.Lock()
+        self._closed_days = {}
+        self._live_day = None
+        self._generation = 0
+        self._history = None
+
+    def get_partials(self, start_day, end_day, data_version):
+        """
+        Retourner la liste [(jour, partiel)] de start_day à end_day inclus
+        """
+        if self.history_version is not None:
+            self._check_history(self.history_version(data_version))
+        today = self.today_loader()
+        partials = []
+        closed_end = min(end_day, today - timedelta(days=1))
+        if start_day <= closed_end:
+            partials.extend(self._get_closed_days(start_day, closed_end))
+        if start_day <= today <= end_day:
+            partials.append((today, self._get_today(today, data_version)))
+        return partials
+
+    def invalidate(self):
+        """
+        Oublier tous les partiels (après une correction ou une suppression de données historiques)
+        """
+        with self._lock:
+            self._closed_days.clear()
+            self._live_day = None
+            self._generation += 1
+
+    def _check_history(self, history):
+        if history is None:
+            return
+        with self._lock:
+            changed = self._history is not None and history != self._history
+            self._history = history
+        if changed:
+            self.invalidate()
+
+    def _get_closed_days(self, start_day, end_day):
+        days = [start_day + timedelta(days=offset) for offset in range((end_day - start_day).days + 1)]
+        with self._lock:
+            entries = {day: self._closed_days.get(day) for day in days}
+            generation = self._generation
+        missing = [day for day, partial in entries.items() if partial is None]
+        if missing:
+            # Chargement hors du verrou : les autres sessions lisent les jours déjà connus
+            loaded = self.loader(missing[0], missing[-1])
+            if loaded is None:
+                # Base indisponible : ne rien figer, partiels connus ou vides pour cette fois
+                return [(day, entries[day] if entries[day] is not None else self.empty()) for day in days]
+            for day in missing:
+                entries[day] = loaded.get(day) or self.empty()
+            with self._lock:
+                # Une invalidation pendant le chargement rend ces partiels douteux : ne pas les garder
+                if generation == self._generation:
+                    self._closed_days.update({day: entries[day] for day in missing})
+        return [(day, entries[day]) for day in days]
+
+    def _get_today(self, today, data_version):
+        with self._lock:
+            if self._live_day is not None and self._live_day[:2] == (today, data_version):
+                return self._live_day[2]
+            generation = self._generation
+        loaded = self.loader(today, today)
+        if loaded is None:
+            return self.empty()
+        partial = loaded.get(today) or self.empty()
+        with self._lock:
+            if generation == self._generation:
+                self._live_day = (today, data_version, partial)
+        return partial
+
+
+def normalize_e164(numbers):
+    """
+    Numéros au format E.164 ('+' suivi des chiffres) pour une série pandas, NaN si aucun chiffre
+    """
+    digits = numbers.fillna('').astype(str).str.replace(r"\D", "", regex=True)
+    return ('+' + digits).where(digits != '')
+
+
+class ContactDirectory:
+    """
+    Annuaire whatsapp_numbers gardé en mémoire : {champ: {numéro E.164: valeur}}.
+    Au plus une fois par check_seconds, une requête légère (nombre de lignes + somme de
+    contrôle) détecte une modification de la table ; l'annuaire n'est rechargé qu'alors.
+
+    loader() retourne le DataFrame (celular, nombre, apellido, empresa) ou None si la base
+    est indisponible ; signature_loader() retourne une valeur comparable, ou None.
+    """
+
+    FIELDS = ('nombre', 'apellido', 'empresa')
+
+    def __init__(self, loader, signature_loader, check_seconds):
+        self.loader = loader
+        self.signature_loader = signature_loader
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._columns = None
+        self._signature = None
+        self._last_check = 0.0
+        self._version = 0
+
+    def version(self):
+        """
+        Numéro de version de l'annuaire, incrémenté à chaque rechargement (vérification comprise)
+        """
+        self._get_columns()
+        return self._version
+
+    def lookup(self, numbers):
+        """
+        Retourner un DataFrame (nombre, apellido, empresa) aligné sur la série numbers
+        (valeurs de chat.value), NaN pour les numéros absents de l'annuaire
+        """
+        columns = self._get_columns()
+        keys = normalize_e164(numbers)
+        return pd.DataFrame(
+            {field: keys.map(columns.get(field, {})) for field in self.FIELDS},
+            index=numbers.index
+        )
+
+    def invalidate(self):
+        """
+        Forcer la vérification (et le rechargement) au prochain accès
+        """
+        with self._lock:
+            self._signature = None
+            self._last_check = 0.0
+
+    def _get_columns(self):
+        if self._columns is not None and time.monotonic() - self._last_check < self.check_seconds:
+            return self._columns
+
+        with self._lock:
+            # Une autre session a pu vérifier pendant l'attente du verrou
+            now = time.monotonic()
+            if self._columns is not None and now - self._last_check < self.check_seconds:
+                return self._columns
+
+            signature = self.signature_loader()
+            if signature is not None and (signature != self._signature or self._columns is None):
+                frame = self.loader()
+                if frame is not None:
+                    self._columns = self._build(frame)
+                    self._signature = signature
+                    self._version += 1
+            # Base indisponible : conserver l'annuaire connu (vide s'il n'a jamais été chargé)
+            self._last_check = now
+            return self._columns or {}
+
+    @classmethod
+    def _build(cls, frame):
+        frame = frame.assign(phone=normalize_e164(frame['celular'])).dropna(subset=['phone'])
+        # Un numéro en double dans la table : la première ligne l'emporte
+        frame = frame.drop_duplicates('phone')
+        return {field: dict(zip(frame['phone'], frame[field])) for field in cls.FIELDS}
+
+
+def get_data_version():
+    """
+    Version courante des données (dernier message, dernière analyse, génération des purges),
+    rafraîchie toutes les DATA_VERSION_TTL_SECONDS : sert de clé aux résultats mis en cache par période
+    """
+    def load_version():
+        from database.queries import get_data_version_row, get_purge_generation_row
+        version_df = get_data_version_row()
+        if version_df.empty:
+            return ('indisponible',)
+        row = version_df.iloc[0]
+        # Sans data_purge_log (schéma de performance non appliqué), génération inconnue
+        purge_df = get_purge_generation_row()
+        purge_generation = int(purge_df.iloc[0]['generation']) if not purge_df.empty else None
+        return (str(row['last_message_at']), str(row['last_analysis_at']), purge_generation)
+
+    return _shared_cache.get_or_compute(('data_version',), load_version, ttl_seconds=DATA_VERSION_TTL_SECONDS)
+
+
+def purge_generation(data_version):
+    """
+    Génération des purges contenue dans une version des données (None si inconnue)
+    """
+    return data_version[2] if len(data_version) > 2 else None
+
+
+def get_database_today():
+    """
+    Jour courant dans le fuseau de la session de la base (CURRENT_DATE), rafraîchi toutes les
+    DATA_VERSION_TTL_SECONDS ; jour du serveur si la base est indisponible
+    """
+    def load_today():
+        from database.queries import get_database_today_row
+        today_df = get_database_today_row()
+        if today_df.empty:
+            return date.today()
+        return pd.Timestamp(today_df.iloc[0]['today']).date()
+
+    return _shared_cache.get_or_compute(('database_today',), load_today, ttl_seconds=DATA_VERSION_TTL_SECONDS)
+
+
+def _load_page_messages(chatids):
+    from database.queries import get_messages_for_chats
+    return get_messages_for_chats(chatids, per_chat_limit=MESSAGE_WINDOW_SIZE)
+
+
+def _load_daily_chat_counts(start_day, end_day):
+    # Partiel d'un jour : Counter chatid -> nombre de messages du jour
+    from database.queries import get_daily_chat_message_counts
+    frame = get_daily_chat_message_counts(start_day, end_day)
+    if 'chatid' not in frame.columns:
+        return None
+    return {
+        pd.Timestamp(day).date(): Counter(dict(zip(group['chatid'], group['message_count'].astype(int))))
+        for day, group in frame.groupby('day', sort=False)
+    }
+
+
+def _empty_response_times():
+    from database.queries import RESPONSE_TIME_BUCKETS
+    return {
+        'response_count': 0,
+        'p50': None,
+        'p90': None,
+        'p99': None,
+        'histogram': (0,) * (len(RESPONSE_TIME_BUCKETS) + 1),
+    }
+
+
+def _load_daily_response_times(start_day, end_day):
+    # Partiel d'un jour : percentiles exacts du jour et histogramme additionnable
+    from database.queries import get_daily_response_times, RESPONSE_TIME_BUCKETS
+    frame = get_daily_response_times(start_day, end_day)
+    if 'response_count' not in frame.columns:
+        return None
+    bucket_columns = [f"bucket_{index}" for index in range(len(RESPONSE_TIME_BUCKETS) + 1)]
+    return {
+        pd.Timestamp(row['day']).date(): {
+            'response_count': int(row['response_count']),
+            'p50': float(row['p50']),
+            'p90': float(row['p90']),
+            'p99': float(row['p99']),
+            'histogram': tuple(int(row[column]) for column in bucket_columns),
+        }
+        for _, row in frame.iterrows()
+    }
+
+
+def _load_conversation_list(since=None, analysis_since=None):
+    from database.queries import get_all_conversations_with_analysis
+    return get_all_conversations_with_analysis(since=since, analysis_since=analysis_since)
+
+
+def _load_contact_directory():
+    from database.queries import get_whatsapp_directory
+    frame = get_whatsapp_directory()
+    return frame if 'celular' in frame.columns else None
+
+
+def _load_contact_directory_signature():
+    from database.queries import get_whatsapp_directory_signature
+    frame = get_whatsapp_directory_signature()
+    if frame.empty:
+        return None
+    row = frame.iloc[0]
+    return (int(row['row_count']), int(row['checksum']))
+
+
+# Instances uniques au niveau du processus : partagées par toutes les sessions
+_shared_cache = SharedCache(
+    ttl_seconds=SHARED_CACHE_TTL_SECONDS,
+    max_entries=SHARED_CACHE_MAX_ENTRIES,
+)
+
+_conversation_list_store = ConversationListStore(
+    loader=_load_conversation_list,
+    refresh_seconds=READER_CACHE_REFRESH_SECONDS,
+    full_reload_seconds=READER_CACHE_FULL_RELOAD_SECONDS,
+    max_rows=READER_CACHE_MAX_ROWS,
+    # Noms de l'annuaire figés dans les lignes : tout recharger quand whatsapp_numbers change
+    directory_version=lambda: _contact_directory.version(),
+)
+
+
+_page_message_cache = PageMessageCache(
+    loader=_load_page_messages,
+    ttl_seconds=PAGE_PREFETCH_TTL_SECONDS,
+    max_pages=PAGE_PREFETCH_MAX_PAGES,
+)
+
+
+_daily_kpi_partials = DailyPartials(
+    loader=_load_daily_chat_counts,
+    empty=Counter,
+    today_loader=get_database_today,
+    history_version=purge_generation,
+)
+
+_daily_response_times = DailyPartials(
+    loader=_load_daily_response_times,
+    empty=_empty_response_times,
+    today_loader=get_database_today,
+    history_version=purge_generation,
+)
+
+_contact_directory = ContactDirectory(
+    loader=_load_contact_directory,
+    signature_loader=_load_contact_directory_signature,
+    check_seconds=CONTACT_DIRECTORY_CHECK_SECONDS,
+)
+
+
+def get_shared_cache():
+    """
+    Retourner le cache partagé des résultats calculés par période
+    """
+    return _shared_cache
+
+
+def get_conversation_list_store():
+    """
+    Retourner le cache partagé de la liste des conversations du lecteur
+    """
+    return _conversation_list_store
+
+
+def get_page_message_cache():
+    """
+    Retourner le cache partagé des messages préchargés par page du tableau
+    """
+    return _page_message_cache
+
+
+def get_daily_kpi_partials():
+    """
+    Retourner le cache partagé des partiels journaliers des KPIs (Counter chatid -> messages)
+    """
+    return _daily_kpi_partials
+
+
+def get_daily_response_times():
+    """
+    Retourner le cache partagé des temps de réponse journaliers (percentiles et histogramme)
+    """
+    return _daily_response_times
+
+
+def get_contact_directory():
+    """
+    Retourner l'annuaire partagé des numéros WhatsApp (whatsapp_numbers en mémoire)
+    """
+    return _contact_directory
@@ -2,14 +2,8 @@
 Module de connexion à la base de données PostgreSQL
 """
 import os
-import psycopg2
 import pandas as pd
-from sqlalchemy import create_engine
 import streamlit as st
-from dotenv import load_dotenv
-
-# Charger les variables d'environnement
-load_dotenv()
 
 from config.settings import DATABASE_URL
 
@@ -17,8 +11,10 @@ from config.settings import DATABASE_URL
 def get_database_connection():
     """
     Créer une connexion à la base de données PostgreSQL
+    (SQLAlchemy n'est importé qu'à la première requête)
     """
     try:
+        from sqlalchemy import create_engine
         engine = create_engine(DATABASE_URL)
         return engine
     except Exception as e:
@@ -40,12 +36,12 @@ def execute_query(query, params=None, fetch=True):
             df = pd.read_sql_query(query, engine, params=params)
             return df
         else:
-            # Pour les requêtes UPDATE/INSERT
+            # Pour les requêtes UPDATE/INSERT (SQL brut au format %s du driver psycopg2)
             with engine.connect() as connection:
                 if params:
-                    connection.execute(query, params)
+                    connection.exec_driver_sql(query, params)
                 else:
-                    connection.execute(query)
+                    connection.exec_driver_sql(query)
                 connection.commit()
             return True
             
@@ -0,0 +1,199 @@
+"""
+Cumul par contact (numéro WhatsApp normalisé) de toutes ses conversations (table contact_rollup)
+"""
+import re
+import threading
+import time
+
+from database.connection import execute_query
+from database.cache import REFRESH_OVERLAP
+from config.settings import CONTACT_ROLLUP_REFRESH_SECONDS
+
+# Numéro normalisé : chiffres seuls de chat.value (même expression que l'index idx_chat_value_digits)
+PHONE_EXPRESSION = "regexp_replace(c.value, '\\D', '', 'g')"
+
+# Calcul et écriture des contacts listés dans la CTE touched (numéros normalisés)
+_CONTACT_ROLLUP_UPSERT = f"""
+chat_stats AS (
+    SELECT {PHONE_EXPRESSION} as phone,
+           c.chatid,
+           MIN(m.created_at) as first_at,
+           MAX(m.created_at) as last_at,
+           COUNT(*) as messages,
+           MAX(ca.last_updated) as analysis_updated
+    FROM public.chat c
+    JOIN public.message m ON m.chatid = c.chatid
+    LEFT JOIN conversation_analysis ca ON ca.chatid = c.chatid
+    WHERE {PHONE_EXPRESSION} IN (SELECT phone FROM touched WHERE phone <> '')
+    GROUP BY 1, 2
+),
+latest_analysis AS (
+    SELECT DISTINCT ON (cs.phone)
+           cs.phone, ca.client_name, ca.company_name, ca.service_interest, ca.is_completed, ca.conversation_summary
+    FROM chat_stats cs
+    JOIN conversation_analysis ca ON ca.chatid = cs.chatid
+    ORDER BY cs.phone, cs.last_at DESC
+)
+INSERT INTO contact_rollup (phone, first_seen, last_seen, chat_count, total_messages, latest_chatid,
+                            client_name, company_name, service_interest, is_completed, latest_summary,
+                            analysis_updated)
+SELECT cs.phone,
+       MIN(cs.first_at),
+       MAX(cs.last_at),
+       COUNT(*),
+       SUM(cs.messages),
+       (ARRAY_AGG(cs.chatid ORDER BY cs.last_at DESC))[1],
+       la.client_name,
+       la.company_name,
+       la.service_interest,
+       la.is_completed,
+       la.conversation_summary,
+       MAX(cs.analysis_updated)
+FROM chat_stats cs
+LEFT JOIN latest_analysis la ON la.phone = cs.phone
+GROUP BY cs.phone, la.client_name, la.company_name, la.service_interest, la.is_completed, la.conversation_summary
+ON CONFLICT (phone) DO UPDATE SET
+    first_seen = EXCLUDED.first_seen,
+    last_seen = EXCLUDED.last_seen,
+    chat_count = EXCLUDED.chat_count,
+    total_messages = EXCLUDED.total_messages,
+    latest_chatid = EXCLUDED.latest_chatid,
+    client_name = EXCLUDED.client_name,
+    company_name = EXCLUDED.company_name,
+    service_interest = EXCLUDED.service_interest,
+    is_completed = EXCLUDED.is_completed,
+    latest_summary = EXCLUDED.latest_summary,
+    analysis_updated = EXCLUDED.analysis_updated
+"""
+
+# Mise à jour incrémentale : seuls les contacts ayant un nouveau message ou une analyse modifiée
+# depuis le dernier passage sont recalculés (sur l'ensemble de leurs conversations) ;
+# un chat sans chiffre dans value (ou sans value) n'est rattaché à aucun contact.
+# Les repères sont reculés de REFRESH_OVERLAP pour ne pas rater les lignes validées après coup
+# (recalculer un contact déjà à jour ne change rien)
+REFRESH_CONTACT_ROLLUP_QUERY = f"""
+WITH watermark AS (
+    SELECT COALESCE(MAX(last_seen), '-infinity') - %(overlap)s as last_seen,
+           COALESCE(MAX(analysis_updated), '-infinity') - %(overlap)s as analysis_updated
+    FROM contact_rollup
+),
+touched AS (
+    SELECT {PHONE_EXPRESSION} as phone
+    FROM public.message m
+    JOIN public.chat c ON c.chatid = m.chatid, watermark wm
+    WHERE m.created_at > wm.last_seen AND {PHONE_EXPRESSION} <> ''
+    UNION
+    SELECT {PHONE_EXPRESSION}
+    FROM conversation_analysis ca
+    JOIN public.chat c ON c.chatid = ca.chatid, watermark wm
+    WHERE ca.last_updated > wm.analysis_updated AND {PHONE_EXPRESSION} <> ''
+),""" + _CONTACT_ROLLUP_UPSERT
+
+# Recalcul de contacts donnés (paramètre : tableau de numéros normalisés), après une suppression
+# de conversations : les lignes des numéros sans conversation restante sont supprimées d'abord
+DELETE_CONTACTS_QUERY = "DELETE FROM contact_rollup WHERE phone = ANY(%s)"
+REBUILD_CONTACTS_QUERY = """
+WITH touched AS (
+    SELECT UNNEST(%s::text[]) as phone
+),""" + _CONTACT_ROLLUP_UPSERT
+
+# Tris proposés dans la vue Contacts (colonnes de contact_rollup)
+CONTACT_SORTS = {
+    'last_seen': "Dernière activité",
+    'total_messages': "Nombre de messages",
+    'chat_count': "Nombre de conversations",
+    'first_seen': "Premier contact",
+}
+
+_refresh_lock = threading.Lock()
+_last_refresh = 0.0
+
+
+def refresh_contact_rollup(force=False):
+    """
+    Recalculer les contacts actifs depuis le dernier passage
+    Sans force, au plus une fois par CONTACT_ROLLUP_REFRESH_SECONDS dans le processus
+    """
+    global _last_refresh
+
+    if not force and time.monotonic() - _last_refresh < CONTACT_ROLLUP_REFRESH_SECONDS:
+        return True
+
+    # Un seul rafraîchissement à la fois ; les autres sessions lisent le cumul existant
+    if not _refresh_lock.acquire(blocking=force):
+        return True
+    try:
+        result = execute_query(REFRESH_CONTACT_ROLLUP_QUERY, {'overlap': REFRESH_OVERLAP}, fetch=False)
+        if result:
+            _last_refresh = time.monotonic()
+        return bool(result)
+    finally:
+        _refresh_lock.release()
+
+
+def escape_like(text):
+    """
+    Échapper les caractères spéciaux de LIKE (\\, % et _) pour une recherche littérale
+    """
+    return re.sub(r"([\\%_])", r"\\\1", text)
+
+
+def get_contacts_page(search_text=None, sort='last_seen', offset=0, limit=20):
+    """
+    Retourner (page de contacts, nombre total de contacts correspondants), paginés côté serveur
+    search_text : préfixe du numéro (chiffres, index text_pattern_ops) ou partie du nom / de l'entreprise
+    """
+    if sort not in CONTACT_SORTS:
+        raise ValueError(f"Tri inconnu: {sort}")
+
+    refresh_contact_rollup()
+
+    conditions, params = [], []
+    if search_text:
+        digits = re.sub(r"[\s+\-().]", "", search_text)
+        if digits.isdigit():
+            conditions.append("phone LIKE %s")
+            params.append(f"{escape_like(digits)}%")
+        else:
+            pattern = f"%{escape_like(search_text)}%"
+            conditions.append("(client_name ILIKE %s OR company_name ILIKE %s)")
+            params.extend([pattern, pattern])
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    query = f"""
+    SELECT phone, first_seen, last_seen, chat_count, total_messages, latest_chatid::text as latest_chatid,
+           COALESCE(NULLIF(client_name, ''), 'Contact anonyme') as client_name,
+           COALESCE(NULLIF(company_name, ''), 'Non spécifié') as company_name,
+           COALESCE(NULLIF(service_interest, ''), 'Non analysé') as service_interest,
+           is_completed,
+           latest_summary,
+           COUNT(*) OVER () as total_contacts
+    FROM contact_rollup
+    {where}
+    ORDER BY {sort} DESC NULLS LAST, phone
+    LIMIT %s OFFSET %s
+    """
+    page_df = execute_query(query, tuple(params) + (limit, offset))
+    total = int(page_df.iloc[0]['total_contacts']) if not page_df.empty else 0
+    return page_df.drop(columns=['total_contacts'], errors='ignore'), total
+
+
+def get_contact_chats(phone):
+    """
+    Retourner les conversations d'un contact (numéro normalisé), de la plus récente à la plus ancienne
+    """
+    query = f"""
+    SELECT c.chatid::text as chatid,
+           MIN(m.created_at) as first_message_at,
+           MAX(m.created_at) as last_message_at,
+           COUNT(*) as message_count,
+           ca.service_interest,
+           ca.is_completed
+    FROM public.chat c
+    JOIN public.message m ON m.chatid = c.chatid
+    LEFT JOIN conversation_analysis ca ON ca.chatid = c.chatid
+    WHERE {PHONE_EXPRESSION} = %s
+    GROUP BY c.chatid, ca.service_interest, ca.is_completed
+    ORDER BY MAX(m.created_at) DESC
+    """
+    return execute_query(query, (phone,))
@@ -0,0 +1,200 @@
+"""
+Index d'embeddings des résumés de conversations (recherche sémantique)
+
+Stockage sur disque dans EMBEDDING_INDEX_DIR :
+- vectors.f32 : matrice float32 (n x dim) lue en memmap, lignes normalisées
+- ids.npy     : chatid de chaque ligne
+- meta.json   : fournisseur, dimension, nombre de lignes et repère last_updated
+"""
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from config.settings import EMBEDDING_INDEX_DIR, EMBEDDING_INDEX_REFRESH_SECONDS, EMBEDDING_MIN_SCORE
+from database.cache import REFRESH_OVERLAP
+from utils.embeddings import get_embedding_provider
+
+VECTORS_FILE = "vectors.f32"
+IDS_FILE = "ids.npy"
+META_FILE = "meta.json"
+
+
+class EmbeddingIndex:
+    """
+    Index top-k par produit scalaire (NumPy) sur une matrice memmap.
+    Mise à jour incrémentale : les résumés modifiés remplacent leur ligne, les nouveaux
+    sont ajoutés en fin de fichier ; changer de fournisseur reconstruit l'index.
+    """
+
+    def __init__(self, directory, provider, loader):
+        self.directory = directory
+        self.provider = provider
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._meta = None
+        self._ids = None
+        self._vectors = None
+        self._positions = {}
+
+    def update(self, full=False):
+        """
+        Ajouter ou remplacer les résumés modifiés depuis le dernier passage
+        Retourne le nombre de résumés indexés, ou None si la base est indisponible
+        """
+        with self._lock:
+            self._load()
+            if full or self._meta is None or self._meta['provider'] != self.provider.name:
+                self._reset()
+
+            # Repère reculé de REFRESH_OVERLAP : une analyse validée après coup avec un last_updated
+            # plus ancien est tout de même indexée (sa ligne est remplacée si elle existe déjà)
+            watermark = self._meta['watermark']
+            summaries = self.loader(pd.Timestamp(watermark) - REFRESH_OVERLAP if watermark else None)
+            if 'chatid' not in summaries.columns:
+                return None
+            if summaries.empty:
+                return 0
+
+            vectors = self.provider.embed(summaries['conversation_summary'].tolist())
+            if self._meta['dim'] is None:
+                self._meta['dim'] = int(vectors.shape[1])
+
+            existing = summaries['chatid'].map(self._positions)
+            replaced = existing.notna().to_numpy()
+            if replaced.any():
+                matrix = np.memmap(self._path(VECTORS_FILE), dtype=np.float32, mode='r+',
+                                   shape=(self._meta['count'], self._meta['dim']))
+                matrix[existing[replaced].astype(int).to_numpy()] = vectors[replaced]
+                matrix.flush()
+                del matrix
+
+            if not replaced.all():
+                # Lignes orphelines d'un ajout interrompu (après count) : les retirer avant d'ajouter,
+                # sinon chaque nouveau vecteur serait associé au mauvais chatid
+                os.truncate(self._path(VECTORS_FILE), self._meta['count'] * self._meta['dim'] * 4)
+                with open(self._path(VECTORS_FILE), 'ab') as output:
+                    output.write(np.ascontiguousarray(vectors[~replaced], dtype=np.float32).tobytes())
+                ids = np.concatenate([self._ids, summaries['chatid'][~replaced].to_numpy(dtype=str)])
+                self._write_ids(ids)
+                self._meta['count'] = len(ids)
+
+            if summaries['last_updated'].notna().any():
+                self._meta['watermark'] = str(summaries['last_updated'].max())
+            self._write_meta()
+            self._meta = None  # Relecture (memmap redimensionné) au prochain accès
+            return len(summaries)
+
+    def search(self, query_text, k=20, min_score=None):
+        """
+        Retourner les k résumés les plus proches de la requête (chatid, score)
+        min_score : écarter les résumés dont le score est inférieur à ce seuil
+        """
+        with self._lock:
+            self._load()
+            if self._vectors is None or not len(self._ids) or self._meta['provider'] != self.provider.name:
+                return pd.DataFrame(columns=['chatid', 'score'])
+            vectors, ids = self._vectors, self._ids
+
+        query_vector = self.provider.embed([query_text])[0]
+        scores = vectors @ query_vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        if min_score is not None:
+            top = top[scores[top] >= min_score]
+        return pd.DataFrame({'chatid': ids[top], 'score': scores[top]})
+
+    def _load(self):
+        if self._meta is not None:
+            return
+        meta_path = self._path(META_FILE)
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, encoding='utf-8') as meta_file:
+            self._meta = json.load(meta_file)
+        # meta.json fait foi : les identifiants au-delà de count viennent d'un ajout interrompu
+        self._ids = np.load(self._path(IDS_FILE))[:self._meta['count']] if self._meta['count'] else np.array([], dtype=str)
+        self._vectors = None
+        if self._meta['count']:
+            self._vectors = np.memmap(self._path(VECTORS_FILE), dtype=np.float32, mode='r',
+                                      shape=(self._meta['count'], self._meta['dim']))
+        self._positions = {chatid: position for position, chatid in enumerate(self._ids)}
+
+    def _reset(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._vectors = None
+        # Supprimer puis recréer (et non tronquer) : un memmap encore ouvert reste lisible
+        if os.path.exists(self._path(VECTORS_FILE)):
+            os.remove(self._path(VECTORS_FILE))
+        open(self._path(VECTORS_FILE), 'wb').close()
+        self._ids = np.array([], dtype=str)
+        self._write_ids(self._ids)
+        self._positions = {}
+        self._meta = {'provider': self.provider.name, 'dim': self.provider.dim, 'count': 0, 'watermark': None}
+        self._write_meta()
+
+    def _write_ids(self, ids):
+        # Écriture atomique, comme meta.json
+        temporary_path = self._path(IDS_FILE + ".tmp")
+        with open(temporary_path, 'wb') as ids_file:
+            np.save(ids_file, ids)
+        os.replace(temporary_path, self._path(IDS_FILE))
+
+    def _write_meta(self):
+        # Écriture atomique : un lecteur ne voit jamais un meta.json partiel
+        temporary_path = self._path(META_FILE + ".tmp")
+        with open(temporary_path, 'w', encoding='utf-8') as meta_file:
+            json.dump(self._meta, meta_file)
+        os.replace(temporary_path, self._path(META_FILE))
+
+    def _path(self, file_name):
+        return os.path.join(self.directory, file_name)
+
+
+def _load_summaries(since=None):
+    from database.queries import get_conversation_summaries
+    return get_conversation_summaries(since=since)
+
+
+_embedding_index = None
+_index_lock = threading.Lock()
+_last_refresh = 0.0
+
+
+def get_embedding_index():
+    """
+    Retourner l'index d'embeddings du processus (fournisseur EMBEDDING_PROVIDER)
+    """
+    global _embedding_index
+    with _index_lock:
+        if _embedding_index is None:
+            _embedding_index = EmbeddingIndex(EMBEDDING_INDEX_DIR, get_embedding_provider(), _load_summaries)
+        return _embedding_index
+
+
+def refresh_embedding_index(force=False):
+    """
+    Indexer les résumés modifiés depuis le dernier passage
+    Sans force, au plus une fois par EMBEDDING_INDEX_REFRESH_SECONDS dans le processus
+    """
+    global _last_refresh
+
+    if not force and time.monotonic() - _last_refresh < EMBEDDING_INDEX_REFRESH_SECONDS:
+        return True
+    result = get_embedding_index().update()
+    if result is not None:
+        _last_refresh = time.monotonic()
+    return result is not None
+
+
+def semantic_search_conversations(query_text, k=20, min_score=EMBEDDING_MIN_SCORE):
+    """
+    Conversations dont le résumé est le plus proche du texte recherché (chatid, score),
+    au plus k et de score au moins min_score
+    """
+    refresh_embedding_index()
+    return get_embedding_index().search(query_text, k, min_score=min_score)
@@ -0,0 +1,248 @@
+"""
+Export des conversations en flux (curseur serveur) vers CSV gzip ou Parquet
+La mémoire utilisée reste bornée par la taille d'un lot, quelle que soit la période
+"""
+import csv
+import gzip
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from config.settings import EXPORT_DIR, EXPORT_CHUNK_SIZE, EXPORT_RETENTION_HOURS
+
+# Préfixe des fichiers générés : seuls ces fichiers sont concernés par la durée de conservation
+EXPORT_FILE_PREFIX = "conversations_"
+
+# Requêtes d'export : une ligne par conversation, ou une ligne par message
+# (bornes demi-ouvertes : la fin reçue est le lendemain du dernier jour exporté)
+EXPORT_QUERIES = {
+    'summary': """
+    SELECT m.chatid::text as chatid,
+           c.value as whatsapp_number,
+           MIN(m.created_at) as start_time,
+           MAX(m.created_at) as end_time,
+           COUNT(*) as message_count,
+           COUNT(CASE WHEN m.role = 'customer' THEN 1 END) as customer_messages,
+           COUNT(CASE WHEN m.role = 'agent' THEN 1 END) as agent_messages,
+           ca.client_name,
+           ca.company_name,
+           ca.service_interest,
+           ca.is_completed,
+           ca.conversation_summary
+    FROM public.message m
+    LEFT JOIN public.chat c ON m.chatid = c.chatid
+    LEFT JOIN conversation_analysis ca ON m.chatid = ca.chatid
+    WHERE m.created_at >= %s AND m.created_at < %s
+    GROUP BY m.chatid, c.value, ca.client_name, ca.company_name,
+             ca.service_interest, ca.is_completed, ca.conversation_summary
+    ORDER BY MAX(m.created_at) DESC
+    """,
+    'transcripts': """
+    SELECT m.chatid::text as chatid,
+           c.value as whatsapp_number,
+           m.messageid::text as messageid,
+           m.created_at,
+           m.role,
+           m.content,
+           ca.client_name,
+           ca.company_name,
+           ca.service_interest,
+           ca.is_completed,
+           ca.conversation_summary
+    FROM public.message m
+    LEFT JOIN public.chat c ON m.chatid = c.chatid
+    LEFT JOIN conversation_analysis ca ON m.chatid = ca.chatid
+    WHERE m.created_at >= %s AND m.created_at < %s
+    ORDER BY m.chatid, m.created_at
+    """,
+}
+
+EXPORT_FORMATS = {
+    'csv.gz': "CSV compressé (gzip)",
+    'parquet': "Parquet",
+}
+
+# Types Parquet explicites : un lot entièrement NULL ne doit pas changer le schéma du fichier
+_TIMESTAMP_COLUMNS = {'start_time', 'end_time', 'created_at'}
+_INTEGER_COLUMNS = {'message_count', 'customer_messages', 'agent_messages'}
+_BOOLEAN_COLUMNS = {'is_completed'}
+
+
+def export_to_file(kind, file_format, start_date, end_date, output_dir=EXPORT_DIR,
+                   chunk_size=EXPORT_CHUNK_SIZE, connection=None, progress_callback=None):
+    """
+    Exporter la période vers un fichier sur disque et retourner (chemin, nombre de lignes)
+
+    start_date, end_date : période exportée, dernier jour inclus
+    kind : 'summary' (une ligne par conversation) ou 'transcripts' (une ligne par message)
+    file_format : 'csv.gz' ou 'parquet'
+    connection : connexion psycopg2 (par défaut, une connexion du pool SQLAlchemy)
+    progress_callback : appelé avec le nombre de lignes écrites après chaque lot
+    """
+    if kind not in EXPORT_QUERIES:
+        raise ValueError(f"Type d'export inconnu: {kind}")
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export inconnu: {file_format}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    purge_old_exports(output_dir)
+    file_name = f"{EXPORT_FILE_PREFIX}{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_format}"
+    path = os.path.join(output_dir, file_name)
+
+    owns_connection = connection is None
+    if owns_connection:
+        from database.connection import get_database_connection
+        connection = get_database_connection().raw_connection()
+
+    try:
+        # Curseur nommé = curseur côté serveur : les lignes arrivent par lots de chunk_size
+        with connection.cursor(name=f"export_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = chunk_size
+            cursor.execute(EXPORT_QUERIES[kind], (start_date, end_date + timedelta(days=1)))
+            chunks = _iter_chunks(cursor, chunk_size)
+            if kind == 'summary':
+                chunks = _with_directory_names(cursor, chunks)
+            if file_format == 'csv.gz':
+                row_count = _write_csv_gz(path, cursor, chunks, progress_callback)
+            else:
+                row_count = _write_parquet(path, cursor, chunks, progress_callback)
+        connection.rollback()
+    except Exception:
+        # Ne pas laisser un fichier partiel sur le disque
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    finally:
+        if owns_connection:
+            connection.close()
+
+    return path, row_count
+
+
+def purge_old_exports(output_dir=EXPORT_DIR, retention_hours=EXPORT_RETENTION_HOURS):
+    """
+    Supprimer les fichiers d'export plus anciens que retention_hours ; retourne le nombre supprimé
+    (les autres fichiers et sous-dossiers de output_dir ne sont pas touchés)
+    """
+    if not os.path.isdir(output_dir):
+        return 0
+
+    deadline = time.time() - retention_hours * 3600
+    removed = 0
+    for entry in os.scandir(output_dir):
+        if not entry.is_file() or not entry.name.startswith(EXPORT_FILE_PREFIX):
+            continue
+        try:
+            if entry.stat().st_mtime < deadline:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            # Fichier supprimé entre-temps par un autre export
+            continue
+    return removed
+
+
+def _with_directory_names(cursor, chunks):
+    """
+    Compléter client_name / company_name par l'annuaire whatsapp_numbers quand l'IA n'a rien
+    extrait (même priorité que le tableau du dashboard), lot par lot
+    """
+    from database.cache import get_contact_directory
+
+    directory = get_contact_directory()
+    for rows in chunks:
+        # La description d'un curseur serveur n'est connue qu'après la première lecture
+        columns = [column[0] for column in cursor.description]
+        number_index = columns.index('whatsapp_number')
+        name_index = columns.index('client_name')
+        company_index = columns.index('company_name')
+
+        contacts = directory.lookup(pd.Series([row[number_index] for row in rows]))
+        has_manual_name = contacts['nombre'].notna() & (contacts['nombre'] != 'Inconnu')
+        manual_names = (contacts['nombre'].fillna('') + ' ' + contacts['apellido'].fillna('')).str.strip()
+        has_manual_company = contacts['empresa'].notna() & (contacts['empresa'] != 'Non spécifié')
+
+        completed = []
+        for position, row in enumerate(rows):
+            row = list(row)
+            if not row[name_index] and has_manual_name.iat[position]:
+                row[name_index] = manual_names.iat[position]
+            if not row[company_index] and has_manual_company.iat[position]:
+                row[company_index] = contacts['empresa'].iat[position]
+            completed.append(tuple(row))
+        yield completed
+
+
+def _iter_chunks(cursor, chunk_size):
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def _write_csv_gz(path, cursor, chunks, progress_callback):
+    row_count = 0
+    with gzip.open(path, 'wt', encoding='utf-8-sig', newline='') as output:
+        writer = csv.writer(output)
+        header_written = False
+        for rows in chunks:
+            if not header_written:
+                writer.writerow([column[0] for column in cursor.description])
+                header_written = True
+            writer.writerows(rows)
+            row_count += len(rows)
+            if progress_callback:
+                progress_callback(row_count)
+        if not header_written and cursor.description:
+            writer.writerow([column[0] for column in cursor.description])
+    return row_count
+
+
+def _write_parquet(path, cursor, chunks, progress_callback):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("L'export Parquet nécessite le paquet pyarrow")
+
+    row_count = 0
+    writer = None
+    try:
+        for rows in chunks:
+            if writer is None:
+                columns = [column[0] for column in cursor.description]
+                schema = pa.schema([(name, _arrow_type(pa, name)) for name in columns])
+                writer = pq.ParquetWriter(path, schema, compression='zstd')
+            values = list(zip(*rows))
+            table = pa.Table.from_arrays(
+                [pa.array(list(values[i]), type=schema.field(i).type) for i in range(len(columns))],
+                schema=schema
+            )
+            writer.write_table(table)
+            row_count += len(rows)
+            if progress_callback:
+                progress_callback(row_count)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        # Période vide : fichier valide sans ligne
+        columns = [column[0] for column in cursor.description]
+        schema = pa.schema([(name, _arrow_type(pa, name)) for name in columns])
+        pq.write_table(schema.empty_table(), path)
+    return row_count
+
+
+def _arrow_type(pa, column_name):
+    if column_name in _TIMESTAMP_COLUMNS:
+        return pa.timestamp('us', tz='UTC')
+    if column_name in _INTEGER_COLUMNS:
+        return pa.int64()
+    if column_name in _BOOLEAN_COLUMNS:
+        return pa.bool_()
+    return pa.string()
@@ -0,0 +1,117 @@
+"""
+Partitionnement mensuel de public.message (PARTITION BY RANGE (created_at), bornes en UTC)
+
+Les requêtes du dashboard filtrent toutes sur une plage de created_at : seules les partitions
+des mois concernés sont lues (élagage au moment du plan, les paramètres psycopg2 étant des
+littéraux). Un mois ancien se détache sans réécrire la table.
+Utilisé par scripts/partition_messages.py (migration) et scripts/maintain_message_partitions.py.
+"""
+from datetime import date, datetime
+
+# Partitions nommées message_AAAA_MM : le nom reste valable après l'échange des tables
+PARTITION_PREFIX = "message_"
+
+# Partitions d'une table partitionnée (le mois se lit dans le nom) et nombre de lignes estimé
+LIST_PARTITIONS_QUERY = """
+SELECT child.relname as name,
+       GREATEST(child.reltuples, 0)::bigint as estimated_rows
+FROM pg_inherits i
+JOIN pg_class child ON child.oid = i.inhrelid
+WHERE i.inhparent = %s::regclass
+ORDER BY child.relname
+"""
+
+
+def month_start(value):
+    """
+    Premier jour du mois d'une date (ou d'un horodatage)
+    """
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    """
+    Premier jour du mois décalé de count mois
+    """
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def parse_month(text):
+    """
+    Lire un mois au format AAAA-MM
+    """
+    return month_start(datetime.strptime(text, "%Y-%m"))
+
+
+def partition_name(month):
+    """
+    Nom de la partition d'un mois (message_AAAA_MM)
+    """
+    return f"{PARTITION_PREFIX}{month:%Y_%m}"
+
+
+def create_partition_sql(parent, month):
+    """
+    Création idempotente de la partition d'un mois (bornes à minuit UTC)
+    """
+    return (
+        f"CREATE TABLE IF NOT EXISTS public.{partition_name(month)} PARTITION OF {parent} "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{add_months(month, 1):%Y-%m-%d} 00:00:00+00')"
+    )
+
+
+def is_partitioned(cursor, table):
+    """
+    Vrai si la table est une table partitionnée
+    """
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))", (table,))
+    return cursor.fetchone()[0]
+
+
+def list_partitions(cursor, parent):
+    """
+    Partitions mensuelles d'une table : liste de (mois, nom, lignes estimées), du plus ancien au plus récent
+    """
+    cursor.execute(LIST_PARTITIONS_QUERY, (parent,))
+    partitions = []
+    for name, estimated_rows in cursor.fetchall():
+        if not name.startswith(PARTITION_PREFIX):
+            continue
+        try:
+            month = parse_month(name[len(PARTITION_PREFIX):].replace("_", "-"))
+        except ValueError:
+            continue
+        partitions.append((month, name, estimated_rows))
+    return partitions
+
+
+def ensure_partitions(cursor, parent, first_month, last_month):
+    """
+    Créer les partitions manquantes de first_month à last_month inclus ; retourne les noms créés
+    """
+    existing = {month for month, _, _ in list_partitions(cursor, parent)}
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        if month not in existing:
+            cursor.execute(create_partition_sql(parent, month))
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+def monthly_counts(cursor, table, since=None):
+    """
+    Nombre exact de lignes par mois (UTC) d'une table de messages : {mois: lignes}
+    (clé None pour les messages sans created_at, qu'aucune partition ne peut recevoir)
+    since : ne compter que les messages à partir de cet horodatage (lecture par l'index created_at)
+    """
+    condition = "WHERE created_at >= %s OR created_at IS NULL" if since is not None else ""
+    cursor.execute(f"""
+        SELECT DATE_TRUNC('month', created_at AT TIME ZONE 'UTC')::date as month, COUNT(*)
+        FROM {table}
+        {condition}
+        GROUP BY 1
+    """, (since,) if since is not None else None)
+    return {month_start(month) if month else None: count for month, count in cursor.fetchall()}
@@ -4,28 +4,56 @@ Requêtes SQL pour le dashboard CCI Colombia
 import os
 from datetime import datetime, timedelta
 import pandas as pd
-from dotenv import load_dotenv
-
-# Charger les variables d'environnement
-load_dotenv()
 
 from database.connection import execute_query
+from database.cache import get_contact_directory
 
-def get_conversations_in_period(start_date, end_date):
+def get_data_version_row():
     """
-    Récupérer toutes les conversations dans une période donnée
+    Récupérer les horodatages du dernier message et de la dernière analyse (version des données)
     """
     query = """
-    SELECT DISTINCT chatid::text as chatid, 
-           MIN(created_at) as start_time,
-           MAX(created_at) as end_time,
-           COUNT(*) as message_count
-    FROM public.message 
-    WHERE created_at >= %s AND created_at <= %s
-    GROUP BY chatid
-    ORDER BY start_time DESC
+    SELECT (SELECT MAX(created_at) FROM public.message) as last_message_at,
+           (SELECT MAX(last_updated) FROM conversation_analysis) as last_analysis_at
     """
-    return execute_query(query, (start_date, end_date))
+    return execute_query(query)
+
+def get_purge_generation_row():
+    """
+    Récupérer la génération des purges (dernière ligne de data_purge_log, 0 si aucune purge)
+    Vide si la table n'existe pas (database/schema_performance.sql non appliqué)
+    """
+    return execute_query("SELECT COALESCE(MAX(generation), 0) as generation FROM data_purge_log")
+
+def get_database_today_row():
+    """
+    Récupérer la date du jour dans le fuseau de la session (celui des regroupements created_at::date)
+    """
+    return execute_query("SELECT CURRENT_DATE as today")
+
+def get_whatsapp_directory():
+    """
+    Récupérer l'annuaire des numéros WhatsApp (chargé en mémoire par database.cache)
+    """
+    query = """
+    SELECT celular, nombre, apellido, empresa
+    FROM public.whatsapp_numbers
+    WHERE celular IS NOT NULL
+    ORDER BY celular
+    """
+    return execute_query(query)
+
+def get_whatsapp_directory_signature():
+    """
+    Récupérer le nombre de lignes et une somme de contrôle de whatsapp_numbers
+    (détection des modifications sans relire l'annuaire)
+    """
+    query = """
+    SELECT COUNT(*) as row_count,
+           COALESCE(SUM(hashtext(CONCAT_WS('|', celular, nombre, apellido, empresa))::bigint), 0) as checksum
+    FROM public.whatsapp_numbers
+    """
+    return execute_query(query)
 
 def get_conversation_messages(chatid):
     """
@@ -34,55 +62,193 @@ def get_conversation_messages(chatid):
     query = """
     SELECT messageid::text as messageid, chatid::text as chatid, content, role, created_at
     FROM public.message 
-    WHERE chatid::text = %s
+    WHERE chatid = %s::uuid
     ORDER BY created_at ASC
     """
     return execute_query(query, (chatid,))
 
-def get_kpi_data(start_date, end_date):
+def get_conversation_messages_window(chatid, before=None, after=None, limit=50):
     """
-    Récupérer les données pour les KPIs
+    Récupérer une fenêtre de messages d'une conversation via l'index (chatid, created_at)
+    Les bornes sont des clés (created_at, messageid) : les messages de même horodatage
+    qu'une borne ne sont ni sautés ni répétés d'une fenêtre à l'autre
+    - before : les `limit` messages précédant cette clé
+    - after : les `limit` messages suivant cette clé
+    - sans borne : les `limit` derniers messages
+    Les messages sont toujours retournés dans l'ordre chronologique
     """
-    # Nombre total d'utilisateurs (conversations uniques)
-    users_query = """
-    SELECT COUNT(DISTINCT chatid) as total_users
-    FROM public.message 
-    WHERE created_at >= %s AND created_at <= %s
+    if after is not None:
+        query = """
+        SELECT messageid::text as messageid, chatid::text as chatid, content, role, created_at
+        FROM public.message 
+        WHERE chatid = %s::uuid AND (created_at, messageid) > (%s, %s::uuid)
+        ORDER BY created_at ASC, messageid ASC
+        LIMIT %s
+        """
+        return execute_query(query, (chatid, *after, limit))
+    
+    range_filter = "AND (created_at, messageid) < (%s, %s::uuid)" if before is not None else ""
+    params = (chatid, *before, limit) if before is not None else (chatid, limit)
+    query = f"""
+    SELECT * FROM (
+        SELECT messageid::text as messageid, chatid::text as chatid, content, role, created_at
+        FROM public.message 
+        WHERE chatid = %s::uuid {range_filter}
+        ORDER BY created_at DESC, messageid DESC
+        LIMIT %s
+    ) as window_messages
+    ORDER BY created_at ASC, messageid ASC
     """
+    return execute_query(query, params)
+
+def get_messages_for_chats(chatids, per_chat_limit=50):
+    """
+    Récupérer en une seule requête les derniers messages de plusieurs conversations
+    (au plus per_chat_limit messages par conversation, ordre chronologique)
+    """
+    if not chatids:
+        return pd.DataFrame()
     
-    # Longueur moyenne des conversations
-    avg_length_query = """
-    SELECT AVG(message_count) as avg_conversation_length
+    query = """
+    SELECT messageid, chatid, content, role, created_at
     FROM (
-        SELECT chatid, COUNT(*) as message_count
+        SELECT messageid::text as messageid, chatid::text as chatid, content, role, created_at,
+               ROW_NUMBER() OVER (PARTITION BY chatid ORDER BY created_at DESC) as rank_from_last
         FROM public.message 
-        WHERE created_at >= %s AND created_at <= %s
-        GROUP BY chatid
-    ) as conv_stats
+        WHERE chatid = ANY(%s::uuid[])
+    ) as ranked
+    WHERE rank_from_last <= %s
+    ORDER BY chatid, created_at ASC
+    """
+    return execute_query(query, (list(chatids), per_chat_limit))
+
+def get_conversation_stats(chatid):
+    """
+    Récupérer les statistiques d'une conversation (bornes et nombre de messages) en une requête
+    """
+    query = """
+    SELECT COUNT(*) as total_messages,
+           COUNT(CASE WHEN role = 'customer' THEN 1 END) as customer_messages,
+           COUNT(CASE WHEN role = 'agent' THEN 1 END) as agent_messages,
+           MIN(created_at) as first_message_at,
+           MAX(created_at) as last_message_at
+    FROM public.message 
+    WHERE chatid = %s::uuid
+    """
+    return execute_query(query, (chatid,))
+
+def get_conversation_summary(chatid):
+    """
+    Récupérer le résumé IA complet d'une conversation (None si absent), via la clé chatid
+    """
+    query = """
+    SELECT conversation_summary
+    FROM conversation_analysis
+    WHERE chatid = %s::uuid
+    """
+    summary_df = execute_query(query, (chatid,))
+    if summary_df.empty or pd.isna(summary_df.iloc[0]['conversation_summary']):
+        return None
+    return summary_df.iloc[0]['conversation_summary']
+
+def get_daily_chat_message_counts(start_day, end_day):
     """
+    Récupérer le nombre de messages par (jour, conversation) pour les jours start_day -> end_day inclus
+    (agrégats partiels journaliers des KPIs)
+    """
+    query = """
+    SELECT created_at::date as day, chatid::text as chatid, COUNT(*) as message_count
+    FROM public.message 
+    WHERE created_at >= %s AND created_at < %s
+    GROUP BY 1, 2
+    """
+    return execute_query(query, (start_day, end_day + timedelta(days=1)))
+
+def get_sampled_chat_message_counts(start_date, end_date, sample_percent, seed=42):
+    """
+    Récupérer le nombre de messages par conversation (jours start_date -> end_date inclus) pour un
+    échantillon de conversations : chaque conversation est tirée avec la probabilité sample_percent / 100
+    (TABLESAMPLE BERNOULLI sur public.chat, tirage répétable avec seed). Les messages des conversations
+    tirées sont lus via l'index (chatid, created_at) : le coût suit la taille de l'échantillon.
+    """
+    query = """
+    SELECT c.chatid::text as chatid, COUNT(*) as message_count
+    FROM public.chat c TABLESAMPLE BERNOULLI (%s) REPEATABLE (%s)
+    JOIN public.message m ON m.chatid = c.chatid
+    WHERE m.created_at >= %s AND m.created_at < %s
+    GROUP BY c.chatid
+    """
+    return execute_query(query, (sample_percent, seed, start_date, end_date + timedelta(days=1)))
+
+# Bornes (en secondes) de l'histogramme des temps de réponse : les histogrammes journaliers
+# s'additionnent, ce qui permet de calculer les percentiles d'une période sans relire les messages
+RESPONSE_TIME_BUCKETS = (5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 300, 600, 900, 1800, 3600, 7200, 21600, 86400)
+
+def get_daily_response_times(start_day, end_day):
+    """
+    Récupérer les temps de réponse de l'agent par jour (jours start_day -> end_day inclus)
+    Un temps de réponse = écart entre un message client et le message agent qui le suit (LAG)
+    Retourne par jour : nombre de réponses, p50/p90/p99 (percentile_cont, en secondes)
+    et les colonnes bucket_0..bucket_N de l'histogramme (bornes RESPONSE_TIME_BUCKETS)
+    """
+    bucket_bounds = ", ".join(str(bound) for bound in RESPONSE_TIME_BUCKETS)
+    bucket_columns = ",\n           ".join(
+        f"COUNT(*) FILTER (WHERE bucket = {index}) as bucket_{index}"
+        for index in range(len(RESPONSE_TIME_BUCKETS) + 1)
+    )
     
-    # Nouvelles conversations par jour
-    daily_conversations_query = """
-    SELECT DATE(start_time) as date, COUNT(*) as new_conversations
+    # La veille est lue pour que LAG trouve le message client précédant la première réponse du jour
+    query = f"""
+    WITH turns AS (
+        SELECT role, created_at,
+               LAG(role) OVER w as previous_role,
+               LAG(created_at) OVER w as previous_created_at
+        FROM public.message 
+        WHERE created_at >= %s AND created_at < %s
+        WINDOW w AS (PARTITION BY chatid ORDER BY created_at)
+    ),
+    responses AS (
+        SELECT created_at::date as day,
+               EXTRACT(EPOCH FROM created_at - previous_created_at) as response_seconds,
+               width_bucket(EXTRACT(EPOCH FROM created_at - previous_created_at)::float8,
+                            ARRAY[{bucket_bounds}]::float8[]) as bucket
+        FROM turns
+        WHERE role = 'agent' AND previous_role = 'customer' AND created_at >= %s
+    )
+    SELECT day,
+           COUNT(*) as response_count,
+           percentile_cont(0.5) WITHIN GROUP (ORDER BY response_seconds) as p50,
+           percentile_cont(0.9) WITHIN GROUP (ORDER BY response_seconds) as p90,
+           percentile_cont(0.99) WITHIN GROUP (ORDER BY response_seconds) as p99,
+           {bucket_columns}
+    FROM responses
+    GROUP BY day
+    """
+    return execute_query(query, (start_day - timedelta(days=1), end_day + timedelta(days=1), start_day))
+
+# Granularités temporelles acceptées par date_trunc pour les graphiques
+TIME_GRANULARITIES = ('day', 'week', 'month')
+
+def get_new_conversations_by_period(start_date, end_date, granularity='day'):
+    """
+    Récupérer le nombre de nouvelles conversations agrégé par jour, semaine ou mois (date_trunc en SQL)
+    entre start_date et end_date inclus (mêmes bornes que les cartes KPI)
+    """
+    if granularity not in TIME_GRANULARITIES:
+        raise ValueError(f"Granularité inconnue: {granularity}")
+    
+    query = f"""
+    SELECT DATE_TRUNC('{granularity}', start_time)::date as date, COUNT(*) as new_conversations
     FROM (
         SELECT chatid, MIN(created_at) as start_time
         FROM public.message 
-        WHERE created_at >= %s AND created_at <= %s
+        WHERE created_at >= %s AND created_at < %s
         GROUP BY chatid
     ) as conversation_starts
-    GROUP BY DATE(start_time)
-    ORDER BY date
+    GROUP BY 1
+    ORDER BY 1
     """
-    
-    users_df = execute_query(users_query, (start_date, end_date))
-    avg_length_df = execute_query(avg_length_query, (start_date, end_date))
-    daily_conversations_df = execute_query(daily_conversations_query, (start_date, end_date))
-    
-    return {
-        'total_users': users_df.iloc[0]['total_users'] if not users_df.empty else 0,
-        'avg_conversation_length': round(avg_length_df.iloc[0]['avg_conversation_length'], 1) if not avg_length_df.empty else 0,
-        'daily_conversations': daily_conversations_df
-    }
+    return execute_query(query, (start_date, end_date + timedelta(days=1)))
 
 def get_completion_candidates(start_date, end_date):
     """
@@ -100,45 +266,58 @@ def get_completion_candidates(start_date, end_date):
     """
     return execute_query(query, (start_date, end_date))
 
-def get_completion_stats(start_date, end_date):
+def get_analysis_completion_stats(start_date, end_date):
     """
-    Récupérer les statistiques de completion basées sur le nombre de messages
-    Une conversation est complète si elle a plus de 7 messages
+    Récupérer les statistiques de completion jugées par l'IA (conversation_analysis.is_completed)
+    pour les conversations démarrées entre start_date et end_date inclus (sans lire la table message)
     """
     query = """
     SELECT 
         COUNT(*) as total_conversations,
-        COUNT(CASE WHEN message_count > 7 THEN 1 END) as completed_count,
-        COUNT(CASE WHEN message_count <= 7 THEN 1 END) as incomplete_count,
-        0 as not_analyzed_count
-    FROM (
-        SELECT chatid, COUNT(*) as message_count
-        FROM public.message 
-        WHERE created_at >= %s AND created_at <= %s
-        GROUP BY chatid
-    ) as conv_stats
+        COUNT(CASE WHEN is_completed THEN 1 END) as completed_count,
+        COUNT(CASE WHEN NOT is_completed THEN 1 END) as incomplete_count,
+        COUNT(CASE WHEN is_completed IS NULL THEN 1 END) as not_analyzed_count
+    FROM conversation_analysis
+    WHERE conversation_start_date >= %s AND conversation_start_date < %s
     """
-    return execute_query(query, (start_date, end_date))
+    return execute_query(query, (start_date, end_date + timedelta(days=1)))
 
-def get_engaged_conversations_count(start_date, end_date):
+def get_service_interest_distribution(start_date, end_date):
     """
-    Récupérer le nombre de conversations engagées (> 2 messages)
+    Récupérer la répartition des services d'intérêt (extraits par IA) des conversations
+    démarrées entre start_date et end_date inclus
     """
     query = """
-    SELECT COUNT(*) as engaged_conversations
-    FROM (
-        SELECT chatid, COUNT(*) as message_count
-        FROM public.message 
-        WHERE created_at >= %s AND created_at <= %s
-        GROUP BY chatid
-        HAVING COUNT(*) > 2
-    ) as engaged
+    SELECT COALESCE(NULLIF(service_interest, ''), 'Non analysé') as service_interest,
+           COUNT(*) as conversations
+    FROM conversation_analysis
+    WHERE conversation_start_date >= %s AND conversation_start_date < %s
+    GROUP BY 1
+    ORDER BY 2 DESC
     """
-    return execute_query(query, (start_date, end_date))
+    return execute_query(query, (start_date, end_date + timedelta(days=1)))
+
+def get_theme_coverage(start_date, end_date):
+    """
+    Récupérer, par thème MarIA, le nombre de conversations analysées et celles où le thème
+    a été abordé, pour les conversations démarrées entre start_date et end_date inclus
+    """
+    query = """
+    SELECT ct.theme_index,
+           COUNT(*) as analyzed_conversations,
+           COUNT(*) FILTER (WHERE ct.covered) as covered_conversations
+    FROM conversation_themes ct
+    JOIN conversation_analysis ca ON ca.chatid = ct.chatid
+    WHERE ca.conversation_start_date >= %s AND ca.conversation_start_date < %s
+    GROUP BY ct.theme_index
+    ORDER BY ct.theme_index
+    """
+    return execute_query(query, (start_date, end_date + timedelta(days=1)))
 
 def get_conversations_summary_data(start_date, end_date):
     """
     Récupérer les données pour le tableau de résumé des conversations avec analyses IA
+    (end_date inclus : mêmes bornes que les KPIs)
     """
     query = """
     SELECT m.chatid::text as chatid,
@@ -148,9 +327,6 @@ def get_conversations_summary_data(start_date, end_date):
            COUNT(CASE WHEN m.role = 'customer' THEN 1 END) as customer_messages,
            COUNT(CASE WHEN m.role = 'agent' THEN 1 END) as agent_messages,
            c.value as whatsapp_number,
-           COALESCE(w.nombre, 'Inconnu') as prenom,
-           COALESCE(w.apellido, '') as nom,
-           COALESCE(w.empresa, 'Non spécifié') as entreprise,
            -- Données d'analyse IA depuis conversation_analysis
            ca.client_name as client_name_ai,
            ca.company_name as company_name_ai,
@@ -160,65 +336,107 @@ def get_conversations_summary_data(start_date, end_date):
            ca.analysis_date
     FROM public.message m
     LEFT JOIN public.chat c ON m.chatid = c.chatid
-    LEFT JOIN public.whatsapp_numbers w ON '+' || c.value = w.celular
-    LEFT JOIN conversation_analysis ca ON m.chatid::text = ca.chatid::text
-    WHERE m.created_at >= %s AND m.created_at <= %s
-    GROUP BY m.chatid, c.value, w.nombre, w.apellido, w.empresa, 
+    LEFT JOIN conversation_analysis ca ON m.chatid = ca.chatid
+    WHERE m.created_at >= %s AND m.created_at < %s
+    GROUP BY m.chatid, c.value,
              ca.client_name, ca.company_name, ca.conversation_summary, ca.service_interest, ca.is_completed, ca.analysis_date
     ORDER BY MAX(m.created_at) DESC
     """
-    conversations_df = execute_query(query, (start_date, end_date))
+    conversations_df = execute_query(query, (start_date, end_date + timedelta(days=1)))
     
-    # Créer les colonnes finales en combinant données manuelles et IA
+    # Créer les colonnes finales en combinant données manuelles et IA (vectorisé)
     if not conversations_df.empty:
-        conversations_df['client_name_final'] = conversations_df.apply(
-            lambda row: (row['client_name_ai'] if pd.notna(row['client_name_ai']) and row['client_name_ai'] != '' 
-                        else (f"{row['prenom']} {row['nom']}".strip() if row['prenom'] != 'Inconnu' 
-                             else '-')), axis=1
-        )
+        # Données manuelles : annuaire whatsapp_numbers en mémoire (plus de jointure SQL par ligne)
+        directory = get_contact_directory().lookup(conversations_df['whatsapp_number'])
+        conversations_df['prenom'] = directory['nombre'].fillna('Inconnu')
+        conversations_df['nom'] = directory['apellido'].fillna('')
+        conversations_df['entreprise'] = directory['empresa'].fillna('Non spécifié')
         
-        conversations_df['company_name_final'] = conversations_df.apply(
-            lambda row: (row['company_name_ai'] if pd.notna(row['company_name_ai']) and row['company_name_ai'] != '' 
-                        else (row['entreprise'] if row['entreprise'] != 'Non spécifié' 
-                             else '-')), axis=1
-        )
+        manual_name = (conversations_df['prenom'] + ' ' + conversations_df['nom']).str.strip()
+        manual_name = manual_name.where(conversations_df['prenom'] != 'Inconnu', '-')
+        has_ai_name = conversations_df['client_name_ai'].notna() & (conversations_df['client_name_ai'] != '')
+        conversations_df['client_name_final'] = conversations_df['client_name_ai'].where(has_ai_name, manual_name)
+        
+        manual_company = conversations_df['entreprise'].where(conversations_df['entreprise'] != 'Non spécifié', '-')
+        has_ai_company = conversations_df['company_name_ai'].notna() & (conversations_df['company_name_ai'] != '')
+        conversations_df['company_name_final'] = conversations_df['company_name_ai'].where(has_ai_company, manual_company)
     
     return conversations_df
 
-def get_all_conversations_with_analysis():
+def get_all_conversations_with_analysis(since=None, analysis_since=None):
     """
     Récupérer toutes les conversations avec leurs analyses pour le sélecteur
+    Si since est fourni, ne retourne que les conversations ayant eu une activité
+    depuis cette date (nouveau message, ou analyse mise à jour après analysis_since)
     """
+    activity_filter = ""
+    params = None
+    if since is not None:
+        activity_filter = """
+    WHERE m.chatid IN (
+        SELECT chatid FROM public.message WHERE created_at > %s
+        UNION
+        SELECT chatid FROM conversation_analysis WHERE last_updated > %s
+    )"""
+        params = (since, analysis_since if analysis_since is not None else since)
+    
     query = """
     SELECT DISTINCT
         m.chatid::text as chatid,
         MAX(m.created_at) as last_activity,
         COUNT(*) as message_count,
-        -- Nom d'affichage du client
-        CASE 
-            WHEN ca.client_name IS NOT NULL AND ca.client_name != '' THEN ca.client_name
-            WHEN w.nombre != 'Inconnu' AND w.nombre IS NOT NULL THEN TRIM(CONCAT(w.nombre, ' ', COALESCE(w.apellido, '')))
-            ELSE 'Contact anonyme'
-        END as display_name,
+        -- Noms extraits par IA (complétés par l'annuaire après la requête)
+        NULLIF(ca.client_name, '') as client_name_ai,
+        NULLIF(ca.company_name, '') as company_name_ai,
         -- Numéro WhatsApp
         COALESCE(c.value, 'Non disponible') as whatsapp_number,
-        -- Entreprise
-        CASE 
-            WHEN ca.company_name IS NOT NULL AND ca.company_name != '' THEN ca.company_name
-            WHEN w.empresa IS NOT NULL AND w.empresa != 'Non spécifié' THEN w.empresa
-            ELSE 'Non spécifié'
-        END as company_name,
         -- Résumé court pour aperçu
         CASE 
             WHEN ca.conversation_summary IS NOT NULL THEN LEFT(ca.conversation_summary, 100) || '...'
             ELSE 'Résumé non disponible'
-        END as summary_preview
+        END as summary_preview,
+        ca.last_updated as analysis_updated
     FROM public.message m
     LEFT JOIN public.chat c ON m.chatid = c.chatid
-    LEFT JOIN public.whatsapp_numbers w ON '+' || c.value = w.celular
-    LEFT JOIN conversation_analysis ca ON m.chatid = ca.chatid
-    GROUP BY m.chatid, c.value, w.nombre, w.apellido, w.empresa, 
-             ca.client_name, ca.company_name, ca.conversation_summary
+    LEFT JOIN conversation_analysis ca ON m.chatid = ca.chatid""" + activity_filter + """
+    GROUP BY m.chatid, c.value,
+             ca.client_name, ca.company_name, ca.conversation_summary, ca.last_updated
     ORDER BY MAX(m.created_at) DESC
     """
-    return execute_query(query)
+    conversations_df = execute_query(query, params)
+    if conversations_df.empty:
+        return conversations_df
+    return add_display_names(conversations_df)
+
+def add_display_names(conversations_df):
+    """
+    Remplacer client_name_ai / company_name_ai par display_name / company_name :
+    IA en priorité, sinon annuaire whatsapp_numbers (vectorisé, par whatsapp_number)
+    """
+    directory = get_contact_directory().lookup(conversations_df['whatsapp_number'])
+    has_manual_name = directory['nombre'].notna() & (directory['nombre'] != 'Inconnu')
+    manual_name = (directory['nombre'].fillna('') + ' ' + directory['apellido'].fillna('')).str.strip()
+    display_name = conversations_df['client_name_ai'].fillna(manual_name.where(has_manual_name))
+    has_manual_company = directory['empresa'].notna() & (directory['empresa'] != 'Non spécifié')
+    company_name = conversations_df['company_name_ai'].fillna(directory['empresa'].where(has_manual_company))
+    
+    conversations_df['display_name'] = display_name.fillna('Contact anonyme')
+    conversations_df['company_name'] = company_name.fillna('Non spécifié')
+    return conversations_df.drop(columns=['client_name_ai', 'company_name_ai'])
+
+def get_conversation_summaries(since=None):
+    """
+    Récupérer les résumés IA (chatid, résumé, last_updated), modifiés après since si fourni
+    (alimentation incrémentale de l'index d'embeddings)
+    """
+    query = """
+    SELECT chatid::text as chatid, conversation_summary, last_updated
+    FROM conversation_analysis
+    WHERE conversation_summary IS NOT NULL AND conversation_summary <> ''
+    """
+    params = None
+    if since is not None:
+        query += " AND last_updated > %s"
+        params = (since,)
+    query += " ORDER BY last_updated"
+    return execute_query(query, params)
@@ -28,10 +28,16 @@ CREATE TABLE IF NOT EXISTS conversation_analysis (
     UNIQUE(chatid)
 );
 
+-- Colonne ajoutée après la création initiale de la table (remplie par le batch d'analyse)
+ALTER TABLE conversation_analysis ADD COLUMN IF NOT EXISTS service_interest VARCHAR(255);
+
 -- Index pour optimiser les requêtes
 CREATE INDEX IF NOT EXISTS idx_conversation_analysis_chatid ON conversation_analysis(chatid);
 CREATE INDEX IF NOT EXISTS idx_conversation_analysis_date ON conversation_analysis(analysis_date);
 CREATE INDEX IF NOT EXISTS idx_conversation_analysis_company ON conversation_analysis(company_name);
+-- Panneaux KPI (completion IA, services d'intérêt) : lecture de l'index seul, sans la table message
+CREATE INDEX IF NOT EXISTS idx_conversation_analysis_start_date
+    ON conversation_analysis(conversation_start_date) INCLUDE (is_completed, service_interest);
 
 -- Table pour stocker l'historique des analyses (optionnel)
 CREATE TABLE IF NOT EXISTS analysis_history (
@@ -44,6 +50,16 @@ CREATE TABLE IF NOT EXISTS analysis_history (
     FOREIGN KEY (chatid) REFERENCES conversation_analysis(chatid) ON DELETE CASCADE
 );
 
+-- Couverture des six thèmes d'entretien de MarIA (MARIA_THEMES), une ligne par thème analysé
+CREATE TABLE IF NOT EXISTS conversation_themes (
+    chatid UUID NOT NULL,
+    theme_index SMALLINT NOT NULL,      -- Position du thème dans MARIA_THEMES (1 à 6)
+    covered BOOLEAN NOT NULL,           -- Thème abordé par MarIA dans la conversation
+    
+    PRIMARY KEY (chatid, theme_index),
+    FOREIGN KEY (chatid) REFERENCES conversation_analysis(chatid) ON DELETE CASCADE
+);
+
 -- Vue pour avoir un résumé facile des conversations analysées
 CREATE OR REPLACE VIEW conversations_with_analysis AS
 SELECT 
@@ -92,4 +108,6 @@ COMMENT ON TABLE conversation_analysis IS 'Stockage des analyses IA des conversa
 COMMENT ON COLUMN conversation_analysis.client_name IS 'Prénom/nom du client extrait par IA';
 COMMENT ON COLUMN conversation_analysis.company_name IS 'Nom de l''entreprise extraite par IA';
 COMMENT ON COLUMN conversation_analysis.conversation_summary IS 'Résumé structuré de la conversation';
+COMMENT ON COLUMN conversation_analysis.service_interest IS 'Service CCI qui intéresse le client (extrait par IA)';
 COMMENT ON COLUMN conversation_analysis.is_completed IS 'Indique si la conversation s''est terminée avec un contact fourni';
+COMMENT ON TABLE conversation_themes IS 'Thèmes d''entretien MarIA abordés par conversation (extraits par IA, funnel des KPIs)';
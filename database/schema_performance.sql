@@ -0,0 +1,68 @@
+-- Index et structures de performance pour le dashboard
+-- À exécuter une fois sur la base (idempotent)
+-- public.message peut être partitionnée par mois (scripts/partition_messages.py) : les index
+-- créés sur la table partitionnée s'appliquent à toutes ses partitions
+
+-- Lecture fenêtrée des conversations : WHERE chatid = ... AND created_at < ... ORDER BY created_at
+CREATE INDEX IF NOT EXISTS idx_message_chatid_created_at ON public.message (chatid, created_at);
+
+-- Recherche plein texte : un document tsvector par conversation
+-- (noms et numéro en poids A, résumé IA en poids B, contenu des messages en poids C)
+CREATE TABLE IF NOT EXISTS conversation_search (
+    chatid UUID PRIMARY KEY,
+    document TSVECTOR NOT NULL,
+    last_activity TIMESTAMPTZ,          -- Dernier message indexé
+    analysis_updated TIMESTAMP          -- conversation_analysis.last_updated indexé
+);
+
+CREATE INDEX IF NOT EXISTS idx_conversation_search_document ON conversation_search USING GIN (document);
+CREATE INDEX IF NOT EXISTS idx_conversation_search_last_activity ON conversation_search (last_activity);
+CREATE INDEX IF NOT EXISTS idx_conversation_analysis_last_updated ON conversation_analysis (last_updated);
+CREATE INDEX IF NOT EXISTS idx_message_created_at ON public.message (created_at);
+
+-- Annuaire des numéros : recherche exacte par celular (réindexation plein texte)
+CREATE INDEX IF NOT EXISTS idx_whatsapp_numbers_celular ON public.whatsapp_numbers (celular);
+
+-- Activité par heure (UTC) : alimente la heatmap jour x heure sans relire public.message
+CREATE TABLE IF NOT EXISTS message_hourly_activity (
+    hour_start TIMESTAMPTZ PRIMARY KEY,
+    message_count INTEGER NOT NULL,
+    customer_messages INTEGER NOT NULL,
+    active_conversations INTEGER NOT NULL   -- Conversations distinctes ayant au moins un message dans l'heure
+);
+
+-- Cumul par contact : un numéro WhatsApp (chiffres de chat.value) peut avoir plusieurs conversations
+CREATE TABLE IF NOT EXISTS contact_rollup (
+    phone TEXT PRIMARY KEY,                 -- regexp_replace(chat.value, '\D', '', 'g')
+    first_seen TIMESTAMPTZ,
+    last_seen TIMESTAMPTZ,
+    chat_count INTEGER NOT NULL,
+    total_messages INTEGER NOT NULL,
+    latest_chatid UUID,
+    client_name VARCHAR(255),               -- Analyse de la conversation la plus récente analysée
+    company_name VARCHAR(255),
+    service_interest VARCHAR(255),
+    is_completed BOOLEAN,
+    latest_summary TEXT,
+    analysis_updated TIMESTAMP              -- Dernier conversation_analysis.last_updated du contact
+);
+
+CREATE INDEX IF NOT EXISTS idx_contact_rollup_last_seen ON contact_rollup (last_seen DESC);
+-- Recherche par préfixe de numéro (phone LIKE '573%') quelle que soit la collation de la base
+CREATE INDEX IF NOT EXISTS idx_contact_rollup_phone_prefix ON contact_rollup (phone text_pattern_ops);
+-- Les chats sans chiffre dans value ne forment pas un contact (ligne phone = '' des premières versions)
+DELETE FROM contact_rollup WHERE phone = '';
+CREATE INDEX IF NOT EXISTS idx_chat_value_digits ON public.chat (regexp_replace(value, '\D', '', 'g'));
+
+-- Journal des purges (scripts/purge_conversations.py) : sa génération fait partie de la version
+-- des données, les partiels des jours clos du dashboard sont oubliés après une purge
+CREATE TABLE IF NOT EXISTS data_purge_log (
+    generation BIGSERIAL PRIMARY KEY,
+    purged_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    conversations INTEGER NOT NULL
+);
+
+COMMENT ON TABLE conversation_search IS 'Index plein texte des conversations, maintenu par database/search.py';
+COMMENT ON TABLE message_hourly_activity IS 'Cumul horaire des messages, maintenu par database/activity.py';
+COMMENT ON TABLE contact_rollup IS 'Cumul des conversations par numéro WhatsApp, maintenu par database/contacts.py';
+COMMENT ON TABLE data_purge_log IS 'Une ligne par lot purgé, écrite par scripts/purge_conversations.py';
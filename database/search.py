@@ -0,0 +1,167 @@
+"""
+Recherche plein texte des conversations (PostgreSQL tsvector)
+"""
+import re
+import threading
+import time
+
+import pandas as pd
+
+from database.connection import execute_query
+from database.queries import add_display_names
+from database.cache import REFRESH_OVERLAP
+from config.settings import SEARCH_RESULTS_LIMIT, SEARCH_INDEX_REFRESH_SECONDS
+
+# Délimiteurs de surlignage renvoyés par ts_headline, remplacés par <mark> après échappement HTML
+HIGHLIGHT_START = "[[["
+HIGHLIGHT_STOP = "]]]"
+HEADLINE_OPTIONS = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+    "MaxFragments=2, MaxWords=18, MinWords=6, FragmentDelimiter=\" … \""
+)
+
+# Mise à jour incrémentale : seules les conversations ayant un nouveau message ou une
+# analyse modifiée depuis le dernier passage sont réindexées (repères stockés en base,
+# reculés de REFRESH_OVERLAP pour ne pas rater les lignes validées après coup)
+REFRESH_SEARCH_INDEX_QUERY = """
+WITH watermark AS (
+    SELECT COALESCE(MAX(last_activity), '-infinity') - %(overlap)s as last_activity,
+           COALESCE(MAX(analysis_updated), '-infinity') - %(overlap)s as analysis_updated
+    FROM conversation_search
+),
+targets AS (
+    SELECT m.chatid FROM public.message m, watermark wm WHERE m.created_at > wm.last_activity
+    UNION
+    SELECT ca.chatid FROM conversation_analysis ca, watermark wm WHERE ca.last_updated > wm.analysis_updated
+)
+INSERT INTO conversation_search (chatid, document, last_activity, analysis_updated)
+SELECT m.chatid,
+       setweight(to_tsvector('simple', CONCAT_WS(' ',
+           ca.client_name, ca.company_name, w.nombre, w.apellido, w.empresa,
+           c.value, RIGHT(c.value, 10))), 'A')
+       || setweight(to_tsvector('simple', COALESCE(ca.conversation_summary, '')), 'B')
+       || setweight(to_tsvector('simple', LEFT(COALESCE(STRING_AGG(m.content, ' '), ''), 500000)), 'C'),
+       MAX(m.created_at),
+       ca.last_updated
+FROM targets t
+JOIN public.message m ON m.chatid = t.chatid
+LEFT JOIN public.chat c ON c.chatid = m.chatid
+LEFT JOIN LATERAL (
+    SELECT nombre, apellido, empresa
+    FROM public.whatsapp_numbers
+    WHERE celular = '+' || c.value
+    LIMIT 1
+) w ON TRUE
+LEFT JOIN conversation_analysis ca ON ca.chatid = m.chatid
+GROUP BY m.chatid, c.value, w.nombre, w.apellido, w.empresa,
+         ca.client_name, ca.company_name, ca.conversation_summary, ca.last_updated
+ON CONFLICT (chatid) DO UPDATE SET
+    document = EXCLUDED.document,
+    last_activity = EXCLUDED.last_activity,
+    analysis_updated = EXCLUDED.analysis_updated
+"""
+
+_refresh_lock = threading.Lock()
+_last_refresh = 0.0
+_index_built = False
+
+
+def build_prefix_tsquery(search_text):
+    """
+    Transformer la saisie utilisateur en tsquery préfixe ('visa colomb' -> 'visa:* & colomb:*')
+    Un numéro de téléphone ('+57 310 850') est recherché comme un seul préfixe de chiffres
+    """
+    compact = re.sub(r"[\s+\-().]", "", search_text or "")
+    if compact.isdigit():
+        return f"{compact}:*"
+
+    tokens = re.findall(r"\w+", (search_text or "").lower())
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+def is_search_index_built():
+    """
+    Vrai si l'index contient au moins une conversation (construction initiale faite)
+    """
+    global _index_built
+
+    if not _index_built:
+        built_df = execute_query("SELECT EXISTS (SELECT 1 FROM conversation_search) as built")
+        _index_built = not built_df.empty and bool(built_df.iloc[0]['built'])
+    return _index_built
+
+
+def refresh_search_index(force=False, initial_build=True):
+    """
+    Réindexer les conversations modifiées depuis le dernier passage
+    Sans force, au plus une fois par SEARCH_INDEX_REFRESH_SECONDS dans le processus
+    Sans initial_build, ne fait rien tant que l'index est vide : la construction complète
+    revient au préchauffage ou à scripts/refresh_search_index.py, pas à une recherche
+    """
+    global _last_refresh
+
+    if not force and time.monotonic() - _last_refresh < SEARCH_INDEX_REFRESH_SECONDS:
+        return True
+    if not initial_build and not is_search_index_built():
+        return False
+
+    # Un seul rafraîchissement à la fois ; les autres sessions cherchent sur l'index existant
+    if not _refresh_lock.acquire(blocking=force):
+        return True
+    try:
+        result = execute_query(REFRESH_SEARCH_INDEX_QUERY, {'overlap': REFRESH_OVERLAP}, fetch=False)
+        if result:
+            _last_refresh = time.monotonic()
+        return bool(result)
+    finally:
+        _refresh_lock.release()
+
+
+def search_conversations(search_text, limit=SEARCH_RESULTS_LIMIT):
+    """
+    Rechercher les conversations correspondant à la saisie et retourner les meilleures
+    correspondances avec des extraits surlignés (résumé et dernier message correspondant)
+    """
+    tsquery = build_prefix_tsquery(search_text)
+    if not tsquery:
+        return pd.DataFrame()
+
+    refresh_search_index(initial_build=False)
+
+    query = f"""
+    WITH q AS (
+        SELECT to_tsquery('simple', %s) as query
+    ),
+    matches AS (
+        SELECT cs.chatid, cs.last_activity, ts_rank(cs.document, q.query) as rank
+        FROM conversation_search cs, q
+        WHERE cs.document @@ q.query
+        ORDER BY rank DESC, cs.last_activity DESC
+        LIMIT %s
+    )
+    SELECT mt.chatid::text as chatid,
+           mt.rank,
+           mt.last_activity,
+           COALESCE(c.value, 'Non disponible') as whatsapp_number,
+           NULLIF(ca.client_name, '') as client_name_ai,
+           NULLIF(ca.company_name, '') as company_name_ai,
+           ts_headline('simple', COALESCE(ca.conversation_summary, ''), q.query, '{HEADLINE_OPTIONS}') as summary_snippet,
+           (
+               SELECT ts_headline('simple', msg.content, q.query, '{HEADLINE_OPTIONS}')
+               FROM public.message msg
+               WHERE msg.chatid = mt.chatid
+                 AND to_tsvector('simple', COALESCE(msg.content, '')) @@ q.query
+               ORDER BY msg.created_at DESC
+               LIMIT 1
+           ) as message_snippet
+    FROM matches mt
+    CROSS JOIN q
+    LEFT JOIN public.chat c ON c.chatid = mt.chatid
+    LEFT JOIN conversation_analysis ca ON ca.chatid = mt.chatid
+    ORDER BY mt.rank DESC, mt.last_activity DESC
+    """
+    results_df = execute_query(query, (tsquery, limit))
+    if results_df.empty:
+        return results_df
+    # Même nom d'affichage que la liste des conversations (annuaire si l'IA n'a rien extrait)
+    return add_display_names(results_df)
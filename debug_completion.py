@@ -9,7 +9,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from database.connection import execute_query
-from utils.llm_analysis import analyze_conversation_completion
+from utils.llm_analysis import analyze_conversation_completion, configure_utf8_stdio
 
 def debug_short_complete_conversations(start_date=None, end_date=None):
     """
@@ -94,6 +94,7 @@ def debug_short_complete_conversations(start_date=None, end_date=None):
         print("   3. Ajouter une validation sur le nombre minimum de messages")
 
 if __name__ == "__main__":
+    configure_utf8_stdio()
     debug_short_complete_conversations()
 
 
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de contrôle du temps d'import de app.py (démarrage à froid du dashboard)
+Mesure avec `python -X importtime` et échoue (code 1) si le budget est dépassé
+ou si une dépendance lourde est importée au chargement de l'application
+
+Usage:
+    python scripts/check_import_time.py [--budget-ms N] [--runs N]
+
+Options:
+    --budget-ms N : Temps d'import maximal de app.py en millisecondes (défaut: 2500)
+    --runs N      : Nombre de mesures, la meilleure est retenue (défaut: 3)
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dépendances chargées à la première utilisation seulement (graphiques, IA, moteur SQL)
+# plotly.graph_objects n'est pas contrôlé : Streamlit l'importe lui-même pour son thème
+LAZY_MODULES = ('plotly.express', 'openai', 'sqlalchemy')
+
+# Budget par défaut du temps d'import de app.py (script et tests/test_import_time.py)
+DEFAULT_BUDGET_MS = 2500
+
+def measure_import(module_name):
+    """
+    Importer le module dans un nouvel interpréteur et retourner
+    (temps total en ms, ensemble des modules importés)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        raise RuntimeError(f"Échec de l'import de {module_name}")
+
+    total_us = 0
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imported.add(name.strip())
+        # Modules de premier niveau uniquement : leur temps cumulé inclut leurs dépendances
+        if not name[1:].startswith(' '):
+            total_us += int(cumulative)
+    return total_us / 1000, imported
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Controle du temps d\'import du dashboard')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help='Budget en millisecondes (defaut: 2500)')
+    parser.add_argument('--runs', type=int, default=3, help='Nombre de mesures (defaut: 3)')
+    args = parser.parse_args()
+
+    measures = [measure_import('app') for _ in range(max(args.runs, 1))]
+    best_ms, imported = min(measures, key=lambda measure: measure[0])
+
+    print(f">> Import de app.py : {best_ms:.0f} ms (budget {args.budget_ms:.0f} ms, meilleure de {len(measures)} mesure(s))")
+
+    failed = False
+    eager = [name for name in LAZY_MODULES if name in imported]
+    if eager:
+        print(f">> Modules importés au démarrage alors qu'ils doivent être chargés à la demande : {', '.join(eager)}")
+        failed = True
+    if best_ms > args.budget_ms:
+        print(">> Budget dépassé")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print(">> OK")
+
+if __name__ == "__main__":
+    main()
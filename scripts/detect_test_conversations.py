@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de détection des conversations de test ou en double (à relire avant suppression)
+
+Signale :
+- les conversations des numéros de test connus (TEST_PHONE_NUMBERS) et des numéros
+  internes CCI (contacts de CCI_SERVICES)
+- les groupes de conversations dont les messages clients sont quasi identiques
+  (signatures MinHash + LSH, un seul passage sur la table message)
+
+Le CSV produit (une ligne par conversation, colonne chatid) peut être relu puis passé
+à l'outil de suppression.
+
+Usage:
+    python scripts/detect_test_conversations.py [--threshold X] [--output FICHIER]
+
+Options:
+    --threshold X     : Similarité minimale entre conversations d'un groupe (défaut: 0.8)
+    --min-shingles N  : Ignorer les conversations avec moins de N suites de mots clients (défaut: 5)
+    --num-perm N      : Nombre de fonctions MinHash (défaut: 128)
+    --bands N         : Nombre de bandes LSH, diviseur de --num-perm (défaut: 16)
+    --output FICHIER  : Fichier CSV (défaut: EXPORT_DIR/test_conversation_candidates_<date>.csv)
+"""
+
+import os
+import sys
+import argparse
+import re
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+# Ajouter le répertoire parent au PATH pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import CCI_SERVICES, EXPORT_DIR, TEST_PHONE_NUMBERS
+from database.connection import get_database_connection
+from utils.minhash import MinHasher, text_shingles, find_similar_clusters
+
+# Messages lus par conversation, dans l'ordre de l'index (chatid, created_at)
+MESSAGES_QUERY = """
+SELECT m.chatid::text as chatid, m.role, m.content, m.created_at
+FROM public.message m
+ORDER BY m.chatid, m.created_at
+"""
+
+CHATS_QUERY = """
+SELECT chatid::text as chatid, value as whatsapp_number
+FROM public.chat
+"""
+
+def normalize_phone(number):
+    """
+    Garder les 10 derniers chiffres d'un numéro (indicatif pays et séparateurs ignorés)
+    """
+    digits = re.sub(r"\D", "", str(number or ""))
+    return digits[-10:]
+
+def stream_conversations(connection, chunk_size=5000):
+    """
+    Parcourir la table message avec un curseur serveur et produire, par conversation :
+    (chatid, nombre de messages, premier message, dernier message, texte des messages clients)
+    """
+    with connection.cursor(name=f"detect_{uuid.uuid4().hex}") as cursor:
+        cursor.itersize = chunk_size
+        cursor.execute(MESSAGES_QUERY)
+        current = None
+        for chatid, role, content, created_at in cursor:
+            if current is None or current[0] != chatid:
+                if current is not None:
+                    yield current[0], current[1], current[2], current[3], " ".join(current[4])
+                current = [chatid, 0, created_at, created_at, []]
+            current[1] += 1
+            current[3] = created_at
+            if role == 'customer' and content:
+                current[4].append(content)
+        if current is not None:
+            yield current[0], current[1], current[2], current[3], " ".join(current[4])
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Detection des conversations de test ou en double')
+    parser.add_argument('--threshold', type=float, default=0.8, help='Similarite minimale (defaut: 0.8)')
+    parser.add_argument('--min-shingles', type=int, default=5, help='Taille minimale du texte client (defaut: 5)')
+    parser.add_argument('--num-perm', type=int, default=128, help='Fonctions MinHash (defaut: 128)')
+    parser.add_argument('--bands', type=int, default=16, help='Bandes LSH (defaut: 16)')
+    parser.add_argument('--output', type=str, help='Fichier CSV de sortie')
+    args = parser.parse_args()
+
+    if args.num_perm % args.bands:
+        print(">> --num-perm doit etre un multiple de --bands")
+        sys.exit(1)
+
+    start_time = time.time()
+    engine = get_database_connection()
+    if engine is None:
+        print(">> Connexion a la base impossible")
+        sys.exit(1)
+
+    # Numéros connus : tests déclarés et contacts internes de la CCI
+    # (valeurs sans chiffres ignorées, par exemple "Variable selon ville")
+    known_numbers = {normalize_phone(number): 'numero_test' for number in TEST_PHONE_NUMBERS}
+    for contact in CCI_SERVICES.values():
+        known_numbers.setdefault(normalize_phone(contact['whatsapp']), 'numero_interne_cci')
+    known_numbers.pop('', None)
+
+    chats = pd.read_sql_query(CHATS_QUERY, engine)
+    phone_by_chat = dict(zip(chats['chatid'], chats['whatsapp_number']))
+
+    print(">> Calcul des signatures MinHash...")
+    hasher = MinHasher(num_perm=args.num_perm)
+    signatures = {}
+    details = {}
+    connection = engine.raw_connection()
+    try:
+        for chatid, message_count, first_at, last_at, customer_text in stream_conversations(connection):
+            details[chatid] = {
+                'message_count': message_count,
+                'first_message_at': first_at,
+                'last_message_at': last_at,
+                'sample': customer_text[:120]
+            }
+            shingles = text_shingles(customer_text)
+            if len(shingles) >= args.min_shingles:
+                signatures[chatid] = hasher.signature(shingles)
+        connection.rollback()
+    finally:
+        connection.close()
+    print(f">> {len(details)} conversation(s) lue(s), {len(signatures)} signature(s)")
+
+    candidates = []
+    for chatid, info in details.items():
+        phone = normalize_phone(phone_by_chat.get(chatid))
+        reason = known_numbers.get(phone) if phone else None
+        if reason:
+            candidates.append({'chatid': chatid, 'reason': reason, 'cluster_id': None,
+                               'cluster_size': None, 'similarity': None})
+
+    print(">> Recherche des groupes quasi identiques (LSH)...")
+    clusters = find_similar_clusters(signatures, bands=args.bands, threshold=args.threshold)
+    for cluster_id, (members, similarity) in enumerate(clusters, start=1):
+        for chatid in members:
+            candidates.append({'chatid': chatid, 'reason': 'quasi_doublon', 'cluster_id': cluster_id,
+                               'cluster_size': len(members), 'similarity': round(similarity, 3)})
+
+    candidates_df = pd.DataFrame(candidates, columns=['chatid', 'reason', 'cluster_id', 'cluster_size', 'similarity'])
+    if not candidates_df.empty:
+        candidates_df['whatsapp_number'] = candidates_df['chatid'].map(phone_by_chat)
+        info_df = pd.DataFrame.from_dict(details, orient='index')
+        candidates_df = candidates_df.join(info_df, on='chatid')
+        candidates_df = candidates_df.sort_values(['reason', 'cluster_id', 'first_message_at'])
+
+    output = args.output or os.path.join(
+        EXPORT_DIR, f"test_conversation_candidates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    candidates_df.to_csv(output, index=False, encoding='utf-8-sig')
+
+    print(f">> {len(clusters)} groupe(s) quasi identique(s), {candidates_df['chatid'].nunique() if not candidates_df.empty else 0} conversation(s) candidate(s)")
+    print(f">> Liste a relire : {output} ({time.time() - start_time:.1f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Évaluation hors ligne du classifieur de completion (à lancer avant un --force du batch)
+
+1. freeze : figer un échantillon (tirage reproductible par taille de conversation : moins de
+   COMPLETION_MIN_MESSAGES messages, jusqu'à 5, plus de 5) avec une étiquette proposée
+2. relire les étiquettes dans le fichier : mettre label à true / false et label_source à 'manual'
+3. run : exécuter une ou plusieurs variantes (règle, version de prompt, modèle) en parallèle ;
+   les réponses du modèle sont mises en cache sur disque, une réexécution ne coûte rien
+
+Étiquettes : l'étiquette proposée vient de conversation_analysis.is_completed, écrit jusqu'ici par
+un analyseur qui enregistrait la réponse INCOMPLETE comme complète. Elle est marquée
+label_source='unverified' et run refuse l'échantillon tant qu'une étiquette n'a pas été relue
+(--allow-unverified pour passer outre : les mesures ne sont alors qu'un accord avec ces étiquettes).
+Relancer freeze après reconcile_completion.py et un --force du batch donne de meilleures propositions.
+
+Usage:
+    python scripts/evaluate_completion.py freeze [--size N] [--days N] [--seed S] [--output FICHIER]
+    python scripts/evaluate_completion.py run [--variant V] [--model M] [--workers N] [--sample FICHIER]
+                                          [--allow-unverified]
+
+Options (run):
+    --variant V   : Variante à évaluer (répétable, défaut: toutes), voir COMPLETION_VARIANTS
+    --model M     : Modèle des variantes par prompt (défaut: gpt-4o-mini)
+    --workers N   : Appels parallèles (défaut: 8)
+    --allow-unverified : Évaluer même si des étiquettes n'ont pas été relues
+"""
+
+import os
+import sys
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# Ajouter le répertoire parent au PATH pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import COMPLETION_MIN_MESSAGES, EVALUATION_DIR, EXPORT_DIR
+from database.connection import get_database_connection
+from utils.completion_eval import (
+    COMPLETION_VARIANTS,
+    CachedChatProvider,
+    get_completion_classifier,
+    read_sample,
+    run_evaluation,
+    summarize_evaluation,
+    write_sample,
+)
+
+DEFAULT_SAMPLE = os.path.join(EVALUATION_DIR, 'completion_sample.jsonl')
+
+# Tirage reproductible par strate de taille (ordre md5(chatid || seed)) : les étiquettes stockées
+# n'étant pas fiables, elles ne servent pas à stratifier
+SAMPLE_QUERY = """
+WITH candidates AS (
+    SELECT ca.chatid,
+           ca.is_completed,
+           ROW_NUMBER() OVER (
+               PARTITION BY CASE WHEN ca.total_messages < %(min_messages)s THEN 0
+                                 WHEN ca.total_messages <= 5 THEN 1
+                                 ELSE 2 END
+               ORDER BY md5(ca.chatid::text || %(seed)s)
+           ) as rank
+    FROM conversation_analysis ca
+    WHERE ca.is_completed IS NOT NULL
+      AND ca.analysis_date >= %(since)s
+)
+SELECT chatid::text as chatid, is_completed
+FROM candidates
+WHERE rank <= %(per_stratum)s
+ORDER BY chatid
+"""
+
+MESSAGES_QUERY = """
+SELECT chatid::text as chatid, role, content
+FROM public.message
+WHERE chatid = ANY(%(chatids)s::uuid[])
+ORDER BY chatid, created_at
+"""
+
+
+def freeze_sample(engine, args):
+    """
+    Figer l'échantillon étiqueté dans un fichier JSON Lines
+    """
+    params = {
+        'seed': str(args.seed),
+        'since': datetime.now() - timedelta(days=args.days),
+        'per_stratum': args.size // 3,
+        'min_messages': COMPLETION_MIN_MESSAGES,
+    }
+    labels = pd.read_sql_query(SAMPLE_QUERY, engine, params=params)
+    if labels.empty:
+        print(">> Aucune conversation analysee sur la periode")
+        sys.exit(1)
+
+    messages = pd.read_sql_query(MESSAGES_QUERY, engine, params={'chatids': labels['chatid'].tolist()})
+    by_chat = {
+        chatid: group[['role', 'content']].to_dict('records')
+        for chatid, group in messages.groupby('chatid', sort=False)
+    }
+    conversations = [
+        {'chatid': row.chatid, 'label': bool(row.is_completed), 'label_source': 'unverified',
+         'messages': by_chat.get(row.chatid, [])}
+        for row in labels.itertuples(index=False)
+    ]
+    write_sample(args.output, conversations)
+
+    completes = sum(conversation['label'] for conversation in conversations)
+    print(f">> {len(conversations)} conversation(s) figee(s) ({completes} proposee(s) complete(s)) : {args.output}")
+    print(">> Relire chaque etiquette (label, puis label_source a 'manual') avant la commande run")
+
+
+def run_variants(args):
+    """
+    Évaluer les variantes demandées sur l'échantillon figé
+    """
+    if not os.path.exists(args.sample):
+        print(f">> Echantillon introuvable : {args.sample} (lancer d'abord la commande freeze)")
+        sys.exit(1)
+    conversations = read_sample(args.sample)
+    unverified = sum(conversation.get('label_source') == 'unverified' for conversation in conversations)
+    if unverified and not args.allow_unverified:
+        print(f">> {unverified} etiquette(s) non relue(s) (label_source='unverified') : relire l'echantillon")
+        print(">> ou ajouter --allow-unverified (accord avec les etiquettes stockees, pas une exactitude)")
+        sys.exit(1)
+    if unverified:
+        print(f">> Attention : {unverified} etiquette(s) non relue(s), mesures indicatives seulement")
+    provider = CachedChatProvider(os.path.join(EVALUATION_DIR, 'cache'))
+    print(f">> {len(conversations)} conversation(s) dans l'echantillon")
+
+    rows, disagreements = [], []
+    for variant in args.variant or list(COMPLETION_VARIANTS):
+        classifier = get_completion_classifier(variant, args.model)
+        start_time = time.time()
+        results = run_evaluation(conversations, classifier, provider, workers=args.workers)
+        summary = summarize_evaluation(results, args.model)
+        rows.append({'variant': classifier.name, **summary, 'duration': time.time() - start_time})
+
+        wrong = results[results['error'].notna() | (results['prediction'] != results['label'])]
+        disagreements.append(wrong.assign(variant=classifier.name))
+
+    report = pd.DataFrame(rows)
+    print(report[['variant', 'accuracy', 'precision', 'recall', 'false_positives', 'false_negatives',
+                  'errors', 'latency_p50', 'latency_p95', 'full_run_cost', 'billed_cost']]
+          .to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    path = os.path.join(EXPORT_DIR, f"completion_eval_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+    pd.concat(disagreements, ignore_index=True)[
+        ['variant', 'chatid', 'label', 'prediction', 'answer', 'message_count', 'error']
+    ].to_csv(path, index=False, encoding='utf-8-sig')
+    print(f">> Desaccords : {path}")
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Evaluation hors ligne du classifieur de completion')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    freeze = subparsers.add_parser('freeze', help='Figer un echantillon etiquete')
+    freeze.add_argument('--size', type=int, default=200, help='Taille de l\'echantillon (defaut: 200)')
+    freeze.add_argument('--days', type=int, default=90, help='Analyses des N derniers jours (defaut: 90)')
+    freeze.add_argument('--seed', type=int, default=42, help='Graine du tirage (defaut: 42)')
+    freeze.add_argument('--output', type=str, default=DEFAULT_SAMPLE, help='Fichier de l\'echantillon')
+
+    run = subparsers.add_parser('run', help='Evaluer des variantes sur l\'echantillon')
+    run.add_argument('--variant', action='append', choices=list(COMPLETION_VARIANTS),
+                     help='Variante a evaluer (repetable, defaut: toutes)')
+    run.add_argument('--model', type=str, default='gpt-4o-mini', help='Modele des variantes par prompt')
+    run.add_argument('--workers', type=int, default=8, help='Appels paralleles (defaut: 8)')
+    run.add_argument('--sample', type=str, default=DEFAULT_SAMPLE, help='Fichier de l\'echantillon')
+    run.add_argument('--allow-unverified', action='store_true', help='Evaluer meme avec des etiquettes non relues')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        run_variants(args)
+        return
+
+    engine = get_database_connection()
+    if engine is None:
+        print(">> Connexion a la base impossible")
+        sys.exit(1)
+    freeze_sample(engine, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script pour exporter les conversations d'une période vers un fichier compressé
+
+Usage:
+    python scripts/export_conversations.py --start 2025-08-01 --end 2025-09-01 [--kind transcripts] [--format parquet]
+
+Options:
+    --start / --end : Période à exporter (format AAAA-MM-JJ, jour de fin inclus)
+    --kind          : summary (une ligne par conversation) ou transcripts (une ligne par message)
+    --format        : csv.gz ou parquet
+    --output-dir    : Dossier de destination (défaut: EXPORT_DIR)
+"""
+
+import os
+import sys
+import argparse
+import time
+from datetime import datetime
+
+import psycopg2
+
+# Ajouter le répertoire parent au PATH pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import DATABASE_URL, EXPORT_DIR, EXPORT_CHUNK_SIZE
+from database.export import export_to_file, EXPORT_QUERIES, EXPORT_FORMATS
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Export des conversations par lots')
+    parser.add_argument('--start', required=True, type=lambda s: datetime.strptime(s, '%Y-%m-%d'), help='Date de debut (AAAA-MM-JJ)')
+    parser.add_argument('--end', required=True, type=lambda s: datetime.strptime(s, '%Y-%m-%d'), help='Date de fin (AAAA-MM-JJ)')
+    parser.add_argument('--kind', choices=list(EXPORT_QUERIES), default='summary', help='Contenu exporte')
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv.gz', help='Format du fichier')
+    parser.add_argument('--output-dir', default=EXPORT_DIR, help='Dossier de destination')
+    parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='Lignes lues par lot')
+    args = parser.parse_args()
+    
+    connection = psycopg2.connect(DATABASE_URL, client_encoding='UTF8')
+    start_time = time.time()
+    
+    def show_progress(row_count):
+        print(f"\r>> {row_count} lignes exportees", end="", flush=True)
+    
+    try:
+        path, row_count = export_to_file(
+            args.kind, args.format, args.start, args.end,
+            output_dir=args.output_dir,
+            chunk_size=args.chunk_size,
+            connection=connection,
+            progress_callback=show_progress
+        )
+    finally:
+        connection.close()
+    
+    print(f"\n>> Fichier genere: {path}")
+    print(f">> {row_count} lignes en {time.time() - start_time:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,18 @@
 # -*- coding: utf-8 -*-
 """
 Script autonome pour générer les analyses de conversations par batch
-Exécute l'extraction de résumés, entreprises et prénoms via IA
+Exécute l'extraction de résumés, entreprises, prénoms et thèmes MarIA abordés via IA
 Stocke les résultats directement en base PostgreSQL
 
 Usage:
     python generate_analysis_batch.py [--limit N] [--days N] [--force]
     
 Options:
-    --limit N    : Traiter maximum N conversations (défaut: 50)
-    --days N     : Analyser les conversations des N derniers jours (défaut: 7)
-    --force      : Forcer l'analyse même si déjà fait
-    --dry-run    : Simulation sans écriture en base
+    --limit N      : Traiter maximum N conversations (défaut: 50)
+    --days N       : Analyser les conversations des N derniers jours (défaut: 7)
+    --force        : Forcer l'analyse même si déjà fait
+    --themes-only  : Analyser seulement les thèmes des conversations déjà analysées qui n'en ont pas
+    --dry-run      : Simulation sans écriture en base
 """
 
 import os
@@ -52,7 +53,10 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 load_dotenv()
 
 from config.settings import DATABASE_URL, OPENAI_API_KEY
-from utils.llm_analysis import generate_conversation_summary
+from utils.llm_analysis import (
+    generate_conversation_summary, extract_themes_analysis, parse_themes_analysis,
+    build_last_message_completion_prompt, parse_completion_answer
+)
 
 class ConversationAnalyzer:
     """Classe principale pour analyser les conversations"""
@@ -72,6 +76,7 @@ class ConversationAnalyzer:
             'summaries_generated': 0,
             'companies_extracted': 0,
             'names_extracted': 0,
+            'themes_analyzed': 0,
             'errors': 0
         }
     
@@ -127,12 +132,28 @@ class ConversationAnalyzer:
             cursor.execute(query, params)
             return cursor.fetchall()
     
+    def get_conversations_missing_themes(self, days_back=7, limit=50):
+        """Récupérer les conversations déjà analysées dont les thèmes n'ont pas été stockés"""
+        start_date = datetime.now() - timedelta(days=days_back)
+        query = """
+        SELECT ca.chatid::text as chatid
+        FROM conversation_analysis ca
+        WHERE ca.conversation_end_date >= %s
+          AND NOT EXISTS (SELECT 1 FROM conversation_themes ct WHERE ct.chatid = ca.chatid)
+        ORDER BY ca.conversation_end_date DESC
+        LIMIT %s
+        """
+        
+        with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, (start_date, limit))
+            return cursor.fetchall()
+    
     def get_conversation_messages(self, chatid):
         """Récupérer les messages d'une conversation"""
         query = """
         SELECT content, role, created_at
         FROM public.message 
-        WHERE chatid::text = %s
+        WHERE chatid = %s::uuid
         ORDER BY created_at ASC
         """
         
@@ -294,6 +315,13 @@ Identifie le service principal (nom seulement):
             print(f">> Erreur analyse service: {e}")
             return "Information générale"
 
+    def analyze_themes(self, messages):
+        """Identifier les thèmes MarIA abordés : {numéro du thème: abordé}, None en cas d'échec"""
+        themes = parse_themes_analysis(extract_themes_analysis(pd.DataFrame(messages)))
+        if themes:
+            self.stats['themes_analyzed'] += 1
+        return themes
+    
     def analyze_completion(self, messages):
         """Analyser si la conversation est complète"""
         if not messages:
@@ -308,17 +336,7 @@ Identifie le service principal (nom seulement):
             last_message = last_message.encode('utf-8', errors='ignore').decode('utf-8')
         
         try:
-            prompt = f"""
-            Analyse ce message final d'une conversation avec l'agent MarIA de la CCI France Colombia.
-            
-            Message: "{last_message}"
-            
-            Détermine si cette conversation est COMPLÈTE selon ces critères:
-            1. Le message contient un numéro de téléphone WhatsApp (format +57 xxx xxx xxxx)
-            2. Le message indique une redirection vers un contact spécifique de l'équipe CCI
-            
-            Réponds uniquement par "COMPLETE" ou "INCOMPLETE".
-            """
+            prompt = build_last_message_completion_prompt(last_message)
             
             response = self.client.chat.completions.create(
                 model="gpt-4o-mini",
@@ -328,8 +346,7 @@ Identifie le service principal (nom seulement):
             )
             
             result = response.choices[0].message.content.strip()
-            is_complete = "COMPLETE" in result.upper()
-            return is_complete, result
+            return parse_completion_answer(result), result
             
         except Exception as e:
             print(f">> Erreur analyse completion: {e}")
@@ -375,6 +392,7 @@ Identifie le service principal (nom seulement):
                     analysis_data['is_completed'],
                     analysis_data['completion_analysis']
                 ))
+                self._save_themes(cursor, chatid, analysis_data.get('themes'))
                 self.connection.commit()
                 return True
                 
@@ -383,6 +401,36 @@ Identifie le service principal (nom seulement):
             self.connection.rollback()
             return False
     
+    def save_themes_to_db(self, chatid, themes):
+        """Sauvegarder seulement la couverture des thèmes (conversation déjà analysée)"""
+        if self.dry_run:
+            print(f"[DRY-RUN] Themes pour {chatid}: {themes}")
+            return True
+        
+        try:
+            with self.connection.cursor() as cursor:
+                self._save_themes(cursor, chatid, themes)
+                self.connection.commit()
+                return True
+        except Exception as e:
+            print(f">> Erreur sauvegarde themes: {e}")
+            self.connection.rollback()
+            return False
+    
+    @staticmethod
+    def _save_themes(cursor, chatid, themes):
+        """Remplacer les lignes de conversation_themes d'une conversation (même transaction)"""
+        if not themes:
+            return
+        cursor.executemany(
+            """
+            INSERT INTO conversation_themes (chatid, theme_index, covered)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (chatid, theme_index) DO UPDATE SET covered = EXCLUDED.covered
+            """,
+            [(chatid, theme_index, covered) for theme_index, covered in sorted(themes.items())]
+        )
+    
     def analyze_conversation(self, conversation):
         """Analyser une conversation complete"""
         chatid = conversation['chatid']
@@ -395,7 +443,7 @@ Identifie le service principal (nom seulement):
             return False
         
         # Extractions IA
-        print("  [1/5] Extraction du nom client...")
+        print("  [1/6] Extraction du nom client...")
         client_name = self.extract_client_name(messages)
         if client_name:
             self.stats['names_extracted'] += 1
@@ -403,7 +451,7 @@ Identifie le service principal (nom seulement):
         else:
             print("  >> Nom non trouve")
         
-        print("  [2/5] Extraction entreprise...")
+        print("  [2/6] Extraction entreprise...")
         company_name = self.extract_company_name(messages)
         if company_name:
             self.stats['companies_extracted'] += 1
@@ -411,7 +459,7 @@ Identifie le service principal (nom seulement):
         else:
             print("  >> Entreprise non trouvee")
         
-        print("  [3/5] Generation resume...")
+        print("  [3/6] Generation resume...")
         # Convertir les messages au format DataFrame pour la fonction importee
         messages_df = pd.DataFrame(messages)
         summary = generate_conversation_summary(messages_df)
@@ -421,16 +469,23 @@ Identifie le service principal (nom seulement):
         else:
             print("  >> Erreur generation resume")
         
-        print("  [4/5] Analyse service d'interet...")
+        print("  [4/6] Analyse service d'interet...")
         service_interest = self.analyze_service_interest(messages)
         if service_interest:
             print(f"  >> Service identifie: {service_interest}")
         else:
             print("  >> Service non identifie")
         
-        print("  [5/5] Analyse completion...")
+        print("  [5/6] Analyse completion...")
         is_completed, completion_analysis = self.analyze_completion(messages)
         
+        print("  [6/6] Analyse des themes MarIA...")
+        themes = self.analyze_themes(messages)
+        if themes:
+            print(f"  >> Themes abordes: {sum(themes.values())}/{len(themes)}")
+        else:
+            print("  >> Themes non analyses")
+        
         # Préparer les données pour sauvegarde
         analysis_data = {
             'client_name': client_name,
@@ -441,7 +496,8 @@ Identifie le service principal (nom seulement):
             'start_date': conversation['start_time'],
             'end_date': conversation['end_time'],
             'is_completed': is_completed,
-            'completion_analysis': completion_analysis
+            'completion_analysis': completion_analysis,
+            'themes': themes
         }
         
         # Sauvegarder en base
@@ -454,19 +510,48 @@ Identifie le service principal (nom seulement):
             self.stats['errors'] += 1
             return False
     
-    def run_batch_analysis(self, days_back=7, limit=50, force=False):
+    def analyze_conversation_themes(self, conversation):
+        """Analyser seulement les thèmes d'une conversation déjà analysée"""
+        chatid = conversation['chatid']
+        print(f"\n>> Analyse des themes {chatid}...")
+        
+        messages = self.get_conversation_messages(chatid)
+        if not messages:
+            print(f">> Aucun message trouve pour {chatid}")
+            return False
+        
+        themes = self.analyze_themes(messages)
+        if not themes:
+            print("  >> Themes non analyses")
+            self.stats['errors'] += 1
+            return False
+        
+        if self.save_themes_to_db(chatid, themes):
+            print(f"  >> Themes abordes: {sum(themes.values())}/{len(themes)}")
+            self.stats['processed'] += 1
+            return True
+        self.stats['errors'] += 1
+        return False
+    
+    def run_batch_analysis(self, days_back=7, limit=50, force=False, themes_only=False):
         """Executer l'analyse en batch"""
         print(f">> Demarrage analyse batch...")
         print(f">> Periode: {days_back} derniers jours")
         print(f">> Limite: {limit} conversations")
         print(f">> Force: {'Oui' if force else 'Non'}")
+        print(f">> Themes seulement: {'Oui' if themes_only else 'Non'}")
         print(f">> Mode: {'DRY-RUN' if self.dry_run else 'PRODUCTION'}")
         
         if not self.connect_db():
             return False
         
         # Recuperer les conversations a analyser
-        conversations = self.get_conversations_to_analyze(days_back, limit, force)
+        if themes_only:
+            conversations = self.get_conversations_missing_themes(days_back, limit)
+            analyze = self.analyze_conversation_themes
+        else:
+            conversations = self.get_conversations_to_analyze(days_back, limit, force)
+            analyze = self.analyze_conversation
         print(f"\n>> {len(conversations)} conversation(s) a analyser")
         
         if not conversations:
@@ -479,7 +564,7 @@ Identifie le service principal (nom seulement):
         for i, conversation in enumerate(conversations, 1):
             print(f"\n[{i}/{len(conversations)}]", end="")
             try:
-                self.analyze_conversation(conversation)
+                analyze(conversation)
                 # Pause pour éviter de surcharger l'API
                 time.sleep(1)
             except Exception as e:
@@ -496,6 +581,7 @@ Identifie le service principal (nom seulement):
         print(f">> Resumes generes: {self.stats['summaries_generated']}")
         print(f">> Entreprises extraites: {self.stats['companies_extracted']}")
         print(f">> Noms extraits: {self.stats['names_extracted']}")
+        print(f">> Themes analyses: {self.stats['themes_analyzed']}")
         print(f">> Erreurs: {self.stats['errors']}")
         
         if self.connection:
@@ -509,6 +595,7 @@ def main():
     parser.add_argument('--limit', type=int, default=50, help='Nombre max de conversations a traiter')
     parser.add_argument('--days', type=int, default=7, help='Analyser les N derniers jours')
     parser.add_argument('--force', action='store_true', help='Forcer l\'analyse et re-generer tous les resumes meme si deja fait')
+    parser.add_argument('--themes-only', action='store_true', help='Analyser seulement les themes des conversations deja analysees sans themes')
     parser.add_argument('--dry-run', action='store_true', help='Simulation sans ecriture en base')
     
     args = parser.parse_args()
@@ -520,7 +607,8 @@ def main():
     success = analyzer.run_batch_analysis(
         days_back=args.days,
         limit=args.limit,
-        force=args.force
+        force=args.force,
+        themes_only=args.themes_only
     )
     
     if success:
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de maintenance des partitions mensuelles de public.message (à planifier, par exemple
+chaque jour) : crée les partitions des MESSAGE_PARTITION_MONTHS_AHEAD prochains mois.
+Sans partition pour son mois, l'insertion d'un message échoue.
+
+Un mois ancien peut être détaché : la partition devient une table autonome (aucune réécriture),
+à archiver puis supprimer :
+    pg_dump "$DATABASE_URL" -t public.message_2025_01 | gzip > message_2025_01.sql.gz
+    DROP TABLE public.message_2025_01;
+Les cumuls dérivés (activité horaire, contacts, index de recherche) gardent ces messages jusqu'à
+leur prochaine reconstruction complète.
+
+Usage:
+    python scripts/maintain_message_partitions.py [--months-ahead N] [--detach-before AAAA-MM] [--list]
+
+Options:
+    --months-ahead N         : Mois à créer à l'avance (défaut: MESSAGE_PARTITION_MONTHS_AHEAD)
+    --detach-before AAAA-MM  : Détacher les partitions des mois antérieurs à AAAA-MM
+    --list                   : Afficher les partitions et leur nombre de lignes estimé
+"""
+
+import os
+import sys
+import argparse
+
+# Ajouter le répertoire parent au PATH pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import MESSAGE_PARTITION_MONTHS_AHEAD
+from database.connection import get_database_connection
+from database.partitions import add_months, ensure_partitions, is_partitioned, list_partitions, month_start, parse_month
+
+MESSAGE_TABLE = 'public.message'
+
+# Attente maximale du verrou de détachement : la commande échoue au lieu de bloquer le dashboard
+LOCK_TIMEOUT = '5s'
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Maintenance des partitions mensuelles de public.message')
+    parser.add_argument('--months-ahead', type=int, default=MESSAGE_PARTITION_MONTHS_AHEAD,
+                        help='Mois a creer a l\'avance')
+    parser.add_argument('--detach-before', type=str, help='Detacher les mois anterieurs (AAAA-MM)')
+    parser.add_argument('--list', action='store_true', help='Afficher les partitions')
+    args = parser.parse_args()
+    detach_before = parse_month(args.detach_before) if args.detach_before else None
+
+    engine = get_database_connection()
+    if engine is None:
+        print(">> Connexion a la base impossible")
+        sys.exit(1)
+
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            if not is_partitioned(cursor, MESSAGE_TABLE):
+                print(">> public.message n'est pas partitionnee (voir scripts/partition_messages.py)")
+                sys.exit(1)
+            cursor.execute("SELECT (NOW() AT TIME ZONE 'UTC')::date")
+            current_month = month_start(cursor.fetchone()[0])
+            created = ensure_partitions(cursor, MESSAGE_TABLE, current_month,
+                                        add_months(current_month, args.months_ahead))
+        connection.commit()
+        print(f">> {len(created)} partition(s) creee(s)" + (f" : {', '.join(created)}" if created else ""))
+
+        if detach_before:
+            with connection.cursor() as cursor:
+                old_partitions = [name for month, name, _ in list_partitions(cursor, MESSAGE_TABLE)
+                                  if month < detach_before]
+            connection.rollback()
+            for name in old_partitions:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+                    cursor.execute(f"ALTER TABLE {MESSAGE_TABLE} DETACH PARTITION public.{name}")
+                connection.commit()
+                print(f">> {name} detachee (table autonome a archiver puis supprimer)")
+
+        with connection.cursor() as cursor:
+            partitions = list_partitions(cursor, MESSAGE_TABLE)
+        connection.rollback()
+    except Exception as e:
+        connection.rollback()
+        print(f">> Erreur: {e}")
+        sys.exit(1)
+    finally:
+        connection.close()
+
+    if args.list:
+        for month, name, estimated_rows in partitions:
+            print(f"   {name}: ~{estimated_rows} message(s)")
+    if not partitions or partitions[-1][0] < add_months(current_month, 1):
+        print(">> Attention : aucune partition pour le mois prochain")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
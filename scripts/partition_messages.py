@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Migration de public.message vers une table partitionnée par mois (created_at, UTC)
+
+Étapes (chacune relançable) :
+1. prepare : créer public.message_partitioned (mêmes colonnes, valeurs par défaut, clés,
+   clés étrangères et droits) et ses partitions mensuelles
+2. copy    : copier les messages par lots de --batch-days jours (une transaction par lot, sans
+   bloquer l'application), puis créer les index secondaires ; reprend au dernier lot copié
+3. swap    : vérifier les mois déjà copiés (sans verrou), puis bloquer les écritures sur
+   public.message (les lectures continuent), copier les derniers messages, vérifier les mois
+   de cette dernière copie et échanger les noms ; l'ancienne table est gardée sous le nom
+   public.message_unpartitioned
+4. verify  : comparer mois par mois la table partitionnée et l'ancienne table (à lancer après swap)
+
+Les clés primaires et uniques incluent created_at (obligatoire sur une table partitionnée).
+Ne pas lancer purge_conversations.py pendant la migration. Après vérification :
+    DROP TABLE public.message_unpartitioned;
+puis planifier scripts/maintain_message_partitions.py (création des mois à venir).
+
+Usage:
+    python scripts/partition_messages.py prepare
+    python scripts/partition_messages.py copy [--from AAAA-MM] [--batch-days N]
+    python scripts/partition_messages.py swap [--lock-timeout 10s]
+    python scripts/partition_messages.py verify
+"""
+
+import os
+import sys
+import argparse
+import re
+import time
+from datetime import timedelta
+
+# Ajouter le répertoire parent au PATH pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import MESSAGE_PARTITION_MONTHS_AHEAD
+from database.connection import get_database_connection
+from database.partitions import (
+    add_months,
+    ensure_partitions,
+    is_partitioned,
+    month_start,
+    monthly_counts,
+    parse_month,
+)
+
+SOURCE_TABLE = 'public.message'
+TARGET_TABLE = 'public.message_partitioned'
+OLD_TABLE = 'public.message_unpartitioned'
+
+# Suffixes des noms de contraintes et d'index : nouvelle table avant l'échange, ancienne table après
+NEW_SUFFIX = '_p'
+OLD_SUFFIX = '_old'
+
+KEY_CONSTRAINTS_QUERY = """
+SELECT con.conname, con.contype,
+       ARRAY(SELECT a.attname::text
+             FROM unnest(con.conkey) WITH ORDINALITY k(attnum, ord)
+             JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+             ORDER BY k.ord) as columns
+FROM pg_constraint con
+WHERE con.conrelid = %s::regclass AND con.contype IN ('p', 'u')
+"""
+
+FOREIGN_KEYS_QUERY = """
+SELECT conname, pg_get_constraintdef(oid)
+FROM pg_constraint
+WHERE conrelid = %s::regclass AND contype = 'f'
+"""
+
+# Index hors contraintes (les index des clés primaires et uniques sont recréés avec la contrainte)
+SECONDARY_INDEXES_QUERY = """
+SELECT i.relname, pg_get_indexdef(i.oid)
+FROM pg_index x
+JOIN pg_class i ON i.oid = x.indexrelid
+WHERE x.indrelid = %s::regclass
+  AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conrelid = x.indrelid AND c.conindid = x.indexrelid)
+"""
+
+# Objets qui suivraient l'ancienne table après l'échange des noms : à traiter à la main avant la migration
+BLOCKERS_QUERY = """
+SELECT 'cle etrangere ' || conname || ' de ' || conrelid::regclass::text
+FROM pg_constraint
+WHERE confrelid = %(table)s::regclass AND contype = 'f'
+UNION ALL
+SELECT DISTINCT 'vue ' || r.ev_class::regclass::text
+FROM pg_depend d
+JOIN pg_rewrite r ON r.oid = d.objid
+WHERE d.refobjid = %(table)s::regclass AND r.ev_class <> d.refobjid
+UNION ALL
+SELECT 'declencheur ' || tgname
+FROM pg_trigger
+WHERE tgrelid = %(table)s::regclass AND NOT tgisinternal
+"""
+
+GRANTS_QUERY = """
+SELECT grantee, privilege_type
+FROM information_schema.role_table_grants
+WHERE table_schema = 'public' AND table_name = 'message'
+  AND grantee <> current_user
+"""
+
+SEQUENCE_COLUMNS_QUERY = """
+SELECT a.attname::text, a.attidentity <> '' as is_identity, pg_get_serial_sequence(%(table)s, a.attname)
+FROM pg_attribute a
+WHERE a.attrelid = %(table)s::regclass AND a.attnum > 0 AND NOT a.attisdropped
+  AND pg_get_serial_sequence(%(table)s, a.attname) IS NOT NULL
+"""
+
+
+def suffixed(name, suffix):
+    """
+    Nom suffixé, tronqué à la limite de 63 caractères de PostgreSQL
+    """
+    return name[:63 - len(suffix)] + suffix
+
+
+def quote_identifier(name):
+    """
+    Identifiant SQL entre guillemets (rôles des droits)
+    """
+    return 'PUBLIC' if name == 'PUBLIC' else '"' + name.replace('"', '""') + '"'
+
+
+def table_exists(cursor, table):
+    """
+    Vrai si la table existe
+    """
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+    return cursor.fetchone()[0]
+
+
+def fetch_value(cursor, query, params=None):
+    """
+    Première colonne de la première ligne d'une requête
+    """
+    cursor.execute(query, params)
+    return cursor.fetchone()[0]
+
+
+def fetch_all(cursor, query, params=None):
+    """
+    Toutes les lignes d'une requête
+    """
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+
+def prepare(cursor):
+    """
+    Créer la table partitionnée vide et ses partitions mensuelles
+    """
+    blockers = [row[0] for row in fetch_all(cursor, BLOCKERS_QUERY, {'table': SOURCE_TABLE})]
+    if blockers:
+        raise RuntimeError("objets dependant de public.message a traiter d'abord : " + ", ".join(blockers))
+    missing_dates = fetch_value(cursor, f"SELECT COUNT(*) FROM {SOURCE_TABLE} WHERE created_at IS NULL")
+    if missing_dates:
+        raise RuntimeError(f"{missing_dates} message(s) sans created_at : aucune partition ne peut les recevoir")
+
+    if not table_exists(cursor, TARGET_TABLE):
+        cursor.execute(f"""
+            CREATE TABLE {TARGET_TABLE} (
+                LIKE {SOURCE_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY
+                                    INCLUDING GENERATED INCLUDING STORAGE INCLUDING COMMENTS
+            ) PARTITION BY RANGE (created_at)
+        """)
+        for name, kind, columns in fetch_all(cursor, KEY_CONSTRAINTS_QUERY, (SOURCE_TABLE,)):
+            if 'created_at' not in columns:
+                print(f">> {name} : created_at ajoute a la cle ({', '.join(columns)})")
+                columns = columns + ['created_at']
+            constraint = 'PRIMARY KEY' if kind == 'p' else 'UNIQUE'
+            cursor.execute(f"ALTER TABLE {TARGET_TABLE} ADD CONSTRAINT {suffixed(name, NEW_SUFFIX)} "
+                           f"{constraint} ({', '.join(columns)})")
+        for name, definition in fetch_all(cursor, FOREIGN_KEYS_QUERY, (SOURCE_TABLE,)):
+            cursor.execute(f"ALTER TABLE {TARGET_TABLE} ADD CONSTRAINT {suffixed(name, NEW_SUFFIX)} {definition}")
+        for grantee, privilege in fetch_all(cursor, GRANTS_QUERY):
+            cursor.execute(f"GRANT {privilege} ON {TARGET_TABLE} TO {quote_identifier(grantee)}")
+        print(f">> Table {TARGET_TABLE} creee")
+
+    first_at, last_at = fetch_all(
+        cursor, f"SELECT MIN(created_at) AT TIME ZONE 'UTC', MAX(created_at) AT TIME ZONE 'UTC' FROM {SOURCE_TABLE}"
+    )[0]
+    current_month = month_start(fetch_value(cursor, "SELECT (NOW() AT TIME ZONE 'UTC')::date"))
+    first_month = month_start(first_at) if first_at else current_month
+    last_month = max(month_start(last_at) if last_at else current_month, current_month)
+    created = ensure_partitions(cursor, TARGET_TABLE, first_month,
+                                add_months(last_month, MESSAGE_PARTITION_MONTHS_AHEAD))
+    print(f">> {len(created)} partition(s) creee(s)")
+
+
+def copy_window(cursor, start, end=None):
+    """
+    Recopier les messages d'une fenêtre [start, end[ (idempotent : la fenêtre est vidée d'abord)
+    """
+    condition = "created_at >= %s" + (" AND created_at < %s" if end is not None else "")
+    params = (start, end) if end is not None else (start,)
+    cursor.execute(f"DELETE FROM {TARGET_TABLE} WHERE {condition}", params)
+    cursor.execute(f"INSERT INTO {TARGET_TABLE} SELECT * FROM {SOURCE_TABLE} WHERE {condition}", params)
+    return cursor.rowcount
+
+
+def ensure_source_partitions(cursor, since):
+    """
+    Partitions de tous les mois présents dans public.message depuis since (messages antidatés compris)
+    """
+    cursor.execute(f"""
+        SELECT DISTINCT DATE_TRUNC('month', created_at AT TIME ZONE 'UTC')::date
+        FROM {SOURCE_TABLE}
+        WHERE created_at >= %s
+    """, (since,))
+    months = [month_start(row[0]) for row in cursor.fetchall()]
+    created = []
+    for month in months:
+        created.extend(ensure_partitions(cursor, TARGET_TABLE, month, month))
+    return created
+
+
+def copy_messages(connection, from_month, batch_days):
+    """
+    Copier public.message par lots de batch_days jours jusqu'à l'heure courante, puis créer les index
+    """
+    with connection.cursor() as cursor:
+        if not table_exists(cursor, TARGET_TABLE):
+            raise RuntimeError(f"{TARGET_TABLE} absente : lancer d'abord la commande prepare")
+        if from_month:
+            start = fetch_value(cursor, "SELECT %s::timestamp AT TIME ZONE 'UTC'", (from_month,))
+        else:
+            # Reprise au début du jour (UTC) du dernier message copié, sinon au premier message
+            start = fetch_value(cursor, f"SELECT DATE_TRUNC('day', MAX(created_at), 'UTC') FROM {TARGET_TABLE}")
+            if start is None:
+                start = fetch_value(cursor, f"SELECT DATE_TRUNC('day', MIN(created_at), 'UTC') FROM {SOURCE_TABLE}")
+        end = fetch_value(cursor, "SELECT DATE_TRUNC('hour', NOW(), 'UTC')")
+        created = ensure_source_partitions(cursor, start) if start is not None else []
+    connection.commit()
+    if created:
+        print(f">> {len(created)} partition(s) ajoutee(s) : {', '.join(created)}")
+    if start is None:
+        print(">> public.message est vide")
+        return
+
+    copied = 0
+    while start < end:
+        window_end = min(start + timedelta(days=batch_days), end)
+        with connection.cursor() as cursor:
+            rows = copy_window(cursor, start, window_end)
+        connection.commit()
+        copied += rows
+        print(f">> {start:%Y-%m-%d %H:%M} -> {window_end:%Y-%m-%d %H:%M} : {rows} message(s)")
+        start = window_end
+    print(f">> {copied} message(s) copie(s) ; les suivants le seront par la commande swap")
+
+    # Index créés après le chargement (plus rapide que de les maintenir pendant la copie)
+    with connection.cursor() as cursor:
+        for name, definition in fetch_all(cursor, SECONDARY_INDEXES_QUERY, (SOURCE_TABLE,)):
+            match = re.match(r"^CREATE (UNIQUE )?INDEX \S+ ON (?:ONLY )?\S+ (USING .*)$", definition)
+            if match is None or (match.group(1) and 'created_at' not in match.group(2)):
+                print(f">> Index {name} non recree (unique sans created_at ou definition inattendue) : {definition}")
+                continue
+            cursor.execute(f"CREATE {match.group(1) or ''}INDEX IF NOT EXISTS {suffixed(name, NEW_SUFFIX)} "
+                           f"ON {TARGET_TABLE} {match.group(2)}")
+            print(f">> Index {suffixed(name, NEW_SUFFIX)} pret")
+        cursor.execute(f"ANALYZE {TARGET_TABLE}")
+    connection.commit()
+
+
+def compare_counts(cursor, table, reference, since=None):
+    """
+    Mois dont le nombre de lignes diffère entre table et reference : liste de (mois, lignes, attendu)
+    since : ne comparer que les mois à partir de cet horodatage (début de mois UTC)
+    """
+    counts, expected = monthly_counts(cursor, table, since), monthly_counts(cursor, reference, since)
+    return [
+        (month, counts.get(month, 0), expected.get(month, 0))
+        for month in sorted(set(counts) | set(expected), key=lambda month: (month is None, month))
+        if counts.get(month, 0) != expected.get(month, 0)
+    ]
+
+
+def print_differences(differences):
+    """
+    Afficher les mois dont le nombre de lignes diffère
+    """
+    for month, rows, expected in differences:
+        label = f"{month:%Y-%m}" if month else "sans created_at"
+        print(f"   {label}: {rows} ligne(s) dans la table partitionnee, {expected} attendue(s)")
+
+
+def swap_tables(cursor, lock_timeout):
+    """
+    Dernière copie, vérification et échange des noms, dans une seule transaction (écritures bloquées)
+    Sous le verrou, seuls les mois de la dernière copie sont comparés (les mois antérieurs l'ont été
+    avant le verrou) ; la comparaison complète reste la commande verify, après l'échange
+    """
+    cursor.execute(f"SET LOCAL lock_timeout = '{lock_timeout}'")
+    cursor.execute(f"LOCK TABLE {SOURCE_TABLE} IN EXCLUSIVE MODE")
+
+    start = fetch_value(cursor, f"SELECT DATE_TRUNC('hour', MAX(created_at), 'UTC') FROM {TARGET_TABLE}")
+    if start is None:
+        raise RuntimeError("table partitionnee vide : lancer d'abord la commande copy")
+    ensure_source_partitions(cursor, start)
+    print(f">> {copy_window(cursor, start)} message(s) copie(s) depuis {start:%Y-%m-%d %H:%M}")
+
+    tail_start = fetch_value(cursor, "SELECT DATE_TRUNC('month', %s::timestamptz, 'UTC')", (start,))
+    differences = compare_counts(cursor, TARGET_TABLE, SOURCE_TABLE, since=tail_start)
+    if differences:
+        print_differences(differences)
+        first = next((month for month, _, _ in differences if month), None)
+        hint = f" (relancer : copy --from {first:%Y-%m})" if first else ""
+        raise RuntimeError("nombre de messages different" + hint)
+
+    key_constraints = fetch_all(cursor, KEY_CONSTRAINTS_QUERY, (SOURCE_TABLE,))
+    foreign_keys = fetch_all(cursor, FOREIGN_KEYS_QUERY, (SOURCE_TABLE,))
+    indexes = fetch_all(cursor, SECONDARY_INDEXES_QUERY, (SOURCE_TABLE,))
+    sequences = fetch_all(cursor, SEQUENCE_COLUMNS_QUERY, {'table': SOURCE_TABLE})
+    constraint_names = [row[0] for row in key_constraints] + [row[0] for row in foreign_keys]
+
+    # Ancienne table : noms libérés pour la nouvelle
+    cursor.execute(f"ALTER TABLE {SOURCE_TABLE} RENAME TO {OLD_TABLE.split('.')[-1]}")
+    for name in constraint_names:
+        cursor.execute(f"ALTER TABLE {OLD_TABLE} RENAME CONSTRAINT {name} TO {suffixed(name, OLD_SUFFIX)}")
+    for name, _ in indexes:
+        cursor.execute(f"ALTER INDEX public.{name} RENAME TO {suffixed(name, OLD_SUFFIX)}")
+
+    cursor.execute(f"ALTER TABLE {TARGET_TABLE} RENAME TO {SOURCE_TABLE.split('.')[-1]}")
+    for name in constraint_names:
+        cursor.execute(f"ALTER TABLE {SOURCE_TABLE} RENAME CONSTRAINT {suffixed(name, NEW_SUFFIX)} TO {name}")
+    for name, _ in indexes:
+        cursor.execute(f"ALTER INDEX IF EXISTS public.{suffixed(name, NEW_SUFFIX)} RENAME TO {name}")
+
+    # Séquences : serial partagée (rattachée à la nouvelle table), identité (reprise à la dernière valeur)
+    for column, is_identity, sequence in sequences:
+        if is_identity:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, %s), (SELECT MAX({column}) FROM {OLD_TABLE}))",
+                (SOURCE_TABLE, column)
+            )
+        else:
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {SOURCE_TABLE}.{column}")
+
+    cursor.execute(f"COMMENT ON TABLE {SOURCE_TABLE} IS "
+                   "'Messages partitionnés par mois (created_at UTC), partitions créées par scripts/maintain_message_partitions.py'")
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Partitionnement mensuel de public.message')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('prepare', help='Creer la table partitionnee et ses partitions')
+    copy = subparsers.add_parser('copy', help='Copier les messages par lots')
+    copy.add_argument('--from', dest='from_month', type=str, help='Recopier a partir de ce mois (AAAA-MM)')
+    copy.add_argument('--batch-days', type=int, default=7, help='Jours copies par transaction (defaut: 7)')
+    swap = subparsers.add_parser('swap', help='Derniere copie, verification et echange des tables')
+    swap.add_argument('--lock-timeout', type=str, default='10s', help='Attente maximale du verrou (defaut: 10s)')
+    subparsers.add_parser('verify', help='Comparer les nombres de messages par mois')
+    args = parser.parse_args()
+    from_month = f"{parse_month(args.from_month):%Y-%m-%d}" if getattr(args, 'from_month', None) else None
+
+    start_time = time.time()
+    engine = get_database_connection()
+    if engine is None:
+        print(">> Connexion a la base impossible")
+        sys.exit(1)
+
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            partitioned = is_partitioned(cursor, SOURCE_TABLE)
+
+        if args.command == 'verify':
+            with connection.cursor() as cursor:
+                table, reference = (SOURCE_TABLE, OLD_TABLE) if partitioned else (TARGET_TABLE, SOURCE_TABLE)
+                if not table_exists(cursor, table) or not table_exists(cursor, reference):
+                    print(f">> Rien a comparer ({table} ou {reference} absente)")
+                    sys.exit(1)
+                differences = compare_counts(cursor, table, reference)
+            connection.rollback()
+            if differences:
+                print(f">> {len(differences)} mois different(s) entre {table} et {reference} :")
+                print_differences(differences)
+                sys.exit(1)
+            print(f">> {table} et {reference} identiques mois par mois ({time.time() - start_time:.1f}s)")
+            return
+
+        if partitioned:
+            print(">> public.message est deja partitionnee")
+            return
+
+        if args.command == 'copy':
+            copy_messages(connection, from_month, args.batch_days)
+        else:
+            with connection.cursor() as cursor:
+                if args.command == 'prepare':
+                    prepare(cursor)
+                else:
+                    # Vérification sans verrou d'abord : seuls les mois de la dernière copie peuvent différer
+                    copied_until = fetch_value(cursor, f"SELECT MAX(created_at) AT TIME ZONE 'UTC' FROM {TARGET_TABLE}")
+                    if copied_until is None:
+                        raise RuntimeError("table partitionnee vide : lancer d'abord la commande copy")
+                    differences = [
+                        row for row in compare_counts(cursor, TARGET_TABLE, SOURCE_TABLE)
+                        if row[0] is None or row[0] < month_start(copied_until)
+                    ]
+                    connection.rollback()
+                    if differences:
+                        print_differences(differences)
+                        raise RuntimeError(f"copie incomplete : relancer copy --from {differences[0][0] or copied_until:%Y-%m}")
+                    swap_tables(cursor, args.lock_timeout)
+            connection.commit()
+    except Exception as e:
+        connection.rollback()
+        print(f">> Erreur, transaction en cours annulee: {e}")
+        sys.exit(1)
+    finally:
+        connection.close()
+
+    print(f">> Etape {args.command} terminee en {time.time() - start_time:.1f}s")
+    if args.command == 'swap':
+        print(f">> public.message est partitionnee ; ancienne table conservee : {OLD_TABLE}")
+        print(">> Verifier (commande verify), puis planifier scripts/maintain_message_partitions.py")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de suppression définitive de conversations (remplace execute_deletion.py)
+
+Pour chaque lot de conversations, dans une transaction courte :
+- sauvegarde compressée (COPY ... TO STDOUT, gzip) des lignes de chaque table concernée,
+  écrite et synchronisée sur disque avant la validation du lot (fichier .tmp renommé après)
+- suppression dans toutes les tables liées (thèmes, historique et analyses IA, index de
+  recherche, messages, chat), avec le nombre exact de lignes supprimées par table
+- recalcul des cumuls dérivés touchés (contacts, activité horaire)
+- une ligne dans data_purge_log : le dashboard recalcule ses KPIs journaliers des jours clos
+
+Les lots bornés évitent de verrouiller la table message pendant des minutes.
+Sans --execute, le script affiche seulement les lignes concernées (aucune écriture).
+Une sauvegarde par table et par lot (<table>.<lot>.csv.gz). Un fichier .tmp restant après un arrêt
+brutal appartient au dernier lot : il est complet si ce lot a été validé (vérifier en base).
+Restauration d'une table depuis la sauvegarde (tables parentes d'abord : chat, message...) :
+    for f in message.*.csv.gz; do gunzip -c "$f" | psql "$DATABASE_URL" -c "\\copy public.message FROM STDIN WITH CSV HEADER"; done
+
+Usage:
+    python scripts/purge_conversations.py --file FICHIER [--reason R] [--execute]
+    python scripts/purge_conversations.py --query "SELECT chatid FROM ..." [--execute]
+
+Options:
+    --file FICHIER    : CSV avec une colonne chatid (liste du détecteur de conversations de test)
+                        ou fichier texte avec un chatid par ligne
+    --reason R        : Ne garder que les lignes du CSV dont la colonne reason vaut R (répétable)
+    --query SQL       : Requête de sélection retournant une colonne chatid
+    --chatid ID       : chatid à supprimer (répétable)
+    --chunk-size N    : Conversations par transaction (défaut: 200)
+    --backup-dir DIR  : Dossier des sauvegardes (défaut: EXPORT_DIR/purge_backups)
+    --execute         : Effectuer réellement la sauvegarde et la suppression
+"""
+
+import os
+import sys
+import argparse
+import gzip
+import io
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+
+# Ajouter le répertoire parent au PATH pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import EXPORT_DIR, DATA_VERSION_TTL_SECONDS
+from database.connection import get_database_connection
+from database.contacts import PHONE_EXPRESSION, DELETE_CONTACTS_QUERY, REBUILD_CONTACTS_QUERY
+from database.activity import DELETE_HOURLY_ACTIVITY_QUERY, REBUILD_HOURLY_ACTIVITY_QUERY
+
+# Tables liées à une conversation, dans l'ordre de suppression (tables enfants d'abord)
+PURGE_TABLES = [
+    'conversation_themes',
+    'analysis_history',
+    'conversation_analysis',
+    'conversation_search',
+    'public.message',
+    'public.chat',
+]
+
+# Journal des purges (database/schema_performance.sql) : une ligne par lot, dans sa transaction ;
+# le dashboard voit la nouvelle génération et oublie ses partiels journaliers
+PURGE_LOG_TABLE = 'data_purge_log'
+PURGE_LOG_QUERY = "INSERT INTO data_purge_log (conversations) VALUES (%s)"
+
+# Attente maximale d'un verrou : un lot bloqué échoue au lieu de faire attendre les autres requêtes
+LOCK_TIMEOUT = '5s'
+
+
+def read_chatids_file(path, reasons=None):
+    """
+    Lire les chatids d'un CSV (colonne chatid, filtrée par reason si demandé) ou d'un fichier texte
+    """
+    with open(path, encoding='utf-8-sig') as file:
+        first_line = file.readline()
+    if 'chatid' in first_line.split(','):
+        frame = pd.read_csv(path, encoding='utf-8-sig', dtype=str)
+        if reasons:
+            frame = frame[frame['reason'].isin(reasons)]
+        return frame['chatid'].dropna().tolist()
+    with open(path, encoding='utf-8-sig') as file:
+        return [line.strip() for line in file if line.strip() and not line.startswith('#')]
+
+
+def normalize_chatids(chatids):
+    """
+    Valider les chatids (UUID) et retirer les doublons en gardant l'ordre ; retourne (valides, invalides)
+    """
+    valid, invalid = [], []
+    for chatid in chatids:
+        try:
+            valid.append(str(uuid.UUID(str(chatid).strip())))
+        except ValueError:
+            invalid.append(chatid)
+    return list(dict.fromkeys(valid)), invalid
+
+
+def existing_tables(cursor):
+    """
+    Tables de PURGE_TABLES présentes dans la base (analysis_history est optionnelle)
+    """
+    tables = []
+    for table in PURGE_TABLES:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+        if cursor.fetchone()[0]:
+            tables.append(table)
+    return tables
+
+
+def count_rows(cursor, tables, chatids):
+    """
+    Nombre exact de lignes par table pour les chatids (simulation)
+    """
+    counts = {}
+    for table in tables:
+        cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE chatid = ANY(%s::uuid[])", (chatids,))
+        counts[table] = cursor.fetchone()[0]
+    return counts
+
+
+def backup_paths(backup_dir, tables, index):
+    """
+    Fichiers de sauvegarde d'un lot : {table: chemin final} (écrits d'abord en .tmp)
+    """
+    return {table: os.path.join(backup_dir, f"{table.split('.')[-1]}.{index:05d}.csv.gz") for table in tables}
+
+
+def purge_chunk(cursor, tables, chatids, paths):
+    """
+    Sauvegarder puis supprimer les lignes d'un lot de conversations (transaction en cours)
+    Chaque table est copiée dans paths[table] + '.tmp', synchronisé sur disque avant la suppression :
+    une fois le lot validé, aucune ligne supprimée n'existe seulement en mémoire
+    Retourne {table: lignes supprimées}
+    """
+    cursor.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+
+    # Verrouiller les conversations du lot (bloque l'ajout de messages si message référence chat)
+    if 'public.chat' in tables:
+        cursor.execute("SELECT chatid FROM public.chat WHERE chatid = ANY(%s::uuid[]) FOR UPDATE", (chatids,))
+
+    # Cumuls dérivés à recalculer après la suppression
+    cursor.execute(
+        f"SELECT DISTINCT {PHONE_EXPRESSION} FROM public.chat c WHERE c.chatid = ANY(%s::uuid[]) AND c.value IS NOT NULL",
+        (chatids,)
+    )
+    phones = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT DISTINCT DATE_TRUNC('hour', created_at, 'UTC') FROM public.message WHERE chatid = ANY(%s::uuid[])",
+        (chatids,)
+    )
+    hours = [row[0] for row in cursor.fetchall()]
+
+    deleted = {}
+    for table in tables:
+        select_query = cursor.mogrify(f"SELECT * FROM {table} WHERE chatid = ANY(%s::uuid[])", (chatids,)).decode('utf-8')
+        with open(paths[table] + '.tmp', 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as compressed, \
+                    io.TextIOWrapper(compressed, encoding='utf-8') as text:
+                cursor.copy_expert(f"COPY ({select_query}) TO STDOUT WITH CSV HEADER", text)
+                backed_up = cursor.rowcount
+            raw.flush()
+            os.fsync(raw.fileno())
+
+        cursor.execute(f"DELETE FROM {table} WHERE chatid = ANY(%s::uuid[])", (chatids,))
+        deleted[table] = cursor.rowcount
+        # rowcount du COPY : -1 si le pilote ne le fournit pas
+        if backed_up >= 0 and backed_up != deleted[table]:
+            raise RuntimeError(f"{table}: {backed_up} ligne(s) sauvegardée(s) mais {deleted[table]} supprimée(s)")
+
+    if phones:
+        cursor.execute(DELETE_CONTACTS_QUERY, (phones,))
+        cursor.execute(REBUILD_CONTACTS_QUERY, (phones,))
+    if hours:
+        cursor.execute(DELETE_HOURLY_ACTIVITY_QUERY, (hours,))
+        cursor.execute(REBUILD_HOURLY_ACTIVITY_QUERY, (hours,))
+    return deleted
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Suppression definitive de conversations par lots')
+    parser.add_argument('--file', type=str, help='CSV (colonne chatid) ou fichier texte de chatids')
+    parser.add_argument('--reason', action='append', help='Filtrer le CSV sur la colonne reason (repetable)')
+    parser.add_argument('--query', type=str, help='Requete retournant une colonne chatid')
+    parser.add_argument('--chatid', action='append', default=[], help='chatid a supprimer (repetable)')
+    parser.add_argument('--chunk-size', type=int, default=200, help='Conversations par transaction (defaut: 200)')
+    parser.add_argument('--backup-dir', type=str, default=os.path.join(EXPORT_DIR, 'purge_backups'),
+                        help='Dossier des sauvegardes')
+    parser.add_argument('--execute', action='store_true', help='Effectuer la suppression (sinon simulation)')
+    args = parser.parse_args()
+
+    start_time = time.time()
+    engine = get_database_connection()
+    if engine is None:
+        print(">> Connexion a la base impossible")
+        sys.exit(1)
+
+    chatids = list(args.chatid)
+    if args.file:
+        chatids.extend(read_chatids_file(args.file, args.reason))
+    if args.query:
+        chatids.extend(pd.read_sql_query(args.query, engine)['chatid'].astype(str).tolist())
+    chatids, invalid = normalize_chatids(chatids)
+    if invalid:
+        print(f">> {len(invalid)} identifiant(s) invalide(s) ignore(s): {', '.join(map(str, invalid[:5]))}")
+    if not chatids:
+        print(">> Aucune conversation a supprimer (utiliser --file, --query ou --chatid)")
+        sys.exit(1)
+
+    chunks = [chatids[start:start + args.chunk_size] for start in range(0, len(chatids), args.chunk_size)]
+    print(f">> {len(chatids)} conversation(s), {len(chunks)} lot(s) de {args.chunk_size} maximum")
+
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            tables = existing_tables(cursor)
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (PURGE_LOG_TABLE,))
+            log_purges = cursor.fetchone()[0]
+            if not args.execute:
+                counts = Counter()
+                for chunk in chunks:
+                    counts.update(count_rows(cursor, tables, chunk))
+        connection.rollback()
+
+        if not args.execute:
+            print(">> SIMULATION (aucune suppression, ajouter --execute) - lignes concernees :")
+            for table in tables:
+                print(f"   {table}: {counts[table]}")
+            return
+
+        backup_dir = os.path.join(args.backup_dir, f"purge_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        os.makedirs(backup_dir, exist_ok=True)
+        with open(os.path.join(backup_dir, 'chatids.txt'), 'w', encoding='utf-8') as file:
+            file.write("\n".join(chatids) + "\n")
+
+        totals = Counter()
+        purged = 0
+        for index, chunk in enumerate(chunks, 1):
+            paths = backup_paths(backup_dir, tables, index)
+            committing = False
+            try:
+                with connection.cursor() as cursor:
+                    deleted = purge_chunk(cursor, tables, chunk, paths)
+                    if log_purges:
+                        cursor.execute(PURGE_LOG_QUERY, (len(chunk),))
+                committing = True
+                connection.commit()
+            except Exception as e:
+                connection.rollback()
+                # Lot annulé avant la validation : ses sauvegardes ne correspondent à aucune suppression
+                # (échec pendant la validation : issue inconnue, les fichiers .tmp sont gardés)
+                for path in paths.values():
+                    if not committing and os.path.exists(path + '.tmp'):
+                        os.remove(path + '.tmp')
+                print(f">> Lot {index}/{len(chunks)} annule: {e}")
+                print(">> Arret : les lots precedents sont supprimes, les suivants non")
+                break
+
+            for path in paths.values():
+                os.replace(path + '.tmp', path)
+            totals.update(deleted)
+            purged += len(chunk)
+            print(f">> Lot {index}/{len(chunks)}: {deleted.get('public.message', 0)} message(s) supprime(s)")
+    finally:
+        connection.close()
+
+    print(f">> {purged}/{len(chatids)} conversation(s) traitee(s) en {time.time() - start_time:.1f}s - lignes supprimees :")
+    for table in tables:
+        print(f"   {table}: {totals[table]}")
+    print(f">> Sauvegarde : {backup_dir}")
+    if log_purges:
+        print(f">> KPIs journaliers du dashboard a jour sous {DATA_VERSION_TTL_SECONDS} s ;")
+    else:
+        print(f">> Table {PURGE_LOG_TABLE} absente (database/schema_performance.sql) : redemarrer le dashboard")
+        print(">> pour recalculer les KPIs journaliers ;")
+    print(">> reconstruire l'index semantique : python scripts/refresh_embedding_index.py --full")
+    if purged < len(chatids):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de réconciliation des analyses IA avec les messages (remplace fix_completion_*.py)
+
+Le nombre de messages par conversation est calculé une seule fois (agrégat groupé sur
+public.message), puis toutes les règles de cohérence sont appliquées en un seul
+UPDATE ... FROM. Seules les lignes incohérentes sont modifiées.
+
+Règles (RECONCILIATION_RULES) :
+- short_completed : moins de COMPLETION_MIN_MESSAGES messages mais marquée complète -> incomplète
+- message_count   : total_messages différent du nombre réel de messages -> corrigé
+
+Usage:
+    python scripts/reconcile_completion.py [--dry-run] [--rule R]
+
+Options:
+    --dry-run   : Afficher les corrections prévues (résumé par règle et exemples) sans écrire
+    --rule R    : N'appliquer que la règle R (répétable, défaut: toutes)
+"""
+
+import os
+import sys
+import argparse
+import time
+
+import pandas as pd
+
+# Ajouter le répertoire parent au PATH pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import COMPLETION_MIN_MESSAGES
+from database.connection import get_database_connection
+
+# Règles de cohérence : condition d'incohérence (colonnes de la CTE checks) et correction
+# (colonne de conversation_analysis -> nouvelle valeur) appliquée quand la condition est vraie
+RECONCILIATION_RULES = {
+    'short_completed': {
+        'label': f"Moins de {COMPLETION_MIN_MESSAGES} messages mais complète -> incomplète",
+        'condition': "ca.is_completed AND COALESCE(s.message_count, 0) < %(min_messages)s",
+        'updates': {'is_completed': "false", 'analysis_date': "NOW()"},
+    },
+    'message_count': {
+        'label': "total_messages différent du nombre réel de messages",
+        'condition': "ca.total_messages IS DISTINCT FROM COALESCE(s.message_count, 0)",
+        'updates': {'total_messages': "checks.message_count"},
+    },
+}
+
+# Nombre de messages calculé une fois pour les conversations analysées (agrégat groupé)
+CHECKS_QUERY = """
+WITH message_stats AS (
+    SELECT m.chatid, COUNT(*) as message_count
+    FROM public.message m
+    WHERE m.chatid IN (SELECT chatid FROM conversation_analysis)
+    GROUP BY m.chatid
+),
+checks AS (
+    SELECT ca.chatid,
+           ca.is_completed,
+           ca.total_messages,
+           COALESCE(s.message_count, 0) as message_count,
+           {flags}
+    FROM conversation_analysis ca
+    LEFT JOIN message_stats s ON s.chatid = ca.chatid
+)
+"""
+
+
+def build_checks_query(rules):
+    """
+    CTE checks : une colonne booléenne par règle (fix_<règle>)
+    """
+    flags = ",\n           ".join(f"COALESCE({RECONCILIATION_RULES[rule]['condition']}, false) as fix_{rule}" for rule in rules)
+    return CHECKS_QUERY.format(flags=flags)
+
+
+def build_dry_run_query(rules):
+    """
+    Lignes incohérentes avec les valeurs actuelles et les drapeaux de chaque règle
+    """
+    any_flag = " OR ".join(f"checks.fix_{rule}" for rule in rules)
+    return build_checks_query(rules) + f"""
+SELECT checks.chatid::text as chatid, checks.is_completed, checks.total_messages, checks.message_count,
+       {", ".join(f"checks.fix_{rule}" for rule in rules)}
+FROM checks
+WHERE {any_flag}
+ORDER BY checks.chatid
+"""
+
+
+def build_update_query(rules):
+    """
+    Un seul UPDATE ... FROM : chaque colonne n'est modifiée que si sa règle est en défaut
+    """
+    columns = {}
+    for rule in rules:
+        for column, value in RECONCILIATION_RULES[rule]['updates'].items():
+            columns.setdefault(column, []).append((rule, value))
+    assignments = ",\n    ".join(
+        f"{column} = CASE {' '.join(f'WHEN checks.fix_{rule} THEN {value}' for rule, value in cases)} ELSE ca.{column} END"
+        for column, cases in columns.items()
+    )
+    any_flag = " OR ".join(f"checks.fix_{rule}" for rule in rules)
+    return build_checks_query(rules) + f"""
+UPDATE conversation_analysis ca SET
+    {assignments}
+FROM checks
+WHERE ca.chatid = checks.chatid AND ({any_flag})
+RETURNING {", ".join(f"checks.fix_{rule}" for rule in rules)}
+"""
+
+
+def print_completion_totals(cursor, title):
+    """
+    Afficher la répartition complètes / incomplètes des analyses
+    """
+    cursor.execute("""
+        SELECT COUNT(*) as total,
+               COUNT(CASE WHEN is_completed THEN 1 END) as completes
+        FROM conversation_analysis
+    """)
+    total, completes = cursor.fetchone()
+    print(f">> {title}: {total} analyse(s), {completes} complete(s), {total - completes} incomplete(s) ou non jugee(s)")
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Reconciliation des analyses IA avec les messages')
+    parser.add_argument('--dry-run', action='store_true', help='Afficher les corrections sans ecrire')
+    parser.add_argument('--rule', action='append', choices=list(RECONCILIATION_RULES),
+                        help='Regle a appliquer (repetable, defaut: toutes)')
+    args = parser.parse_args()
+    rules = args.rule or list(RECONCILIATION_RULES)
+    params = {'min_messages': COMPLETION_MIN_MESSAGES}
+
+    start_time = time.time()
+    engine = get_database_connection()
+    if engine is None:
+        print(">> Connexion a la base impossible")
+        sys.exit(1)
+
+    if args.dry_run:
+        diff = pd.read_sql_query(build_dry_run_query(rules), engine, params=params)
+        print(f">> SIMULATION : {len(diff)} analyse(s) a corriger ({time.time() - start_time:.1f}s)")
+        for rule in rules:
+            print(f"   {rule} ({RECONCILIATION_RULES[rule]['label']}): {int(diff[f'fix_{rule}'].sum())}")
+        if not diff.empty:
+            print(">> Exemples :")
+            print(diff.head(10).to_string(index=False))
+        return
+
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            print_completion_totals(cursor, "Avant")
+            cursor.execute(build_update_query(rules), params)
+            flags = pd.DataFrame(cursor.fetchall(), columns=[f"fix_{rule}" for rule in rules])
+            print_completion_totals(cursor, "Apres")
+        connection.commit()
+    except Exception as e:
+        connection.rollback()
+        print(f">> Erreur, aucune modification: {e}")
+        sys.exit(1)
+    finally:
+        connection.close()
+
+    print(f">> {len(flags)} analyse(s) corrigee(s) en {time.time() - start_time:.1f}s")
+    for rule in rules:
+        print(f"   {rule} ({RECONCILIATION_RULES[rule]['label']}): {int(flags[f'fix_{rule}'].sum())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script pour (re)construire le cumul par contact (numéro WhatsApp normalisé)
+
+Usage:
+    python scripts/refresh_contact_rollup.py [--full]
+
+Options:
+    --full   : Vider le cumul et recalculer tous les contacts
+               (sinon seuls les contacts actifs depuis le dernier passage)
+"""
+
+import os
+import sys
+import argparse
+import time
+
+# Ajouter le répertoire parent au PATH pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import execute_query
+from database.contacts import refresh_contact_rollup
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Mise a jour du cumul par contact')
+    parser.add_argument('--full', action='store_true', help='Reconstruire entierement le cumul')
+    args = parser.parse_args()
+    
+    start_time = time.time()
+    
+    if args.full:
+        print(">> Vidage du cumul par contact...")
+        if not execute_query("TRUNCATE contact_rollup", fetch=False):
+            print(">> Erreur lors du vidage du cumul")
+            sys.exit(1)
+    
+    print(">> Cumul des contacts actifs...")
+    if not refresh_contact_rollup(force=True):
+        print(">> Erreur lors du cumul (voir les logs)")
+        sys.exit(1)
+    
+    count_df = execute_query("SELECT COUNT(*) as total FROM contact_rollup")
+    total = int(count_df.iloc[0]['total']) if not count_df.empty else 0
+    print(f">> Cumul a jour : {total} contact(s) en {time.time() - start_time:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script pour (re)construire l'index d'embeddings des résumés de conversations
+
+Usage:
+    python scripts/refresh_embedding_index.py [--full] [--query TEXTE]
+
+Options:
+    --full         : Reconstruire l'index (sinon seuls les résumés modifiés depuis le dernier passage)
+    --query TEXTE  : Afficher ensuite les conversations les plus proches de TEXTE
+"""
+
+import os
+import sys
+import argparse
+import time
+
+# Ajouter le répertoire parent au PATH pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.embedding_index import get_embedding_index
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Mise a jour de l\'index d\'embeddings des resumes')
+    parser.add_argument('--full', action='store_true', help='Reconstruire entierement l\'index')
+    parser.add_argument('--query', type=str, help='Recherche de test apres la mise a jour')
+    parser.add_argument('--k', type=int, default=10, help='Nombre de resultats pour --query (defaut: 10)')
+    args = parser.parse_args()
+    
+    start_time = time.time()
+    index = get_embedding_index()
+    
+    print(f">> Indexation des resumes (fournisseur : {index.provider.name})...")
+    indexed = index.update(full=args.full)
+    if indexed is None:
+        print(">> Erreur lors de la lecture des resumes (voir les logs)")
+        sys.exit(1)
+    print(f">> {indexed} resume(s) indexe(s) en {time.time() - start_time:.1f}s")
+    
+    if args.query:
+        results = index.search(args.query, args.k)
+        print(f">> Resultats pour '{args.query}' :")
+        for result in results.itertuples(index=False):
+            print(f"   {result.score:.3f}  {result.chatid}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script pour (re)construire l'index de recherche plein texte des conversations
+
+Usage:
+    python scripts/refresh_search_index.py [--full]
+
+Options:
+    --full   : Vider l'index et réindexer toutes les conversations
+               (sinon seules les conversations modifiées depuis le dernier passage)
+"""
+
+import os
+import sys
+import argparse
+import time
+
+# Ajouter le répertoire parent au PATH pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import execute_query
+from database.search import refresh_search_index
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Mise a jour de l\'index de recherche des conversations')
+    parser.add_argument('--full', action='store_true', help='Reconstruire entierement l\'index')
+    args = parser.parse_args()
+    
+    start_time = time.time()
+    
+    if args.full:
+        print(">> Vidage de l'index de recherche...")
+        if not execute_query("TRUNCATE conversation_search", fetch=False):
+            print(">> Erreur lors du vidage de l'index")
+            sys.exit(1)
+    
+    print(">> Indexation des conversations modifiees...")
+    if not refresh_search_index(force=True):
+        print(">> Erreur lors de l'indexation (voir les logs)")
+        sys.exit(1)
+    
+    count_df = execute_query("SELECT COUNT(*) as total FROM conversation_search")
+    total = int(count_df.iloc[0]['total']) if not count_df.empty else 0
+    print(f">> Index a jour : {total} conversation(s) en {time.time() - start_time:.1f}s")
+
+if __name__ == "__main__":
+    main()
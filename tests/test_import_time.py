@@ -0,0 +1,25 @@
+"""
+Budget de démarrage à froid du dashboard (voir scripts/check_import_time.py)
+"""
+import importlib.util
+import os
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_spec = importlib.util.spec_from_file_location(
+    "check_import_time", os.path.join(PROJECT_DIR, "scripts", "check_import_time.py")
+)
+check_import_time = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(check_import_time)
+
+
+def test_app_import_within_budget():
+    # Meilleure de trois mesures, comme le script
+    best_ms, _ = min((check_import_time.measure_import('app') for _ in range(3)), key=lambda m: m[0])
+    assert best_ms <= check_import_time.DEFAULT_BUDGET_MS, f"Import de app.py : {best_ms:.0f} ms"
+
+
+def test_heavy_dependencies_stay_lazy():
+    _, imported = check_import_time.measure_import('app')
+    eager = [name for name in check_import_time.LAZY_MODULES if name in imported]
+    assert not eager, f"Importés au démarrage : {', '.join(eager)}"
@@ -0,0 +1,40 @@
+"""
+Lecture des réponses du modèle (completion et thèmes MarIA)
+"""
+from utils.llm_analysis import parse_completion_answer, parse_themes_analysis
+
+
+def test_parse_completion_answer():
+    assert parse_completion_answer("COMPLÈTE") is True
+    assert parse_completion_answer("complete") is True
+    assert parse_completion_answer("INCOMPLÈTE") is False
+    assert parse_completion_answer("INCOMPLETE.") is False
+    assert parse_completion_answer("") is False
+    assert parse_completion_answer(None) is False
+
+
+def test_parse_themes_analysis_plain():
+    answer = """1. Utilisation actuelle des services: [OUI]
+2. Expérience avec les services: [NON]
+3. Objectif principal en Colombie: OUI
+4. Attentes d'accompagnement: NON
+5. Perception de valeur de la CCI: NON
+6. Suggestions d'amélioration: OUI"""
+    assert parse_themes_analysis(answer) == {1: True, 2: False, 3: True, 4: False, 5: False, 6: True}
+
+
+def test_parse_themes_analysis_markdown():
+    answer = """Voici l'analyse :
+
+- **1. Utilisation actuelle des services:** **OUI**
+- **2. Expérience avec les services :** Non
+* 3) Objectif principal en Colombie - oui
+**4. Attentes d'accompagnement**: [NON]"""
+    assert parse_themes_analysis(answer) == {1: True, 2: False, 3: True, 4: False}
+
+
+def test_parse_themes_analysis_unrecognized(capsys):
+    assert parse_themes_analysis("Je ne peux pas répondre.") is None
+    assert "non reconnue" in capsys.readouterr().out
+    assert parse_themes_analysis("Analyse non disponible") is None
+    assert parse_themes_analysis(None) is None
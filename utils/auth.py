@@ -5,10 +5,6 @@ import os
 import time
 import hashlib
 import streamlit as st
-from dotenv import load_dotenv
-
-# Charger les variables d'environnement
-load_dotenv()
 
 from config.settings import AUTH_USERNAME, AUTH_PASSWORD
 
@@ -0,0 +1,70 @@
+"""
+Préchauffage du cache partagé pour la période par défaut du dashboard
+Exécuté au démarrage du processus Streamlit puis à intervalle régulier
+"""
+import logging
+import threading
+import time
+
+import streamlit as st
+
+from config.settings import CACHE_WARMER_ENABLED, CACHE_WARMER_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def warm_cache():
+    """
+    Précalculer les KPIs, le tableau résumé et la liste du lecteur pour la période par défaut
+    """
+    from components.kpis import get_default_period, load_kpi_data, load_response_times, load_analysis_breakdown
+    from components.conversations import get_prepared_conversations
+    from database.cache import get_conversation_list_store
+    from database.search import refresh_search_index
+    from database.activity import refresh_hourly_activity
+    from database.embedding_index import refresh_embedding_index
+    from database.contacts import refresh_contact_rollup
+
+    start_date, end_date = get_default_period()
+    steps = [
+        ("KPIs", lambda: load_kpi_data(start_date, end_date)),
+        ("temps de réponse", lambda: load_response_times(start_date, end_date)),
+        ("analyse IA", lambda: load_analysis_breakdown(start_date, end_date)),
+        ("tableau résumé", lambda: get_prepared_conversations(start_date, end_date)),
+        ("liste du lecteur", lambda: get_conversation_list_store().get_frame()),
+        ("index de recherche", refresh_search_index),
+        ("cumul horaire d'activité", refresh_hourly_activity),
+        ("index sémantique", refresh_embedding_index),
+        ("cumul par contact", refresh_contact_rollup),
+    ]
+    for label, step in steps:
+        step_start = time.perf_counter()
+        try:
+            step()
+            logger.info("Préchauffage %s : %.0f ms", label, (time.perf_counter() - step_start) * 1000)
+        except Exception as e:
+            logger.warning(f"Erreur lors du préchauffage ({label}): {e}")
+
+
+def _warm_cache_forever(interval_seconds):
+    while True:
+        warm_cache()
+        time.sleep(interval_seconds)
+
+
+@st.cache_resource
+def start_cache_warmer():
+    """
+    Démarrer le thread de préchauffage (une seule fois par processus serveur)
+    """
+    if not CACHE_WARMER_ENABLED:
+        return None
+
+    thread = threading.Thread(
+        target=_warm_cache_forever,
+        args=(CACHE_WARMER_INTERVAL_SECONDS,),
+        name="cache-warmer",
+        daemon=True
+    )
+    thread.start()
+    return thread
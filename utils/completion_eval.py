@@ -0,0 +1,224 @@
+"""
+Évaluation hors ligne du classifieur de completion sur un échantillon étiqueté figé
+Un classifieur expose name et classify(conversation, provider) -> dict de résultat ;
+les appels au modèle passent par un fournisseur avec cache disque (une même requête n'est payée qu'une fois)
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from config.settings import COMPLETION_MIN_MESSAGES
+
+# Prix en dollars par million de tokens (entrée, sortie), pour estimer le coût d'une variante
+MODEL_PRICES = {
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4.1-mini': (0.40, 1.60),
+    'gpt-4.1-nano': (0.10, 0.40),
+}
+
+# Numéro colombien donné par MarIA lors d'une redirection (+57 xxx xxx xxxx)
+PHONE_PATTERN = re.compile(r"\+57\s?\d{3}\s?\d{3}\s?\d{4}")
+
+
+def read_sample(path):
+    """
+    Lire l'échantillon figé (JSON Lines : chatid, label, label_source, messages [{role, content}])
+    """
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def write_sample(path, conversations):
+    """
+    Écrire l'échantillon figé (les étiquettes peuvent ensuite être corrigées à la main)
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        for conversation in conversations:
+            file.write(json.dumps(conversation, ensure_ascii=False, default=str) + "\n")
+
+
+class CachedChatProvider:
+    """
+    Appels chat completions mis en cache sur disque, clé = (modèle, prompt, max_tokens, température).
+    Le résultat d'origine (réponse, tokens, latence) est conservé : une réexécution est gratuite.
+    """
+
+    def __init__(self, cache_dir, client_factory=None):
+        self.cache_dir = cache_dir
+        self.client_factory = client_factory
+        self._client = None
+        self._client_lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def complete(self, model, prompt, max_tokens=10, temperature=0):
+        """
+        Retourner {answer, prompt_tokens, completion_tokens, latency, cached}
+        """
+        key = hashlib.sha256(
+            json.dumps([model, prompt, max_tokens, temperature], ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        path = os.path.join(self.cache_dir, key[:2], f"{key}.json")
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                return {**json.load(file), 'cached': True}
+
+        start = time.perf_counter()
+        response = self._get_client().chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        result = {
+            'answer': response.choices[0].message.content.strip(),
+            'prompt_tokens': response.usage.prompt_tokens if response.usage else 0,
+            'completion_tokens': response.usage.completion_tokens if response.usage else 0,
+            'latency': time.perf_counter() - start,
+        }
+
+        # Écriture atomique : deux exécutions parallèles ne laissent jamais un fichier partiel
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(path), delete=False) as file:
+            json.dump(result, file, ensure_ascii=False)
+        os.replace(file.name, path)
+        return {**result, 'cached': False}
+
+    def _get_client(self):
+        with self._client_lock:
+            if self._client is None:
+                if self.client_factory is None:
+                    from utils.llm_analysis import get_client
+                    self.client_factory = get_client
+                self._client = self.client_factory()
+            return self._client
+
+
+class RuleClassifier:
+    """
+    Règle sans modèle : au moins COMPLETION_MIN_MESSAGES messages et un numéro +57 donné par MarIA
+    """
+
+    def __init__(self, model=None):
+        self.name = "regle-numero"
+
+    def classify(self, conversation, provider):
+        messages = conversation['messages']
+        has_phone = any(
+            message.get('role') == 'agent' and PHONE_PATTERN.search(message.get('content') or '')
+            for message in messages
+        )
+        prediction = len(messages) >= COMPLETION_MIN_MESSAGES and has_phone
+        return {'prediction': prediction, 'answer': "numero" if has_phone else "", 'prompt_tokens': 0,
+                'completion_tokens': 0, 'latency': 0.0, 'cached': False}
+
+
+class PromptClassifier:
+    """
+    Classifieur par prompt : build_prompt(conversation) -> texte, réponse lue par parse_completion_answer.
+    Les conversations trop courtes sont jugées incomplètes sans appel (comme en production).
+    """
+
+    def __init__(self, name, build_prompt, model, max_tokens=10):
+        self.name = f"{name}/{model}"
+        self.build_prompt = build_prompt
+        self.model = model
+        self.max_tokens = max_tokens
+
+    def classify(self, conversation, provider):
+        from utils.llm_analysis import parse_completion_answer
+
+        if len(conversation['messages']) < COMPLETION_MIN_MESSAGES:
+            return {'prediction': False, 'answer': "trop court", 'prompt_tokens': 0,
+                    'completion_tokens': 0, 'latency': 0.0, 'cached': False}
+        result = provider.complete(self.model, self.build_prompt(conversation), max_tokens=self.max_tokens)
+        return {**result, 'prediction': parse_completion_answer(result['answer'])}
+
+
+def _agent_messages_prompt(conversation):
+    from utils.llm_analysis import build_completion_prompt
+    return build_completion_prompt(conversation['messages'])
+
+
+def _last_message_prompt(conversation):
+    from utils.llm_analysis import build_last_message_completion_prompt
+    messages = conversation['messages']
+    return build_last_message_completion_prompt(messages[-1].get('content') or "" if messages else "")
+
+
+# Variantes disponibles (ajouter ici une nouvelle version de prompt) : nom -> fabrique(model)
+COMPLETION_VARIANTS = {
+    'regle-numero': RuleClassifier,
+    'prompt-messages-agent': lambda model: PromptClassifier('prompt-messages-agent', _agent_messages_prompt, model),
+    'prompt-dernier-message': lambda model: PromptClassifier('prompt-dernier-message', _last_message_prompt, model),
+}
+
+
+def get_completion_classifier(variant, model='gpt-4o-mini'):
+    """
+    Retourner le classifieur d'une variante de COMPLETION_VARIANTS
+    """
+    if variant not in COMPLETION_VARIANTS:
+        raise ValueError(f"Variante inconnue: {variant}")
+    return COMPLETION_VARIANTS[variant](model)
+
+
+def run_evaluation(conversations, classifier, provider, workers=8):
+    """
+    Classer toutes les conversations en parallèle ; retourne un DataFrame (une ligne par conversation)
+    """
+    def classify(conversation):
+        try:
+            result = classifier.classify(conversation, provider)
+            error = None
+        except Exception as e:
+            result = {'prediction': None, 'answer': "", 'prompt_tokens': 0, 'completion_tokens': 0,
+                      'latency': 0.0, 'cached': False}
+            error = str(e)
+        return {'chatid': conversation['chatid'], 'label': bool(conversation['label']),
+                'message_count': len(conversation['messages']), **result, 'error': error}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return pd.DataFrame(list(executor.map(classify, conversations)))
+
+
+def summarize_evaluation(results, model=None):
+    """
+    Exactitude, précision / rappel de la classe « complète », latence, tokens et coût d'une évaluation
+    """
+    judged = results[results['error'].isna()]
+    predictions = judged['prediction'].astype(bool)
+    labels = judged['label'].astype(bool)
+    true_positive = int((predictions & labels).sum())
+    false_positive = int((predictions & ~labels).sum())
+    false_negative = int((~predictions & labels).sum())
+
+    called = judged[judged['prompt_tokens'] > 0]
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    tokens_cost = (called['prompt_tokens'] * input_price + called['completion_tokens'] * output_price) / 1_000_000
+    billed = ~called['cached'].astype(bool)
+
+    return {
+        'conversations': len(results),
+        'errors': int(results['error'].notna().sum()),
+        'accuracy': float((predictions == labels).mean()) if len(judged) else 0.0,
+        'precision': true_positive / (true_positive + false_positive) if true_positive + false_positive else 0.0,
+        'recall': true_positive / (true_positive + false_negative) if true_positive + false_negative else 0.0,
+        'false_positives': false_positive,
+        'false_negatives': false_negative,
+        'latency_p50': float(called['latency'].quantile(0.5)) if len(called) else 0.0,
+        'latency_p95': float(called['latency'].quantile(0.95)) if len(called) else 0.0,
+        'prompt_tokens': int(called['prompt_tokens'].sum()),
+        'completion_tokens': int(called['completion_tokens'].sum()),
+        'cached_calls': int(called['cached'].astype(bool).sum()),
+        'full_run_cost': float(tokens_cost.sum()),
+        'billed_cost': float(tokens_cost[billed].sum()),
+    }
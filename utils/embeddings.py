@@ -0,0 +1,94 @@
+"""
+Fournisseurs d'embeddings pour la recherche sémantique des résumés
+Un fournisseur expose name, dim et embed(texts) -> matrice float32 (une ligne normalisée par texte)
+"""
+import hashlib
+import re
+import unicodedata
+
+import numpy as np
+
+from config.settings import EMBEDDING_PROVIDER, EMBEDDING_MODEL, EMBEDDING_DIM
+
+
+def normalize_rows(vectors):
+    """
+    Normaliser chaque ligne (norme L2 = 1) : le produit scalaire devient la similarité cosinus
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class HashingEmbeddingProvider:
+    """
+    Vectorisation locale par hachage (mots et paires de mots), déterministe et sans réseau.
+    Moins fine qu'un modèle d'embeddings, mais suffisante pour regrouper les résumés par thème.
+    """
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = self._tokenize(text)
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+                value = int.from_bytes(digest, 'little')
+                # Signe tiré du hachage : les collisions se compensent au lieu de s'additionner
+                vectors[row, value % self.dim] += 1.0 if (value >> 63) else -1.0
+        # Atténuer les mots répétés (équivalent d'un tf logarithmique)
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        return normalize_rows(vectors)
+
+    @staticmethod
+    def _tokenize(text):
+        text = unicodedata.normalize('NFKD', str(text or '').lower())
+        text = ''.join(char for char in text if not unicodedata.combining(char))
+        # Pluriel simple retiré (visas -> visa) pour rapprocher les formes d'un même mot
+        return [token[:-1] if len(token) > 3 and token.endswith('s') else token
+                for token in re.findall(r"\w+", text) if len(token) > 2]
+
+
+class OpenAIEmbeddingProvider:
+    """
+    Embeddings de l'API OpenAI (client partagé de utils.llm_analysis)
+    """
+
+    def __init__(self, model=EMBEDDING_MODEL, batch_size=100):
+        self.model = model
+        self.batch_size = batch_size
+        self.name = f"openai-{model}"
+        self.dim = None
+
+    def embed(self, texts):
+        from utils.llm_analysis import get_client
+
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [str(text or ' ') for text in texts[start:start + self.batch_size]]
+            response = get_client().embeddings.create(model=self.model, input=batch)
+            vectors.extend(item.embedding for item in response.data)
+        vectors = normalize_rows(vectors) if vectors else np.zeros((0, self.dim or 0), dtype=np.float32)
+        self.dim = vectors.shape[1] if len(vectors) else self.dim
+        return vectors
+
+
+# Fournisseurs disponibles (ajouter ici un nouveau fournisseur)
+EMBEDDING_PROVIDERS = {
+    'hashing': HashingEmbeddingProvider,
+    'openai': OpenAIEmbeddingProvider,
+}
+
+
+def get_embedding_provider(name=EMBEDDING_PROVIDER):
+    """
+    Retourner le fournisseur d'embeddings configuré
+    """
+    if name not in EMBEDDING_PROVIDERS:
+        raise ValueError(f"Fournisseur d'embeddings inconnu: {name}")
+    return EMBEDDING_PROVIDERS[name]()
@@ -3,29 +3,38 @@ Module d'analyse LLM pour les résumés de conversations
 """
 import os
 import sys
-from openai import OpenAI
 import streamlit as st
-from dotenv import load_dotenv
 import json
+import re
 
-# Forcer l'encodage UTF-8 pour tout le script
-if sys.stdout.encoding != 'utf-8':
-    sys.stdout.reconfigure(encoding='utf-8')
-if sys.stderr.encoding != 'utf-8':
-    sys.stderr.reconfigure(encoding='utf-8')
+from config.settings import OPENAI_API_KEY, MARIA_THEMES
 
-# Charger les variables d'environnement
-load_dotenv()
+# Client OpenAI créé au premier appel : l'import du module reste léger pour le dashboard
+_client = None
 
-from config.settings import OPENAI_API_KEY, MARIA_THEMES
+def get_client():
+    """
+    Retourner le client OpenAI (headers ASCII), créé une seule fois
+    """
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(
+            api_key=OPENAI_API_KEY,
+            default_headers={
+                "User-Agent": "CCI-Colombia-Dashboard/1.0"
+            }
+        )
+    return _client
 
-# Configuration OpenAI - Nouveau client avec headers ASCII
-client = OpenAI(
-    api_key=OPENAI_API_KEY,
-    default_headers={
-        "User-Agent": "CCI-Colombia-Dashboard/1.0"
-    }
-)
+def configure_utf8_stdio():
+    """
+    Forcer l'encodage UTF-8 de la console (à appeler par les scripts en ligne de commande)
+    """
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout.reconfigure(encoding='utf-8')
+    if sys.stderr.encoding != 'utf-8':
+        sys.stderr.reconfigure(encoding='utf-8')
 
 def ensure_utf8(text):
     """S'assurer qu'une chaîne est en UTF-8"""
@@ -33,6 +42,80 @@ def ensure_utf8(text):
         return text.decode('utf-8', errors='ignore')
     return str(text).encode('utf-8', errors='ignore').decode('utf-8')
 
+def build_completion_prompt(messages_content):
+    """
+    Prompt de completion sur les messages de MarIA (liste de messages {role, content})
+    ou sur un texte seul (ancien comportement : dernier message)
+    """
+    conversation_text = ""
+    if isinstance(messages_content, str):
+        conversation_text = messages_content
+    else:
+        for msg in messages_content:
+            if msg.get('role') == 'agent':  # Seulement les messages de MarIA
+                conversation_text += f"{msg['content']}\n"
+    
+    return f"""
+    Analyse cette conversation avec l'agent MarIA de la CCI France Colombia pour déterminer si elle est COMPLÈTE.
+    
+    MESSAGES DE MARIA:
+    {conversation_text}
+    
+    Une conversation est COMPLÈTE si MarIA a fait au moins UNE des actions suivantes:
+    1. Recommandé un service CCI spécifique
+    2. Fourni un contact (nom + numéro WhatsApp)
+    3. Orienté vers une personne de l'équipe CCI
+    4. Donné des informations concrètes sur un service
+    5. Fourni des liens utiles (réseaux sociaux, newsletter, etc.)
+    
+    Une conversation est INCOMPLÈTE si MarIA a seulement:
+    - Salué le client
+    - Posé des questions de qualification
+    - Demandé des précisions
+    - Donné des informations générales sur la CCI
+    
+    Exemples de messages COMPLETS (recommandations):
+    - "Je vous mets en contact avec Yasmine au +57 304 658 9045"
+    - "Pour l'accompagnement commercial, contactez Nicolas Velásquez"
+    - "Je vous recommande notre service de missions économiques"
+    - "Voici nos réseaux sociaux pour suivre nos événements"
+    - "Vous pouvez vous inscrire à notre newsletter"
+    
+    Exemples de messages INCOMPLETS:
+    - "Bonjour ! Pour mieux vous aider..."
+    - "Pourriez-vous me préciser votre secteur d'activité ?"
+    - "Ravie de vous accueillir dans notre communauté"
+    
+    Réponds uniquement par "COMPLÈTE" ou "INCOMPLÈTE".
+    """
+
+def build_last_message_completion_prompt(last_message):
+    """
+    Prompt de completion du batch d'analyse : dernier message seulement
+    (numéro WhatsApp ou redirection vers un contact de l'équipe CCI)
+    """
+    return f"""
+    Analyse ce message final d'une conversation avec l'agent MarIA de la CCI France Colombia.
+    
+    Message: "{last_message}"
+    
+    Détermine si cette conversation est COMPLÈTE selon ces critères:
+    1. Le message contient un numéro de téléphone WhatsApp (format +57 xxx xxx xxxx)
+    2. Le message indique une redirection vers un contact spécifique de l'équipe CCI
+    
+    Réponds uniquement par "COMPLETE" ou "INCOMPLETE".
+    """
+
+def parse_completion_answer(answer):
+    """
+    Interpréter la réponse du modèle : True pour COMPLÈTE/COMPLETE, False pour INCOMPLÈTE/INCOMPLETE
+    (« INCOMPLETE » contient « COMPLETE » : tester la forme négative d'abord)
+    """
+    normalized = (answer or "").strip().upper().replace("È", "E")
+    if "INCOMPLETE" in normalized:
+        return False
+    return "COMPLETE" in normalized
+
 def analyze_conversation_completion(messages_content):
     """
     Analyser si une conversation est complète (contient une recommandation de service)
@@ -44,59 +127,16 @@ def analyze_conversation_completion(messages_content):
                 return False
         
         # Analyser tous les messages de MarIA, pas seulement le dernier
-        conversation_text = ""
-        if isinstance(messages_content, str):
-            # Si c'est juste le dernier message (ancien comportement)
-            conversation_text = messages_content
-        else:
-            # Si c'est une liste de messages (nouveau comportement)
-            for msg in messages_content:
-                if msg.get('role') == 'agent':  # Seulement les messages de MarIA
-                    conversation_text += f"{msg['content']}\n"
+        prompt = build_completion_prompt(messages_content)
         
-        prompt = f"""
-        Analyse cette conversation avec l'agent MarIA de la CCI France Colombia pour déterminer si elle est COMPLÈTE.
-        
-        MESSAGES DE MARIA:
-        {conversation_text}
-        
-        Une conversation est COMPLÈTE si MarIA a fait au moins UNE des actions suivantes:
-        1. Recommandé un service CCI spécifique
-        2. Fourni un contact (nom + numéro WhatsApp)
-        3. Orienté vers une personne de l'équipe CCI
-        4. Donné des informations concrètes sur un service
-        5. Fourni des liens utiles (réseaux sociaux, newsletter, etc.)
-        
-        Une conversation est INCOMPLÈTE si MarIA a seulement:
-        - Salué le client
-        - Posé des questions de qualification
-        - Demandé des précisions
-        - Donné des informations générales sur la CCI
-        
-        Exemples de messages COMPLETS (recommandations):
-        - "Je vous mets en contact avec Yasmine au +57 304 658 9045"
-        - "Pour l'accompagnement commercial, contactez Nicolas Velásquez"
-        - "Je vous recommande notre service de missions économiques"
-        - "Voici nos réseaux sociaux pour suivre nos événements"
-        - "Vous pouvez vous inscrire à notre newsletter"
-        
-        Exemples de messages INCOMPLETS:
-        - "Bonjour ! Pour mieux vous aider..."
-        - "Pourriez-vous me préciser votre secteur d'activité ?"
-        - "Ravie de vous accueillir dans notre communauté"
-        
-        Réponds uniquement par "COMPLÈTE" ou "INCOMPLÈTE".
-        """
-        
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
             max_tokens=10,
             temperature=0
         )
         
-        result = response.choices[0].message.content.strip()
-        return "COMPLÈTE" in result.upper()
+        return parse_completion_answer(response.choices[0].message.content)
         
     except Exception as e:
         # Éviter st.error() qui cause des problèmes UTF-8 hors contexte Streamlit
@@ -128,7 +168,7 @@ Resume en 3 points courts (meme langue que conversation):
 2. Services/contacts recommandes
 3. Statut"""
         
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
             max_tokens=150,  # Réduit de 300 à 150 pour économiser
@@ -168,7 +208,7 @@ def extract_client_name_from_conversation(messages_df):
         Réponse (juste le nom):
         """
         
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
             max_tokens=20,
@@ -209,7 +249,7 @@ def extract_company_from_conversation(messages_df):
         Réponse (juste le nom de l'entreprise):
         """
         
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
             max_tokens=20,  # Réduit de 30 à 20
@@ -256,7 +296,7 @@ def extract_themes_analysis(messages_df):
         6. Suggestions d'amélioration: [OUI/NON]
         """
         
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
             max_tokens=200,
@@ -270,6 +310,26 @@ def extract_themes_analysis(messages_df):
         print(f"Erreur lors de l'analyse des thèmes: {e}")
         return "Analyse non disponible"
 
+# Ligne de réponse des thèmes, une fois la mise en forme markdown retirée :
+# « 1. Utilisation actuelle des services: [OUI] », « 2) Expérience ... - non »
+THEME_LINE_PATTERN = re.compile(r"^\s*(?:[-•]\s*)?(\d+)\s*[.)].*?[:\-–]\s*\[?\s*(OUI|NON)\b", re.IGNORECASE)
+MARKDOWN_PATTERN = re.compile(r"[*_`#>]")
+
+def parse_themes_analysis(analysis_text):
+    """
+    Convertir la réponse de extract_themes_analysis en {numéro du thème (1 à 6): abordé}
+    Tolère le gras, les puces et la casse ; retourne None (réponse journalisée) si aucun
+    thème n'est reconnu
+    """
+    coverage = {}
+    for line in (analysis_text or "").splitlines():
+        match = THEME_LINE_PATTERN.match(MARKDOWN_PATTERN.sub("", line))
+        if match and 1 <= int(match.group(1)) <= len(MARIA_THEMES):
+            coverage[int(match.group(1))] = match.group(2).upper() == "OUI"
+    if not coverage and analysis_text and analysis_text != "Analyse non disponible":
+        print(f"Réponse d'analyse des thèmes non reconnue: {analysis_text[:300]!r}")
+    return coverage or None
+
 def regenerate_summary_only(chatid):
     """
     Re-générer uniquement le résumé d'une conversation existante
@@ -407,7 +467,7 @@ def analyze_service_interest(messages_df):
     """
     
     try:
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],  # Pas de system message
             max_tokens=30,
@@ -0,0 +1,111 @@
+"""
+Signatures MinHash et index LSH pour repérer les conversations quasi identiques
+Coût linéaire : une signature par conversation, puis regroupement par bandes (pas de comparaison n x n)
+"""
+import hashlib
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+# Nombre premier de Mersenne 2^31 - 1 : (a * x + b) reste dans un entier 64 bits
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def text_shingles(text, size=3):
+    """
+    Ensemble des suites de size mots consécutifs (minuscules, sans accents ni ponctuation)
+    """
+    text = unicodedata.normalize('NFKD', str(text or '').lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    words = re.findall(r"\w+", text)
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """
+    Calcul vectorisé (NumPy) des signatures MinHash avec num_perm fonctions (a * x + b) mod p
+    """
+
+    def __init__(self, num_perm=128, seed=42):
+        self.num_perm = num_perm
+        generator = np.random.default_rng(seed)
+        self._a = generator.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+        self._b = generator.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+
+    def signature(self, shingles):
+        """
+        Signature (num_perm entiers) d'un ensemble de shingles, None si l'ensemble est vide
+        """
+        if not shingles:
+            return None
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'little')
+             for shingle in shingles),
+            dtype=np.int64,
+            count=len(shingles)
+        ) % _MERSENNE_PRIME
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+def estimated_similarity(signature_a, signature_b):
+    """
+    Similarité de Jaccard estimée : part des positions égales des deux signatures
+    """
+    return float(np.mean(signature_a == signature_b))
+
+
+def find_similar_clusters(signatures, bands=16, threshold=0.8):
+    """
+    Regrouper les clés dont les signatures sont quasi identiques (LSH par bandes puis vérification)
+
+    signatures : {clé: signature}, toutes de même longueur (multiple de bands)
+    Retourne une liste de (clés du groupe, similarité minimale vérifiée), groupes de 2 ou plus
+    """
+    keys = list(signatures)
+    if not keys:
+        return []
+    rows = len(signatures[keys[0]]) // bands
+
+    # Deux conversations partageant une bande identique deviennent candidates. Chaque membre d'un
+    # compartiment est comparé au premier seulement : le coût reste linéaire même pour un gros groupe
+    candidate_pairs = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for index, key in enumerate(keys):
+            buckets[signatures[key][band * rows:(band + 1) * rows].tobytes()].append(index)
+        for members in buckets.values():
+            for member in members[1:]:
+                candidate_pairs.add((members[0], member))
+
+    # Union-find sur les paires dont la similarité estimée dépasse le seuil
+    parents = list(range(len(keys)))
+
+    def find(index):
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    pair_similarity = {}
+    for first, second in candidate_pairs:
+        similarity = estimated_similarity(signatures[keys[first]], signatures[keys[second]])
+        if similarity >= threshold:
+            pair_similarity[(first, second)] = similarity
+            parents[find(first)] = find(second)
+
+    clusters = defaultdict(set)
+    cluster_similarity = {}
+    for (first, second), similarity in pair_similarity.items():
+        root = find(first)
+        clusters[root].update((first, second))
+        cluster_similarity[root] = min(similarity, cluster_similarity.get(root, 1.0))
+
+    return [
+        ([keys[index] for index in sorted(members)], cluster_similarity[root])
+        for root, members in clusters.items()
+    ]
@@ -0,0 +1,47 @@
+"""
+Mesure des temps d'exécution par interaction (exécution complète ou fragment)
+"""
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from config.settings import SHOW_PERF_TIMINGS
+
+# Nombre de mesures conservées par session
+PERF_TIMINGS_HISTORY = 30
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def measure(label):
+    """
+    Mesurer la durée d'un bloc, la journaliser et la conserver dans la session
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info("%s : %.0f ms", label, elapsed_ms)
+        timings = st.session_state.setdefault('perf_timings', [])
+        timings.append({'Heure': datetime.now().strftime('%H:%M:%S'), 'Bloc': label, 'Durée (ms)': round(elapsed_ms)})
+        del timings[:-PERF_TIMINGS_HISTORY]
+
+
+def show_perf_timings():
+    """
+    Afficher les dernières mesures dans la sidebar (si SHOW_PERF_TIMINGS est activé)
+    """
+    if not SHOW_PERF_TIMINGS:
+        return
+    timings = st.session_state.get('perf_timings', [])
+    with st.sidebar.expander("⏱️ Temps par interaction"):
+        if timings:
+            st.dataframe(pd.DataFrame(timings[::-1]), hide_index=True, use_container_width=True)
+        else:
+            st.caption("Aucune mesure pour le moment")